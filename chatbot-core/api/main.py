@@ -2,12 +2,31 @@
 Main entry point for the FastAPI application.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api.routes import chatbot
+from api.routes import chatbot, health
 from api.config.loader import CONFIG
+from api.services.startup import run_startup
+from utils import LoggerFactory
 
-app = FastAPI()
+logger = LoggerFactory.instance().get_logger("api")
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """
+    Load the models and indexes and warm them up in the background, serving right
+    away: /health answers while they load, and /ready and the chat routes answer
+    503 until the worker is ready.
+    """
+    startup_task = asyncio.create_task(run_startup(logger))
+    yield
+    startup_task.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -19,4 +38,5 @@ app.add_middleware(
 )
 
 # Routes
+app.include_router(health.router)
 app.include_router(chatbot.router, prefix=CONFIG["api"]["prefix"])
@@ -1,9 +1,15 @@
-"""Loads and exports once the sentence transformer model."""
+"""Exports the sentence transformer model, loaded once on first use or at startup."""
 
 from rag.embedding.embedding_utils import load_embedding_model
 from api.config.loader import CONFIG
+from api.models.lazy_resource import LazyResource
 from utils import LoggerFactory
 
 logger = LoggerFactory.instance().get_logger("api")
 
-EMBEDDING_MODEL = load_embedding_model(CONFIG["retrieval"]["embedding_model_name"], logger)
+EMBEDDING_MODEL = LazyResource("embedding_model", lambda: load_embedding_model(
+    CONFIG["retrieval"]["embedding_model_name"],
+    logger,
+    backend=CONFIG["retrieval"].get("embedding_backend", "torch"),
+    onnx_model_dir=CONFIG["retrieval"].get("onnx_model_dir")
+))
@@ -0,0 +1,45 @@
+"""
+Lazily loaded resources.
+
+The models are not loaded when their module is imported, but by the startup of
+the API (see api/services/startup.py), or on their first use otherwise, e.g. in
+scripts and tests.
+"""
+
+from threading import Lock
+
+
+class LazyResource:
+    """
+    Proxy to an object that is created on first access.
+
+    Attribute lookups are forwarded to the loaded object, so the proxy can be used
+    in place of it. Loading is thread-safe and happens at most once; if it fails,
+    the next access tries again.
+    """
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._value = None
+        self._lock = Lock()
+
+    @property
+    def loaded(self):
+        """Whether the object has been created."""
+        return self._value is not None
+
+    def load(self):
+        """
+        Create the object, if it is not created yet, and return it.
+
+        Returns:
+            Any: The object returned by the factory.
+        """
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._factory()
+        return self._value
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
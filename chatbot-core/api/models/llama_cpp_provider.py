@@ -11,6 +11,7 @@ from threading import Lock
 from typing import AsyncGenerator
 from llama_cpp import Llama
 from api.config.loader import CONFIG
+from api.models.lazy_resource import LazyResource
 from api.models.llm_provider import LLMProvider
 from utils import LoggerFactory
 import asyncio
@@ -103,4 +104,4 @@ class LlamaCppProvider(LLMProvider):
             logger.error("Unexpected error during LLM streaming: %s", e)
             yield "Sorry, something went wrong during generation."
 
-llm_provider = None if CONFIG["is_test_mode"] else LlamaCppProvider()
+llm_provider = None if CONFIG["is_test_mode"] else LazyResource("llm", LlamaCppProvider)
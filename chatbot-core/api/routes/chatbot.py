@@ -6,7 +6,15 @@ This module acts as a "controller" connecting the HTTP layer to
 the chat service logic.
 """
 
-from fastapi import APIRouter, HTTPException, Response, status, WebSocket, WebSocketDisconnect
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Response,
+    status,
+    WebSocket,
+    WebSocketDisconnect
+)
 from api.models.schemas import (
     ChatRequest,
     ChatResponse,
@@ -14,6 +22,7 @@ from api.models.schemas import (
     DeleteResponse
 )
 from api.services.chat_service import get_chatbot_reply, get_chatbot_reply_stream
+from api.services.startup import readiness
 from api.services.memory import (
     init_session,
     delete_session,
@@ -22,6 +31,17 @@ from api.services.memory import (
 import json
 
 router = APIRouter()
+NOT_READY_MESSAGE = "The chatbot is starting up. Please retry shortly."
+
+
+def require_ready():
+    """
+    Dependency rejecting the chat requests with 503 until the models and indexes
+    are loaded and warmed up.
+    """
+    if not readiness.is_ready():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail=NOT_READY_MESSAGE, headers={"Retry-After": "5"})
 
 
 @router.post("/sessions", response_model=SessionResponse, status_code=status.HTTP_201_CREATED)
@@ -41,13 +61,14 @@ def start_chat(response: Response):
     return SessionResponse(session_id=session_id)
 
 
-@router.post("/sessions/{session_id}/message", response_model=ChatResponse)
+@router.post("/sessions/{session_id}/message", response_model=ChatResponse,
+             dependencies=[Depends(require_ready)])
 def chatbot_reply(session_id: str, request: ChatRequest):
     """
     POST endpoint to handle chatbot replies.
 
     Receives a user message and returns the assistant's reply.
-    Validates that the session exists before processing.
+    Validates that the worker is ready and the session exists before processing.
 
     Args:
         session_id (str): The ID of the session from the URL path.
@@ -72,7 +93,12 @@ async def chatbot_stream(websocket: WebSocket, session_id: str):
         session_id (str): The ID of the session.
     """
     await websocket.accept()
-    
+
+    if not readiness.is_ready():
+        await websocket.send_text(json.dumps({"error": NOT_READY_MESSAGE}))
+        await websocket.close(code=1013)
+        return
+
     if not session_exists(session_id):
         await websocket.send_text(json.dumps({"error": "Session not found"}))
         await websocket.close()
@@ -0,0 +1,41 @@
+"""
+API router for the health and readiness probes.
+
+The models and indexes load in the background once the process serves requests.
+/health answers right away. /ready answers 200 only once they are loaded and the
+warm-up query has run, so that a load balancer only sends traffic to warm
+workers; until then the chat routes answer 503 too.
+"""
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from api.services.startup import readiness
+
+router = APIRouter()
+
+
+@router.get("/health")
+def health():
+    """
+    GET endpoint for the liveness probe.
+
+    Returns:
+        dict: {"status": "ok"} while the process is up.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def ready():
+    """
+    GET endpoint for the readiness probe.
+
+    Returns:
+        JSONResponse: The state of every component and of the warm-up, with status
+        200 when the worker is ready and 503 otherwise.
+    """
+    state = readiness.as_dict()
+    return JSONResponse(
+        content=state,
+        status_code=status.HTTP_200_OK if state["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
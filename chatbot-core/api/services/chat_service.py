@@ -3,6 +3,8 @@ Chat service layer responsible for processing the requests forwarded by the cont
 """
 
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import List, Optional, AsyncGenerator
 import ast
 import json
@@ -21,12 +23,17 @@ from api.models.embedding_model import EMBEDDING_MODEL
 from api.tools.tools import TOOL_REGISTRY
 from api.tools.utils import get_default_tools_call, validate_tool_calls, make_placeholder_replacer
 from rag.retriever.retrieve import get_relevant_documents
+from rag.retriever.query_cache import query_embedding_cache
+from rag.retriever.retrieval_context import RetrievalContext
 from utils import LoggerFactory
 
 logger = LoggerFactory.instance().get_logger("api")
 llm_config = CONFIG["llm"]
 retrieval_config = CONFIG["retrieval"]
 CODE_BLOCK_PLACEHOLDER_PATTERN = r"\[\[(?:CODE_BLOCK|CODE_SNIPPET)_(\d+)\]\]"
+# While search tools are queued, their start is checked this often so that they are
+# held to their own timeout.
+TOOL_QUEUE_POLL_SECONDS = 0.05
 
 def get_chatbot_reply(session_id: str, user_input: str) -> ChatResponse:
     """
@@ -118,7 +125,10 @@ def get_chatbot_reply_new_architecture(session_id: str, user_input: str) -> Chat
 
     logger.info("The provided user query is of type %s.", query_type)
 
-    reply = _handle_query_type(user_input, query_type, memory)
+    retrieval_context = RetrievalContext(EMBEDDING_MODEL, logger)
+    reply = _handle_query_type(user_input, query_type, memory, retrieval_context)
+    logger.info("Query embeddings: %s, cache: %s",
+                retrieval_context.get_stats(), query_embedding_cache.get_stats())
 
     memory.chat_memory.add_user_message(user_input)
     memory.chat_memory.add_ai_message(reply)
@@ -146,32 +156,35 @@ def _get_query_type(query: str) -> QueryType:
     return try_str_to_query_type(query_type, logger)
 
 
-def _handle_query_type(query: str, query_type: QueryType, memory) -> str:
+def _handle_query_type(query: str, query_type: QueryType, memory, retrieval_context) -> str:
     """
     Handles the query generation based on the query type. If SIMPLE it will call
     the simple pipeline, otherwise it will decompose into many queries and 
-    call the simple pipeline for each one.
+    call the simple pipeline for each one. In the MULTI case all the sub-queries
+    are embedded upfront with a single call.
 
     Args:
         query (str): The user query.
         query_type (QueryType): The query type('SIMPLE' or 'MULTI').
         memory: The conversational memory of the involved chat.
+        retrieval_context (RetrievalContext): Per-request cache of the query embeddings.
     
     Returns:
         str: The final reply of the chatbot.
     """
     if query_type == QueryType.MULTI:
         sub_queries = _get_sub_queries(query)
+        retrieval_context.prime(sub_queries)
 
         answers = []
         for sub_query in sub_queries:
             logger.info("Handling the sub-query: %s.", sub_query)
-            answers.append(_get_reply_simple_query_pipeline(sub_query, memory))
+            answers.append(_get_reply_simple_query_pipeline(sub_query, memory, retrieval_context))
 
         reply = _assemble_response(answers)
         logger.info("Final response: %s", reply)
     else:
-        reply = _get_reply_simple_query_pipeline(query, memory)
+        reply = _get_reply_simple_query_pipeline(query, memory, retrieval_context)
 
     return reply
 
@@ -215,13 +228,14 @@ def _assemble_response(answers: List[str]):
     return "\n\n".join(answer for answer in answers)
 
 
-def _get_reply_simple_query_pipeline(query: str, memory) -> str:
+def _get_reply_simple_query_pipeline(query: str, memory, retrieval_context) -> str:
     """
     Executes the pipeline to answer a simple query using retrieval and generation.
 
     Args:
         query (str): The user query to answer.
         memory: Memory context used in prompt construction.
+        retrieval_context (RetrievalContext): Per-request cache of the query embeddings.
 
     Returns:
         str: The generated answer or a fallback message if relevance is too low.
@@ -230,7 +244,7 @@ def _get_reply_simple_query_pipeline(query: str, memory) -> str:
     while iterations < retrieval_config["max_reformulate_iterations"] and relevance != 1:
         tool_calls = _get_agent_tool_calls(query)
 
-        retrieved_context = _execute_search_tools(tool_calls)
+        retrieved_context = _execute_search_tools(tool_calls, retrieval_context)
 
         logger.info("Retrieved context: %s", retrieved_context)
 
@@ -281,26 +295,24 @@ def _get_agent_tool_calls(query: str):
     return tool_calls_parsed
 
 
-def _execute_search_tools(tool_calls) -> str:
+def _execute_search_tools(tool_calls, retrieval_context) -> str:
     """
-    Executes the tool calls to retrieve relevant context information.
+    Executes the tool calls to retrieve relevant context information. The tools run
+    concurrently on a pool of the request; their outputs are assembled in the order of the
+    calls, leaving out the tools that failed or timed out.
 
     Args:
         tool_calls: A list of tool call specifications with tool names and parameters.
+        retrieval_context (RetrievalContext): Per-request cache of the query embeddings,
+            shared by all the tools.
 
     Returns:
         str: Combined output from all retrieval tools.
     """
-    retrieved_results = []
-    for call in tool_calls:
-        tool_name, params = call.get("tool"), call.get("params")
-        tool_fn = TOOL_REGISTRY.get(tool_name)
-
-        result = tool_fn(**params)
-        retrieved_results.append({
-            "tool": tool_name,
-            "output": result
-        })
+    retrieved_results, trace = _run_search_tools(tool_calls, retrieval_context)
+    logger.info("Search tools in %.1f ms: %s", trace["wall_ms"], "; ".join(
+        f"{entry['tool']} {entry['status']} in {entry['ms']:.1f} ms" for entry in trace["tools"]
+    ))
 
     return "\n\n".join(
         f"[Result of the search tool {res['tool']}]:\n{res.get('output', '')}".strip()
@@ -308,6 +320,93 @@ def _execute_search_tools(tool_calls) -> str:
     )
 
 
+# pylint: disable=too-many-locals
+def _run_search_tools(tool_calls, retrieval_context):
+    """
+    Runs the tool calls on a pool created for the request, of one thread per call up
+    to `tool_workers`, so the tools of concurrent requests never queue behind each
+    other. The calls are waited for within two limits from the config:
+    `tool_timeout_seconds` for every tool from the moment it starts, and
+    `tools_budget_seconds` for all of them. When a limit is reached, a running tool
+    is abandoned, its result is ignored, and a tool still queued behind the others of
+    the request is cancelled; both cases are logged apart.
+
+    Args:
+        tool_calls: A list of tool call specifications with tool names and parameters.
+        retrieval_context (RetrievalContext): Per-request cache of the query embeddings.
+
+    Returns:
+        tuple[list[dict], dict]: The tool and output of every completed call, in the
+        order of the calls, and the trace: the wall time in ms ("wall_ms") and, for
+        every call ("tools"), its tool, its status ("done", "failed", "timed out" or
+        "cancelled in queue") and its duration in ms, the time spent queued for the
+        cancelled ones.
+    """
+    tool_timeout = retrieval_config.get("tool_timeout_seconds", 30)
+    start = time.perf_counter()
+    budget_deadline = start + retrieval_config.get("tools_budget_seconds", 60)
+    started_at = [None] * len(tool_calls)
+
+    def run(position, tool_name, params):
+        started_at[position] = time.perf_counter()
+        return TOOL_REGISTRY.get(tool_name)(**params, logger=logger,
+                                            retrieval_context=retrieval_context)
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(len(tool_calls), retrieval_config.get("tool_workers", 4))),
+        thread_name_prefix="search-tool"
+    )
+    futures = {
+        executor.submit(run, position, call.get("tool"), call.get("params")): position
+        for position, call in enumerate(tool_calls)
+    }
+    executor.shutdown(wait=False)
+    outputs = [None] * len(tool_calls)
+    trace = [{"tool": call.get("tool"), "status": "cancelled in queue", "ms": 0.0}
+             for call in tool_calls]
+
+    def deadline(position):
+        if started_at[position] is None:
+            return budget_deadline
+        return min(budget_deadline, started_at[position] + tool_timeout)
+
+    pending = set(futures)
+    while pending:
+        timeout = max(0.0, min(deadline(futures[f]) for f in pending) - time.perf_counter())
+        if any(started_at[futures[f]] is None for f in pending):
+            timeout = min(timeout, TOOL_QUEUE_POLL_SECONDS)
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        now = time.perf_counter()
+        for future in done:
+            position = futures[future]
+            trace[position]["ms"] = (now - (started_at[position] or now)) * 1000
+            try:
+                outputs[position] = future.result()
+                trace[position]["status"] = "done"
+            except Exception as e: # pylint: disable=broad-exception-caught
+                logger.error("Search tool %s failed: %s", trace[position]["tool"], e)
+                trace[position]["status"] = "failed"
+        for future in [f for f in pending if deadline(futures[f]) <= now]:
+            position = futures[future]
+            pending.discard(future)
+            if future.cancel():
+                trace[position]["ms"] = (now - start) * 1000
+                logger.warning("Search tool %s cancelled after %.1f ms in the queue of the "
+                               "request: raise retrieval.tool_workers.",
+                               trace[position]["tool"], trace[position]["ms"])
+            else:
+                trace[position]["status"] = "timed out"
+                trace[position]["ms"] = (now - (started_at[position] or now)) * 1000
+                logger.warning("Search tool %s timed out after %.1f ms.",
+                               trace[position]["tool"], trace[position]["ms"])
+
+    retrieved_results = [
+        {"tool": entry["tool"], "output": output}
+        for entry, output in zip(trace, outputs) if entry["status"] == "done"
+    ]
+    return retrieved_results, {"tools": trace, "wall_ms": (time.perf_counter() - start) * 1000}
+
+
 def _get_query_context_relevance(query: str, context: str):
     """
     Returns the relevance of the retrieved context to the original query.
@@ -0,0 +1,160 @@
+"""
+Startup of the API worker.
+
+The models and indexes are loaded concurrently, each in its own thread, when
+the application starts, and a warm-up query then runs through the retrieval of
+every source, so that the first user request does not pay for loading the FAISS
+indexes, the chunk stores and the BM25 retrievers. The readiness tracks the
+state of every component for the /ready endpoint.
+"""
+
+import asyncio
+import time
+from threading import Lock
+from api.config.loader import CONFIG
+from api.models.embedding_model import EMBEDDING_MODEL
+from api.models.llama_cpp_provider import llm_provider
+from api.tools.utils import retrieve_documents
+from rag.embedding.bm25_indexer import indexer
+
+startup_config = CONFIG.get("startup", {})
+
+
+class Readiness:
+    """
+    Thread-safe state of the components loaded at startup and of the warm-up.
+    """
+    def __init__(self):
+        self._components = {}
+        self._warm_up = "pending"
+        self._lock = Lock()
+
+    def set_component(self, name, state, **details):
+        """
+        Record the state of a component.
+
+        Args:
+            name (str): Name of the component.
+            state (str): One of "loading", "ready" or "failed".
+            **details: Extra fields reported with the state, e.g. seconds or error.
+        """
+        with self._lock:
+            self._components[name] = {"state": state, **details}
+
+    def set_warm_up(self, state):
+        """Record the state of the warm-up: "pending", "done", "skipped" or "failed"."""
+        with self._lock:
+            self._warm_up = state
+
+    def components_ready(self):
+        """Whether every component is loaded."""
+        with self._lock:
+            return bool(self._components) and all(
+                component["state"] == "ready" for component in self._components.values()
+            )
+
+    def is_ready(self):
+        """Whether every component is loaded and the warm-up is over."""
+        with self._lock:
+            warm_up_state = self._warm_up
+        return self.components_ready() and warm_up_state != "pending"
+
+    def as_dict(self):
+        """Return the readiness, the state of every component and of the warm-up."""
+        ready = self.is_ready()
+        with self._lock:
+            return {"ready": ready, "components": dict(self._components),
+                    "warm_up": self._warm_up}
+
+    def reset(self):
+        """Forget the recorded states."""
+        with self._lock:
+            self._components = {}
+            self._warm_up = "pending"
+
+
+readiness = Readiness()
+
+
+def get_startup_components():
+    """
+    Return the components to load at startup.
+
+    Returns:
+        list[tuple[str, Callable[[], Any]]]: The name and the loader of every component.
+    """
+    components = [("embedding_model", EMBEDDING_MODEL.load)]
+    if not CONFIG["is_test_mode"]:
+        components += [("llm", llm_provider.load), ("bm25_indexes", indexer.build)]
+    return components
+
+
+async def load_components(logger, components=None):
+    """
+    Load the components concurrently, each in a worker thread, and record their state.
+    A failing component is logged and marked as failed; the others are still loaded.
+
+    Args:
+        logger (logging.Logger): Logger for the load times and failures.
+        components (list[tuple[str, Callable]], optional): Defaults to get_startup_components().
+    """
+    async def load(name, loader):
+        readiness.set_component(name, "loading")
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(loader)
+        except Exception as e: # pylint: disable=broad-exception-caught
+            logger.error("Failed to load %s at startup: %s", name, e)
+            readiness.set_component(name, "failed", error=str(e))
+            return
+        seconds = round(time.perf_counter() - start, 3)
+        logger.info("Loaded %s in %.3f s.", name, seconds)
+        readiness.set_component(name, "ready", seconds=seconds)
+
+    await asyncio.gather(*(load(name, loader)
+                           for name, loader in components or get_startup_components()))
+
+
+def warm_up(logger, query):
+    """
+    Run a query through the semantic and keyword retrieval of every source, loading
+    their indexes and filling the query embedding cache.
+
+    Args:
+        logger (logging.Logger): Logger for the retrieval.
+        query (str): The warm-up query.
+    """
+    for source_name in CONFIG["tool_names"].values():
+        retrieve_documents(query=query, keywords=query, logger=logger,
+                           source_name=source_name, embedding_model=EMBEDDING_MODEL)
+    if startup_config.get("warmup_llm", False) and llm_provider is not None:
+        llm_provider.generate(prompt=query, max_tokens=1)
+
+
+async def run_startup(logger):
+    """
+    Load the components and, if they all loaded and it is enabled, run the warm-up.
+
+    Args:
+        logger (logging.Logger): Logger for status messages.
+    """
+    readiness.reset()
+    await load_components(logger)
+    if not startup_config.get("warmup_enabled", True):
+        readiness.set_warm_up("skipped")
+        return
+    if not readiness.components_ready():
+        logger.warning("Skipping the warm-up: some components failed to load.")
+        readiness.set_warm_up("skipped")
+        return
+
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(warm_up, logger, startup_config.get(
+            "warmup_query", "How do I install a plugin in Jenkins?"))
+    except Exception as e: # pylint: disable=broad-exception-caught
+        logger.error("Warm-up query failed: %s", e)
+        readiness.set_warm_up("failed")
+        return
+    logger.info("Warm-up completed in %.3f s.", time.perf_counter() - start)
+    readiness.set_warm_up("done")
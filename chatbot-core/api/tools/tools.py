@@ -6,7 +6,6 @@ from typing import Optional
 from types import MappingProxyType
 from api.models.embedding_model import EMBEDDING_MODEL
 from api.tools.utils import (
-    filter_retrieved_data,
     is_valid_plugin,
     retrieve_documents,
     extract_top_chunks
@@ -15,37 +14,35 @@ from api.config.loader import CONFIG
 
 retrieval_config = CONFIG["retrieval"]
 
-def search_plugin_docs(query: str, keywords: str, logger, plugin_name: Optional[str] = None) -> str:
+def search_plugin_docs(query: str, keywords: str, logger, plugin_name: Optional[str] = None,
+                       retrieval_context=None) -> str:
     """
     Search tool for the plugin docs. Exploits both a sparse and dense search, resulting in a 
-    hybrid search.
+    hybrid search. When a known plugin is named, both searches only score its chunks.
 
     Args:
         query (str): The user query.
         keywords (str): Keywords extracted from the user query.
         plugin_name (Optional[str]): The refered plugin name in the query (if available).
+        retrieval_context (RetrievalContext, optional): Per-request cache of the query embeddings.
     
     Returns:
         str: The result of the research of the plugin search tool.
     """
     source_name = CONFIG["tool_names"]["plugins"]
+    filters = {"title": plugin_name} if plugin_name and is_valid_plugin(plugin_name) else None
     data_retrieved_semantic, scores_semantic, data_retrieved_keyword, scores_keyword = (
         retrieve_documents(
             query=query,
             keywords=keywords,
             logger=logger,
             source_name=source_name,
-            embedding_model=EMBEDDING_MODEL
+            embedding_model=EMBEDDING_MODEL,
+            retrieval_context=retrieval_context,
+            filters=filters
         )
     )
 
-    if plugin_name and is_valid_plugin(plugin_name):
-        data_retrieved_semantic, data_retrieved_keyword = filter_retrieved_data(
-            data_retrieved_semantic,
-            data_retrieved_keyword,
-            plugin_name
-        )
-
     return extract_top_chunks(
         data_retrieved_semantic,
         scores_semantic,
@@ -55,7 +52,7 @@ def search_plugin_docs(query: str, keywords: str, logger, plugin_name: Optional[
         logger=logger
     )
 
-def search_jenkins_docs(query: str, keywords: str, logger) -> str:
+def search_jenkins_docs(query: str, keywords: str, logger, retrieval_context=None) -> str:
     """
     Search tool for the Jenkins docs. Exploits both a sparse and dense search, resulting in a 
     hybrid search.
@@ -63,6 +60,7 @@ def search_jenkins_docs(query: str, keywords: str, logger) -> str:
     Args:
         query (str): The user query.
         keywords (str): Keywords extracted from the user query.
+        retrieval_context (RetrievalContext, optional): Per-request cache of the query embeddings.
     
     Returns:
         str: The result of the research of the docs search tool.
@@ -74,7 +72,8 @@ def search_jenkins_docs(query: str, keywords: str, logger) -> str:
             keywords=keywords,
             logger=logger,
             source_name=source_name,
-            embedding_model=EMBEDDING_MODEL
+            embedding_model=EMBEDDING_MODEL,
+            retrieval_context=retrieval_context
         )
     )
 
@@ -87,15 +86,17 @@ def search_jenkins_docs(query: str, keywords: str, logger) -> str:
         logger=logger
     )
 
-def search_stackoverflow_threads(query: str) -> str:
+# pylint: disable=unused-argument
+def search_stackoverflow_threads(query: str, logger=None, retrieval_context=None) -> str:
     """
     Stackoverflow Search tool
     """
     if query:
         pass
     return "Nothing relevant"
+# pylint: enable=unused-argument
 
-def search_community_threads(query: str, keywords: str, logger) -> str:
+def search_community_threads(query: str, keywords: str, logger, retrieval_context=None) -> str:
     """
     Search tool for the community discourse threads. Exploits both a sparse and 
     dense search, resulting in a hybrid search. In this case a higher weight is 
@@ -104,6 +105,7 @@ def search_community_threads(query: str, keywords: str, logger) -> str:
     Args:
         query (str): The user query.
         keywords (str): Keywords extracted from the user query.
+        retrieval_context (RetrievalContext, optional): Per-request cache of the query embeddings.
     
     Returns:
         str: The result of the research of the docs search tool.
@@ -115,7 +117,8 @@ def search_community_threads(query: str, keywords: str, logger) -> str:
             keywords=keywords,
             logger=logger,
             source_name=source_name,
-            embedding_model=EMBEDDING_MODEL
+            embedding_model=EMBEDDING_MODEL,
+            retrieval_context=retrieval_context
         )
     )
 
@@ -5,10 +5,12 @@ Utilities for the tools package.
 import json
 import os
 import re
-import heapq
+import time
+from concurrent.futures import ThreadPoolExecutor
 from types import MappingProxyType
 from typing import List, Tuple, Dict, Optional
 from api.config.loader import CONFIG
+from api.tools.fusion import DEFAULT_RRF_K, fuse_scores
 from rag.retriever.retrieve import get_relevant_documents
 from rag.retriever.retriever_bm25 import perform_keyword_search_from_source
 
@@ -16,6 +18,13 @@ from rag.retriever.retriever_bm25 import perform_keyword_search_from_source
 retrieval_config = CONFIG.get("retrieval", {})
 CODE_BLOCK_PLACEHOLDER_PATTERN = r"\[\[(?:CODE_BLOCK|CODE_SNIPPET)_(\d+)\]\]"
 
+# Runs the keyword leg of the hybrid retrievals while the calling thread runs the
+# semantic one. FAISS, the encoder and the BM25 scoring release the GIL.
+hybrid_executor = ThreadPoolExecutor(
+    max_workers=retrieval_config.get("hybrid_workers", 4),
+    thread_name_prefix="hybrid-retrieval"
+)
+
 TOOL_SIGNATURES = MappingProxyType({
     "search_plugin_docs": {"plugin_name": str, "query": str},
     "search_jenkins_docs": {"query": str},
@@ -38,14 +47,16 @@ def get_default_tools_call(query: str):
         {
             "tool": "search_jenkins_docs",
             "params": {
-                "query": query
+                "query": query,
+                "keywords": query
             }
         },
         {
             "tool": "search_plugin_docs",
             "params": {
                 "plugin_name": None,
-                "query": query
+                "query": query,
+                "keywords": query
             }
         },
         {
@@ -57,7 +68,8 @@ def get_default_tools_call(query: str):
         {
             "tool": "search_community_threads",
             "params": {
-                "query": query
+                "query": query,
+                "keywords": query
             }
         }
     ]
@@ -110,6 +122,9 @@ def get_inverted_scores(
     weight, and then inverted (multiplied by -1), making them suitable for the 
     later use as a max-heap.
 
+    This pure-Python version is the reference of the vectorized fuse_scores,
+    which extract_top_chunks uses.
+
     Args:
         semantic_chunk_ids (List[str]): Chunk IDs returned from semantic search.
         semantic_scores (List[float]): Corresponding semantic scores (lower is better).
@@ -217,34 +232,6 @@ def is_valid_plugin(plugin_name: str) -> bool:
 
     return False
 
-def filter_retrieved_data(
-    semantic_data: List[Dict],
-    keyword_data: List[Dict],
-    plugin_name: str
-) -> Tuple[List[Dict], List[Dict]]:
-    """
-    Filters semantic and keyword search results to only include items whose title
-    matches the given plugin name.
-
-    Args:
-        semantic_data (List[Dict]): List of retrieved chunks from semantic search.
-        keyword_data (List[Dict]): List of retrieved chunks from keyword search.
-        plugin_name (str): The plugin name to filter against.
-
-    Returns:
-        Tuple[List[Dict], List[Dict]]: Filtered semantic and keyword data.
-    """
-    def tokenize(item: str) -> str:
-        item = item.replace('-', '')
-        return item.replace(' ', '').lower()
-
-    semantic_filtered_data = [item for item in semantic_data
-                              if tokenize(item["metadata"]["title"]) == tokenize(plugin_name)]
-    keyword_filtered_data = [item for item in keyword_data
-                             if tokenize(item["metadata"]["title"]) == tokenize(plugin_name)]
-
-    return semantic_filtered_data, keyword_filtered_data
-
 def make_placeholder_replacer(code_iter, item_id, logger):
     """
     Returns a function to replace code block placeholders in retrieved text
@@ -265,9 +252,17 @@ def make_placeholder_replacer(code_iter, item_id, logger):
             return "[MISSING_CODE]"
     return replace
 
-def retrieve_documents(query: str, keywords: str, logger, source_name: str, embedding_model):
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def retrieve_documents(query: str, keywords: str, logger, source_name: str, embedding_model,
+                       retrieval_context=None, filters: Optional[Dict[str, str]] = None):
     """
-    Retrieve documents using both semantic and keyword-based methods.
+    Retrieve documents using both semantic and keyword-based methods. When
+    `retrieval.concurrent_hybrid` is enabled, the keyword search runs on the hybrid
+    retrieval pool while the semantic search runs in the calling thread, so the
+    retrieval takes as long as the slower of the two instead of their sum. The
+    latency of each search and the wall time are logged. With filters, both searches
+    only score the chunks whose metadata match them.
 
     Args:
         query (str): The user query.
@@ -275,31 +270,58 @@ def retrieve_documents(query: str, keywords: str, logger, source_name: str, embe
         logger: Logger object.
         source_name (str): Source name to search from.
         embedding_model : The sentence transformer model used for embeddings converting.
+        retrieval_context (RetrievalContext, optional): Per-request cache of the query
+            embeddings, shared by all the search tools.
+        filters (Optional[Dict[str, str]]): Metadata field -> value pairs the retrieved
+            chunks must match, e.g. {"title": "git"}.
 
     Returns:
         Tuple: (data_retrieved_semantic, scores_semantic, data_retrieved_keyword, scores_keyword)
     """
-    data_retrieved_semantic, scores_semantic = get_relevant_documents(
-        query,
-        embedding_model,
-        logger=logger,
-        source_name=source_name,
-        top_k=retrieval_config["top_k_semantic"]
-    )
-
-    keyword_results = perform_keyword_search_from_source(
-        keywords,
-        logger,
-        source_name=source_name,
-        keyword_threshold=retrieval_config["keyword_threshold"],
-        top_k=retrieval_config["top_k_keyword"]
-    )
+    def semantic_search():
+        return get_relevant_documents(
+            query,
+            embedding_model,
+            logger=logger,
+            source_name=source_name,
+            top_k=retrieval_config["top_k_semantic"],
+            retrieval_context=retrieval_context,
+            filters=filters
+        )
+
+    def keyword_search():
+        return perform_keyword_search_from_source(
+            keywords,
+            logger,
+            source_name=source_name,
+            keyword_threshold=retrieval_config["keyword_threshold"],
+            top_k=retrieval_config["top_k_keyword"],
+            filters=filters
+        )
+
+    start = time.perf_counter()
+    if retrieval_config.get("concurrent_hybrid", False):
+        keyword_future = hybrid_executor.submit(_timed, keyword_search)
+        (data_retrieved_semantic, scores_semantic), semantic_seconds = _timed(semantic_search)
+        keyword_results, keyword_seconds = keyword_future.result()
+    else:
+        (data_retrieved_semantic, scores_semantic), semantic_seconds = _timed(semantic_search)
+        keyword_results, keyword_seconds = _timed(keyword_search)
+    logger.info("Hybrid retrieval of '%s': semantic %.1f ms, keyword %.1f ms, wall %.1f ms.",
+                source_name, semantic_seconds * 1000, keyword_seconds * 1000,
+                (time.perf_counter() - start) * 1000)
 
     data_retrieved_keyword = [item["chunk"] for item in keyword_results]
     scores_keyword = [item["score"] for item in keyword_results]
 
     return data_retrieved_semantic, scores_semantic, data_retrieved_keyword, scores_keyword
 
+def _timed(function):
+    """Run a function and return its result and duration in seconds."""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-positional-arguments
 def extract_top_chunks(
@@ -312,7 +334,8 @@ def extract_top_chunks(
     semantic_weight: Optional[float] = 0.5
 ) -> str:
     """
-    Combine semantic and keyword results, sort by scores, and extract top chunks.
+    Combine semantic and keyword results with fuse_scores, using the
+    `retrieval.score_fusion` method, and extract the top chunks.
 
     Args:
         data_retrieved_semantic: List of semantic chunks.
@@ -326,21 +349,17 @@ def extract_top_chunks(
     Returns:
         str: Extracted content from top chunks.
     """
-    scores = get_inverted_scores(
+    top_chunk_ids, _ = fuse_scores(
         [c["id"] for c in data_retrieved_semantic], scores_semantic,
         [c["id"] for c in data_retrieved_keyword], scores_keyword,
-        semantic_weight
+        semantic_weight,
+        method=retrieval_config.get("score_fusion", "minmax"),
+        top_k=top_k,
+        rrf_k=retrieval_config.get("rrf_k", DEFAULT_RRF_K)
     )
 
     combined_results = data_retrieved_semantic + data_retrieved_keyword
     lookup_by_id = {item["id"]: item for item in combined_results}
-
-    heapq.heapify(scores)
-    top_k_chunks = []
-    i = 0
-    while i < top_k and len(scores) > 0:
-        item = heapq.heappop(scores)
-        top_k_chunks.append(lookup_by_id.get(item[1]))
-        i += 1
+    top_k_chunks = [lookup_by_id.get(chunk_id) for chunk_id in top_chunk_ids]
 
     return extract_chunks_content(top_k_chunks, logger)
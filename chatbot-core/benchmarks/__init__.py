@@ -0,0 +1 @@
+"""Benchmarks and measurements for the chatbot-core retrieval stack."""
@@ -0,0 +1,88 @@
+"""
+Compares the two-stage binary search (Hamming first stage, exact float
+rescoring) with the IVFFlat path, for recall@k against exact search and
+single-query latency.
+
+The vectors are either a .npy file of float32 embeddings or synthetic
+clustered, normalized vectors.
+
+Usage:
+    PYTHONPATH=$(pwd) python3 benchmarks/binary_rescoring.py --vectors vectors.npy
+    PYTHONPATH=$(pwd) python3 benchmarks/binary_rescoring.py --synthetic 100000
+"""
+
+import argparse
+import time
+import faiss
+import numpy as np
+from rag.vectorstore.binary_index import binarize, build_binary_index, rescore_candidates
+from rag.vectorstore.index_evaluation import sample_queries
+from rag.vectorstore.store_embeddings import build_faiss_index, select_index_spec
+from utils import LoggerFactory
+
+
+def synthetic_vectors(n_vectors, dim, seed=0):
+    """Return clustered, L2-normalized vectors, closer to embeddings than pure noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n_vectors // 100), dim))
+    vectors = centers[rng.integers(0, len(centers), n_vectors)]
+    vectors = vectors + 0.6 * rng.standard_normal((n_vectors, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype("float32")
+
+
+def measure(search, queries, expected, top_k):
+    """Run one search per query and return the recall@k and latency percentiles."""
+    latencies, hits = [], 0
+    for query, expected_row in zip(queries, expected):
+        start = time.perf_counter()
+        labels = search(query.reshape(1, -1))
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(np.intersect1d(labels[0], expected_row))
+    return hits / (len(queries) * top_k), np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+# pylint: disable=too-many-locals
+def main():
+    """Build both paths on the same vectors and print their recall and latency."""
+    parser = argparse.ArgumentParser(description="Binary first stage vs IVFFlat.")
+    parser.add_argument("--vectors", help="A .npy file of float32 vectors.")
+    parser.add_argument("--synthetic", type=int, default=100000,
+                        help="Number of synthetic vectors when no file is given.")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[100, 200, 500])
+    args = parser.parse_args()
+
+    logger = LoggerFactory.instance().get_logger("binary-rescoring-benchmark")
+    vectors = (np.load(args.vectors).astype("float32") if args.vectors
+               else synthetic_vectors(args.synthetic, args.dim))
+    queries = sample_queries(vectors, args.queries)
+
+    exact_index = faiss.IndexFlatL2(vectors.shape[1])
+    exact_index.add(vectors)  # pylint: disable=no-value-for-parameter
+    _, expected = exact_index.search(queries, args.top_k)  # pylint: disable=no-value-for-parameter
+
+    ivf_spec = select_index_spec(len(vectors), vectors.shape[1], index_type="ivf")
+    ivf_index = build_faiss_index(vectors, ivf_spec, logger)
+    binary_index, binary_spec = build_binary_index(vectors, logger)
+    thresholds = np.asarray(binary_spec["thresholds"], dtype="float32")
+
+    faiss.omp_set_num_threads(1)
+    print(f"{len(vectors)} vectors, dim={vectors.shape[1]}, recall@{args.top_k}, "
+          f"{len(queries)} single queries")
+    paths = [(ivf_spec["factory"], lambda q: ivf_index.search(q, args.top_k)[1])]
+    for n_candidates in args.candidates:
+        def search_binary(query, n_candidates=n_candidates):
+            _, candidates = binary_index.search(binarize(query, thresholds), n_candidates)
+            return rescore_candidates(query, candidates, vectors, args.top_k)[1]
+        paths.append((f"binary {binary_spec['type']} + rescore {n_candidates}", search_binary))
+
+    for name, search in paths:
+        recall, p50, p99 = measure(search, queries, expected, args.top_k)
+        print(f"{name:>32}: recall {recall:.3f}, p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compares the in-tree BM25 engine with the retriv SparseRetriever on a processed
+chunk file: indexing time, single-query latency with and without MaxScore
+pruning, batch throughput, and the overlap of their top-k results.
+
+The queries are the first words of randomly sampled chunks.
+
+Usage:
+    PYTHONPATH=$(pwd) python3 benchmarks/bm25_engine.py
+    PYTHONPATH=$(pwd) python3 benchmarks/bm25_engine.py --source docs --queries 500
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+import numpy as np
+from retriv import SparseRetriever
+from rag.embedding.bm25_engine import BM25Engine
+from rag.embedding.bm25_indexer import RETRIEVER_SETTINGS, indexer
+
+SOURCE_FILES = {config["index_name"]: config["file_path"] for config in indexer.index_configs}
+
+
+def chunk_to_document(chunk):
+    """Map a chunk line to the document indexed by both engines."""
+    return {"id": chunk["id"], "text": chunk["chunk_text"]}
+
+
+def sample_queries(path, n_queries, n_words, seed=0):
+    """Return queries made of the first words of randomly sampled chunks."""
+    with open(path, "r", encoding="utf-8") as f:
+        texts = [json.loads(line)["chunk_text"] for line in f if line.strip()]
+    rng = random.Random(seed)
+    return [" ".join(text.split()[:n_words]) for text in rng.sample(texts, min(n_queries,
+                                                                               len(texts)))]
+
+
+def timed(function):
+    """Run a function and return its result and duration in seconds."""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def measure(search, queries):
+    """Run one search per query and return the results and latency percentiles."""
+    results, latencies = [], []
+    for query in queries:
+        result, seconds = timed(lambda query=query: search(query))
+        results.append(result)
+        latencies.append(seconds * 1000)
+    return results, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def overlap(results, expected):
+    """Mean fraction of the expected top-k ids found in the results."""
+    return np.mean([len(set(r) & set(e)) / len(e) for r, e in zip(results, expected) if e])
+
+
+# pylint: disable=too-many-locals
+def main():
+    """Index the chunks with both engines and print their timings and overlap."""
+    parser = argparse.ArgumentParser(description="In-tree BM25 engine vs retriv.")
+    parser.add_argument("--source", choices=list(SOURCE_FILES), default="plugins")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--query-words", type=int, default=4)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+
+    path = SOURCE_FILES[args.source]
+    queries = sample_queries(path, args.queries, args.query_words)
+
+    retriv_index, retriv_seconds = timed(lambda: SparseRetriever(
+        index_name="bm25-benchmark", **RETRIEVER_SETTINGS
+    ).index_file(path=path, show_progress=False, callback=chunk_to_document))
+    with tempfile.TemporaryDirectory() as index_dir:
+        native_index, native_seconds = timed(lambda: BM25Engine(
+            index_name="bm25-benchmark", index_dir=index_dir, **RETRIEVER_SETTINGS
+        ).index_file(path, callback=chunk_to_document))
+        print(f"{args.source}: {len(native_index.doc_ids)} chunks, "
+              f"{len(native_index.vocabulary)} terms, {len(queries)} queries, top-{args.top_k}")
+        print(f"{'indexing':>24}: retriv {retriv_seconds:.2f} s, native {native_seconds:.2f} s")
+
+        native_index = BM25Engine.load("bm25-benchmark", index_dir=index_dir)
+        expected, p50, p99 = measure(
+            lambda q: retriv_index.search(q, return_docs=False, cutoff=args.top_k), queries)
+        print(f"{'retriv':>24}: p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+        for prune in (False, True):
+            native_index.prune = prune
+            results, p50, p99 = measure(
+                lambda q: native_index.search(q, cutoff=args.top_k), queries)
+            name = "native + MaxScore" if prune else "native"
+            print(f"{name:>24}: p50 {p50:.3f} ms, p99 {p99:.3f} ms, "
+                  f"overlap with retriv {overlap(results, expected):.3f}")
+
+        batch = [{"id": str(i), "text": query} for i, query in enumerate(queries)]
+        _, retriv_batch = timed(lambda: retriv_index.msearch(batch, cutoff=args.top_k))
+        _, native_batch = timed(lambda: native_index.msearch(batch, cutoff=args.top_k))
+        print(f"{'batch':>24}: retriv {len(batch) / retriv_batch:.0f} queries/s, "
+              f"native {len(batch) / native_batch:.0f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
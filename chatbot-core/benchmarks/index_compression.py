@@ -0,0 +1,75 @@
+"""
+Compares the compressed index modes on the same vectors: recall@k against
+exact search, bytes per vector and p50/p99 single-query latency.
+
+The vectors are either the embeddings of a source's chunks (this runs the
+embedding model) or a .npy file of float32 vectors, e.g. saved from a previous
+run.
+
+Usage:
+    PYTHONPATH=$(pwd) python3 benchmarks/index_compression.py --source plugins
+    PYTHONPATH=$(pwd) python3 benchmarks/index_compression.py --vectors vectors.npy
+"""
+
+import argparse
+import faiss
+import numpy as np
+from rag.embedding import embed_chunks
+from rag.embedding.embed_chunks import SOURCE_CHUNK_FILES
+from rag.vectorstore.index_evaluation import evaluate_index, sample_queries
+from rag.vectorstore.store_embeddings import (
+    COMPRESSIONS,
+    INDEX_TYPES,
+    apply_compression,
+    build_faiss_index,
+    select_index_spec
+)
+from utils import LoggerFactory
+
+
+def load_vectors(args, logger):
+    """Return the float32 vectors to index, from a file or by embedding a source."""
+    if args.vectors:
+        return np.load(args.vectors).astype("float32")
+    vectors, _ = embed_chunks(logger, SOURCE_CHUNK_FILES[args.source])
+    return np.array(vectors).astype("float32")
+
+
+def main():
+    """Build every compressed mode and print its evaluation."""
+    parser = argparse.ArgumentParser(description="Recall/latency report of the index modes.")
+    parser.add_argument("--source", default="plugins", choices=list(SOURCE_CHUNK_FILES))
+    parser.add_argument("--vectors", help="A .npy file of vectors, instead of embedding.")
+    parser.add_argument("--index-type", default="auto", choices=INDEX_TYPES)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=1,
+                        help="FAISS OpenMP threads used for the searches.")
+    args = parser.parse_args()
+
+    logger = LoggerFactory.instance().get_logger("index-compression-benchmark")
+    vectors = load_vectors(args, logger)
+    queries = sample_queries(vectors, args.queries)
+    base_spec = select_index_spec(vectors.shape[0], vectors.shape[1], index_type=args.index_type)
+    build_threads = faiss.omp_get_max_threads()
+
+    print(f"{vectors.shape[0]} vectors, dim={vectors.shape[1]}, "
+          f"{len(queries)} queries, recall@{args.top_k}")
+    print(f"{'mode':>8} {'factory':>28} {'recall':>7} {'B/vec':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for compression in COMPRESSIONS:
+        try:
+            index_spec = apply_compression(base_spec, compression)
+        except ValueError as e:
+            print(f"{compression:>8} skipped: {e}")
+            continue
+        index = build_faiss_index(vectors, index_spec, logger)
+        faiss.omp_set_num_threads(args.threads)
+        result = evaluate_index(index, vectors, queries, args.top_k)
+        faiss.omp_set_num_threads(build_threads)
+        print(f"{compression:>8} {index_spec['factory']:>28} {result['recall_at_k']:>7.3f} "
+              f"{result['bytes_per_vector']:>8.1f} {result['p50_ms']:>8.3f} "
+              f"{result['p99_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
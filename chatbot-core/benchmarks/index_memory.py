@@ -0,0 +1,109 @@
+"""
+Measures the memory held by API-like worker processes that load the FAISS
+indexes, comparing the default heap load with the memory-mapped load.
+
+Every worker loads all the requested sources, runs one search to touch the
+index pages and reports its memory while all the workers are still alive, so
+that the proportional set size (PSS) accounts for the pages they share.
+
+Usage (Linux only, it reads /proc):
+    PYTHONPATH=$(pwd) python3 benchmarks/index_memory.py --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import numpy as np
+from rag.retriever.index_registry import get_index_paths
+from rag.vectorstore.vectorstore_utils import load_faiss_index
+from utils import LoggerFactory
+
+DEFAULT_SOURCES = ["plugins", "docs", "discourse"]
+
+
+def read_memory_kb():
+    """
+    Read the memory counters of the current process.
+
+    Returns:
+        dict: rss, rss_anon, rss_file and pss, in kB.
+    """
+    memory = {}
+    status_keys = {"VmRSS:": "rss", "RssAnon:": "rss_anon", "RssFile:": "rss_file"}
+    with open("/proc/self/status", "r", encoding="utf-8") as f:
+        for line in f:
+            key = line.split()[0]
+            if key in status_keys:
+                memory[status_keys[key]] = int(line.split()[1])
+    with open("/proc/self/smaps_rollup", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                memory["pss"] = int(line.split()[1])
+    return memory
+
+
+def _worker(sources, mmap, barrier, results):
+    """Load the indexes like an API worker would and report the memory usage."""
+    logger = LoggerFactory.instance().get_logger("index-memory")
+    indexes = []
+    for source in sources:
+        index_path, _ = get_index_paths(source)
+        if not os.path.exists(index_path):
+            logger.warning("Index for source '%s' not found. Skipping it.", source)
+            continue
+        index = load_faiss_index(index_path, logger, mmap=mmap)
+        index.search(np.zeros((1, index.d), dtype="float32"), 5)
+        indexes.append(index)
+
+    barrier.wait()
+    results.put(read_memory_kb())
+    barrier.wait()
+
+
+def measure(sources, workers, mmap):
+    """
+    Spawn the workers for one load mode and collect their memory counters.
+
+    Args:
+        sources (list[str]): Source names whose index is loaded by every worker.
+        workers (int): Number of worker processes.
+        mmap (bool): Whether the workers memory-map the indexes.
+
+    Returns:
+        list[dict]: The memory counters of each worker, in kB.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_worker, args=(sources, mmap, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    measurements = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return measurements
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--sources", nargs="+", default=DEFAULT_SOURCES)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    logger = LoggerFactory.instance().get_logger("index-memory")
+    for mmap in (False, True):
+        measurements = measure(args.sources, args.workers, mmap)
+        mean = {key: np.mean([m[key] for m in measurements]) / 1024 for key in measurements[0]}
+        logger.info(
+            "%s load, %d workers: RSS %.1f MiB (anon %.1f, file %.1f), PSS %.1f MiB per worker",
+            "mmap" if mmap else "heap", args.workers,
+            mean["rss"], mean["rss_anon"], mean["rss_file"], mean["pss"]
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compares the pure-Python fusion of the semantic and keyword results
+(get_inverted_scores and a heap) with the vectorized fuse_scores, for the
+min-max and RRF methods, at several numbers of candidates per retriever.
+
+Usage:
+    PYTHONPATH=$(pwd) python3 benchmarks/score_fusion.py
+    PYTHONPATH=$(pwd) python3 benchmarks/score_fusion.py --candidates 20 200 2000 --top-k 5
+"""
+
+import argparse
+import heapq
+import timeit
+import numpy as np
+from api.tools.fusion import fuse_scores
+from api.tools.utils import get_inverted_scores
+
+
+def random_results(n_candidates, seed=0):
+    """Semantic and keyword results of n_candidates chunks each, half of them shared."""
+    rng = np.random.default_rng(seed)
+    semantic_ids = [f"chunk-{i}" for i in range(n_candidates)]
+    keyword_ids = [f"chunk-{i + n_candidates // 2}" for i in range(n_candidates)]
+    return (semantic_ids, rng.uniform(0.2, 1.5, n_candidates).tolist(),
+            keyword_ids, rng.uniform(2, 12, n_candidates).tolist())
+
+
+def reference_top_k(results, top_k):
+    """The fusion of extract_top_chunks before fuse_scores."""
+    scores = get_inverted_scores(*results)
+    heapq.heapify(scores)
+    return [heapq.heappop(scores)[1] for _ in range(min(top_k, len(scores)))]
+
+
+def main():
+    """Time every fusion at every number of candidates."""
+    parser = argparse.ArgumentParser(description="Pure-Python vs vectorized score fusion.")
+    parser.add_argument("--candidates", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    fusions = {
+        "python min-max": lambda results: reference_top_k(results, args.top_k),
+        "numpy min-max": lambda results: fuse_scores(*results, top_k=args.top_k),
+        "numpy rrf": lambda results: fuse_scores(*results, method="rrf", top_k=args.top_k)
+    }
+    for n_candidates in args.candidates:
+        results = random_results(n_candidates)
+        timings = {
+            name: min(timeit.repeat(lambda fuse=fuse, results=results: fuse(results),
+                                    number=args.repeat, repeat=5)) / args.repeat * 1e6
+            for name, fuse in fusions.items()
+        }
+        print(f"{n_candidates:>5} candidates per retriever: " + ", ".join(
+            f"{name} {micros:.1f} us" for name, micros in timings.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compares the per-request search latency of the two index layouts:
+    - per-source: one IVF index per source, searched once per source;
+    - unified: a single IVF index holding all the sources, searched once with an
+      ID selector restricted to the requested sources.
+
+The indexes are built from random vectors, so the benchmark does not need the
+embedding model nor the processed chunks.
+
+Usage:
+    PYTHONPATH=$(pwd) python3 benchmarks/unified_index.py --vectors-per-source 50000
+"""
+
+import argparse
+import time
+import faiss
+import numpy as np
+from rag.retriever.retriever_utils import search_index_batch, search_unified_index_batch
+from rag.vectorstore.store_embeddings import build_faiss_ivf_index
+from utils import LoggerFactory
+
+DEFAULT_SOURCES = ["plugins", "docs", "discourse"]
+
+
+def build_layouts(source_vectors, nlist, nprobe, logger):
+    """
+    Build both layouts from the same vectors.
+
+    Args:
+        source_vectors (dict): Source name -> 2D float32 array of vectors.
+        nlist (int): Number of IVF clusters of every index.
+        nprobe (int): Number of clusters probed during a search.
+        logger (logging.Logger): Logger for status messages.
+
+    Returns:
+        tuple: (per-source indexes, unified index, unified metadata, source ranges).
+    """
+    per_source = {
+        name: (build_faiss_ivf_index(vectors, nlist, nprobe, logger), list(range(len(vectors))))
+        for name, vectors in source_vectors.items()
+    }
+
+    source_ranges, start = {}, 0
+    for name, vectors in source_vectors.items():
+        source_ranges[name] = [start, start + len(vectors)]
+        start += len(vectors)
+    unified_vectors = np.concatenate(list(source_vectors.values()))
+    unified = build_faiss_ivf_index(unified_vectors, nlist, nprobe, logger)
+
+    return per_source, unified, list(range(len(unified_vectors))), source_ranges
+
+
+def time_requests(search, queries):
+    """Run one request per query and return the latencies in milliseconds."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query.reshape(1, -1))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    """Build both layouts and print the latency percentiles of each."""
+    parser = argparse.ArgumentParser(description="Per-source vs unified index latency.")
+    parser.add_argument("--vectors-per-source", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--nprobe", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=1,
+                        help="FAISS OpenMP threads, 1 mimics a busy API worker.")
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    logger = LoggerFactory.instance().get_logger("unified-index-benchmark")
+    rng = np.random.default_rng(0)
+    source_vectors = {
+        name: rng.standard_normal((args.vectors_per_source, args.dim)).astype("float32")
+        for name in DEFAULT_SOURCES
+    }
+    queries = rng.standard_normal((args.requests, args.dim)).astype("float32")
+
+    per_source, unified, unified_metadata, source_ranges = build_layouts(
+        source_vectors, args.nlist, args.nprobe, logger
+    )
+
+    def search_per_source(query):
+        for index, metadata in per_source.values():
+            search_index_batch(query, index, metadata, logger, args.top_k)
+
+    def search_unified(query):
+        search_unified_index_batch(query, unified, unified_metadata, source_ranges,
+                                   DEFAULT_SOURCES, logger, args.top_k)
+
+    print(f"{len(DEFAULT_SOURCES)} sources x {args.vectors_per_source} vectors, "
+          f"dim={args.dim}, nlist={args.nlist}, nprobe={args.nprobe}, top_k={args.top_k}")
+    for name, search in [("per-source", search_per_source), ("unified", search_unified)]:
+        time_requests(search, queries[:10])
+        latencies = time_requests(search, queries)
+        print(f"{name:>10}: p50 {np.percentile(latencies, 50):.3f} ms, "
+              f"p99 {np.percentile(latencies, 99):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
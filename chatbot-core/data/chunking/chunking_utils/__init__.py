@@ -10,5 +10,6 @@ from .common import(
     save_chunks,
     read_json_file,
     build_chunk_dict,
+    make_chunk_id,
     get_text_splitter
 )
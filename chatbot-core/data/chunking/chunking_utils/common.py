@@ -4,6 +4,9 @@ import json
 import uuid
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+# Namespace of the chunk ids. Changing it changes the id of every chunk.
+CHUNK_ID_NAMESPACE = uuid.UUID("5b0a7d0e-3f64-4c1e-9a47-2d1f6c8e9b31")
+
 def save_chunks(output_path, all_chunks, logger):
     """Save chunk list to JSON file and log the outcome."""
     try:
@@ -24,10 +27,28 @@ def read_json_file(input_path, logger):
         logger.error("JSON decode error in %s: %s", input_path, e)
     return []
 
+def make_chunk_id(chunk_text, metadata, code_blocks):
+    """
+    Derive a deterministic chunk id from the chunk source and content.
+
+    Re-chunking unchanged documents gives the same ids, so that an index update
+    only touches the chunks that were added, changed or removed.
+
+    Args:
+        chunk_text (str): The text of the chunk.
+        metadata (dict): The chunk metadata, identifying its source.
+        code_blocks (list[str]): The code blocks referenced by the chunk.
+
+    Returns:
+        str: A UUID5 string.
+    """
+    content = json.dumps([metadata, chunk_text, code_blocks], sort_keys=True, ensure_ascii=False)
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, content))
+
 def build_chunk_dict(chunk_text, metadata, code_blocks):
-    """Create a standardized chunk dictionary."""
+    """Create a standardized chunk dictionary, with an id derived from its content."""
     return {
-        "id": str(uuid.uuid4()),
+        "id": make_chunk_id(chunk_text, metadata, code_blocks),
         "chunk_text": chunk_text,
         "metadata": metadata,
         "code_blocks": code_blocks
@@ -0,0 +1,466 @@
+"""
+In-tree BM25 engine over a scipy sparse term-document matrix.
+
+An index is a directory holding:
+    - indptr.npy / doc_rows.npy / impacts.npy: the CSR term-document matrix. Row t
+      lists the documents containing term t, in increasing order, with the BM25
+      impact of the term in each of them.
+    - term_max_impacts.npy: the highest impact of every term, used for pruning.
+    - vocabulary.json / doc_ids.json: the term of every row and the chunk id of
+      every document.
+    - meta.json: the analyzer settings and the BM25 parameters.
+
+The impact of a term in a document does not depend on the query, so it is
+computed once at indexing time and scoring a query is a sum of the rows of its
+terms. The postings are memory-mapped: a search only reads the rows of the
+query terms from disk.
+
+The analyzer reproduces the retriv preprocessing for the settings of
+RETRIEVER_SETTINGS, and the scores are the retriv BM25 scores, so both engines
+return the same results and the keyword threshold keeps its meaning.
+"""
+
+import json
+import os
+import re
+import string
+from array import array
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from scipy.sparse import csr_matrix
+import nltk
+from nltk.corpus import stopwords as nltk_stopwords
+from nltk.stem.snowball import SnowballStemmer
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BM25_INDEX_DIR = os.path.join(SCRIPT_DIR, "..", "..", "data", "embeddings", "bm25")
+BM25_ENGINE_VERSION = 1
+
+INDPTR_FILE = "indptr.npy"
+DOC_ROWS_FILE = "doc_rows.npy"
+IMPACTS_FILE = "impacts.npy"
+TERM_MAX_IMPACTS_FILE = "term_max_impacts.npy"
+VOCABULARY_FILE = "vocabulary.json"
+DOC_IDS_FILE = "doc_ids.json"
+META_FILE = "meta.json"
+
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+STEM_CACHE_SIZE = 1 << 16
+PROGRESS_EVERY = 10_000
+
+SPECIAL_CHARS = str.maketrans("‘’´“”–", "'''\"\"-")
+PUNCTUATION = str.maketrans(string.punctuation, " " * len(string.punctuation))
+ACRONYM_DOTS = re.compile(r"\.(?!(\S[^. ])|\d)")
+
+
+# pylint: disable=too-few-public-methods
+class Analyzer:
+    """
+    Turns a text into its list of terms: normalization, whitespace tokenization,
+    stopword removal and stemming, in the order retriv applies them.
+    """
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def __init__(self, tokenizer="whitespace", stemmer="english", stopwords="english",
+                 do_lowercasing=True, do_ampersand_normalization=True,
+                 do_special_chars_normalization=True, do_acronyms_normalization=True,
+                 do_punctuation_removal=True):
+        if tokenizer != "whitespace":
+            raise ValueError(f"Unsupported BM25 tokenizer: {tokenizer}.")
+        self.do_lowercasing = do_lowercasing
+        self.do_ampersand_normalization = do_ampersand_normalization
+        self.do_special_chars_normalization = do_special_chars_normalization
+        self.do_acronyms_normalization = do_acronyms_normalization
+        self.do_punctuation_removal = do_punctuation_removal
+        self.stopwords = _load_stopwords(stopwords)
+        self._stem = (lru_cache(maxsize=STEM_CACHE_SIZE)(SnowballStemmer(stemmer).stem)
+                      if stemmer else None)
+
+    def __call__(self, text):
+        """
+        Analyze a text.
+
+        Args:
+            text (str): The text of a document or a query.
+
+        Returns:
+            list[str]: Its terms, with repetitions, in order.
+        """
+        if self.do_lowercasing:
+            text = text.lower()
+        if self.do_ampersand_normalization:
+            text = text.replace("&", " and ")
+        if self.do_special_chars_normalization:
+            text = text.translate(SPECIAL_CHARS)
+        if self.do_acronyms_normalization:
+            text = ACRONYM_DOTS.sub("", text)
+        if self.do_punctuation_removal:
+            text = text.translate(PUNCTUATION)
+        tokens = [token for token in text.split() if token not in self.stopwords]
+        if self._stem is not None:
+            tokens = [self._stem(token) for token in tokens]
+        return tokens
+
+
+def _load_stopwords(stopwords):
+    """
+    Return the stopwords of a language name from NLTK, or of an explicit list.
+    The NLTK corpus is downloaded on first use, as retriv does.
+    """
+    if not stopwords:
+        return frozenset()
+    if isinstance(stopwords, str):
+        try:
+            stopwords = nltk_stopwords.words(stopwords)
+        except LookupError:
+            nltk.download("stopwords", quiet=True)
+            stopwords = nltk_stopwords.words(stopwords)
+    return frozenset(word.lower() for word in stopwords)
+
+
+def bm25_index_path(index_name, index_dir=None):
+    """Return the directory of a saved BM25 index, under BM25_INDEX_DIR by default."""
+    return os.path.join(index_dir or BM25_INDEX_DIR, index_name)
+
+
+class BM25Engine:
+    """
+    BM25 keyword retriever with the interface of the retriv SparseRetriever used
+    by the indexer and perform_keyword_search: index_file, search, msearch, save
+    and load.
+
+    With prune=True, a search uses MaxScore: once the documents seen so far can
+    no longer be overtaken by a document containing only the remaining, lower
+    scoring terms, those terms only update the current candidates instead of
+    scanning their whole postings. The results are the same as without pruning.
+    """
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, index_name="new-index", model="bm25", min_df=1, k1=DEFAULT_K1,
+                 b=DEFAULT_B, prune=True, index_dir=None, **analyzer_settings):
+        if model != "bm25":
+            raise ValueError(f"Unsupported keyword model: {model}.")
+        self.index_name = index_name
+        self.min_df = min_df
+        self.k1 = k1
+        self.b = b
+        self.prune = prune
+        self.index_dir = index_dir
+        self.analyzer_settings = analyzer_settings
+        self.analyzer = Analyzer(**analyzer_settings)
+        self.vocabulary = {}
+        self.doc_ids = []
+        self._indptr = np.zeros(1, dtype=np.int32)
+        self._doc_rows = np.zeros(0, dtype=np.int32)
+        self._impacts = np.zeros(0, dtype=np.float32)
+        self._term_max_impacts = np.zeros(0, dtype=np.float32)
+        self._matrix = csr_matrix((0, 0), dtype=np.float32)
+        self._rows_by_doc_id = None
+
+    @property
+    def path(self):
+        """Directory where the index is saved."""
+        return bm25_index_path(self.index_name, self.index_dir)
+
+    def index_file(self, path, show_progress=False, callback=None, logger=None):
+        """
+        Index a JSONL file and save the index.
+
+        Args:
+            path (str): Path of the JSONL file.
+            show_progress (bool): Whether to log the number of indexed documents.
+            callback (Callable[[dict], dict], optional): Maps a line to a document
+                with "id" and "text" keys. Defaults to the line itself.
+            logger (logging.Logger, optional): Logger for the progress.
+
+        Returns:
+            BM25Engine: The engine itself, indexed.
+        """
+        def read_documents():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        doc = json.loads(line)
+                        yield callback(doc) if callback else doc
+
+        return self.index(read_documents(), show_progress, logger)
+
+    # pylint: disable=too-many-locals
+    def index(self, docs, show_progress=False, logger=None):
+        """
+        Index documents, replacing any previous content, and save the index.
+
+        Args:
+            docs (Iterable[dict]): Documents with "id" and "text" keys.
+            show_progress (bool): Whether to log the number of indexed documents.
+            logger (logging.Logger, optional): Logger for the progress.
+
+        Returns:
+            BM25Engine: The engine itself, indexed.
+        """
+        vocabulary, doc_ids, doc_lens = {}, [], array("q")
+        doc_indptr, term_rows, term_freqs = array("q", [0]), array("q"), array("f")
+        for doc in docs:
+            counts = Counter(self.analyzer(doc["text"]))
+            for term, count in counts.items():
+                term_rows.append(vocabulary.setdefault(term, len(vocabulary)))
+                term_freqs.append(count)
+            doc_ids.append(doc["id"])
+            doc_lens.append(sum(counts.values()))
+            doc_indptr.append(len(term_rows))
+            if show_progress and logger and len(doc_ids) % PROGRESS_EVERY == 0:
+                logger.info("BM25 index '%s': %d documents analyzed.",
+                            self.index_name, len(doc_ids))
+
+        doc_term = csr_matrix(
+            (np.asarray(term_freqs, dtype=np.float32), np.asarray(term_rows, dtype=np.int64),
+             np.asarray(doc_indptr, dtype=np.int64)),
+            shape=(len(doc_ids), len(vocabulary))
+        )
+        term_doc = doc_term.T.tocsr()
+        terms = np.array(list(vocabulary), dtype=object)
+        doc_freqs = np.diff(term_doc.indptr)
+        if self.min_df > 1:
+            keep = doc_freqs >= self.min_df
+            term_doc, terms, doc_freqs = term_doc[keep], terms[keep], doc_freqs[keep]
+        term_doc.sort_indices()
+
+        impacts = self._compute_impacts(term_doc, doc_freqs,
+                                        np.asarray(doc_lens, dtype=np.int64))
+        self.vocabulary = {term: row for row, term in enumerate(terms)}
+        self.doc_ids = doc_ids
+        self._set_postings(term_doc.indptr, term_doc.indices, impacts)
+        self.save()
+        return self
+
+    def _compute_impacts(self, term_doc, doc_freqs, doc_lens):
+        """Return the BM25 score of every posting, as retriv computes it."""
+        n_docs = term_doc.shape[1]
+        idf = np.log(1.0 + (n_docs - doc_freqs + 0.5) / (doc_freqs + 0.5))
+        relative_lens = doc_lens / max(doc_lens.mean(), 1.0) if n_docs else doc_lens
+        tfs = term_doc.data
+        norms = self.k1 * (1.0 - self.b + self.b * relative_lens[term_doc.indices])
+        impacts = np.repeat(idf, doc_freqs) * tfs * (self.k1 + 1.0) / (tfs + norms)
+        return impacts.astype(np.float32)
+
+    def _set_postings(self, indptr, doc_rows, impacts):
+        """Install the postings arrays, possibly memory-mapped, and their matrix view."""
+        index_dtype = np.int32 if len(impacts) < np.iinfo(np.int32).max else np.int64
+        self._indptr = np.asarray(indptr, dtype=index_dtype)
+        self._doc_rows = np.asarray(doc_rows, dtype=index_dtype)
+        self._impacts = np.asarray(impacts, dtype=np.float32)
+        self._term_max_impacts = (np.maximum.reduceat(self._impacts, self._indptr[:-1])
+                                  if len(self._impacts) else
+                                  np.zeros(len(self._indptr) - 1, dtype=np.float32))
+        self._matrix = csr_matrix((self._impacts, self._doc_rows, self._indptr),
+                                  shape=(len(self._indptr) - 1, len(self.doc_ids)),
+                                  copy=False)
+        self._rows_by_doc_id = None
+
+    def save(self):
+        """Save the index in its directory."""
+        os.makedirs(self.path, exist_ok=True)
+        np.save(os.path.join(self.path, INDPTR_FILE), self._indptr)
+        np.save(os.path.join(self.path, DOC_ROWS_FILE), self._doc_rows)
+        np.save(os.path.join(self.path, IMPACTS_FILE), self._impacts)
+        np.save(os.path.join(self.path, TERM_MAX_IMPACTS_FILE), self._term_max_impacts)
+        with open(os.path.join(self.path, VOCABULARY_FILE), "w", encoding="utf-8") as f:
+            json.dump(sorted(self.vocabulary, key=self.vocabulary.get), f)
+        with open(os.path.join(self.path, DOC_IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.doc_ids, f)
+        with open(os.path.join(self.path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"version": BM25_ENGINE_VERSION, "min_df": self.min_df, "k1": self.k1,
+                       "b": self.b, "analyzer": self.analyzer_settings}, f)
+
+    @classmethod
+    def load(cls, index_name, index_dir=None, prune=True, mmap=True):
+        """
+        Load a saved index.
+
+        Args:
+            index_name (str): Name of the index.
+            index_dir (str, optional): Directory holding the saved indexes.
+            prune (bool): Whether searches use MaxScore pruning.
+            mmap (bool): Whether to memory-map the postings instead of reading them.
+
+        Returns:
+            BM25Engine: The loaded engine.
+        """
+        path = bm25_index_path(index_name, index_dir)
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        engine = cls(index_name=index_name, min_df=meta["min_df"], k1=meta["k1"],
+                     b=meta["b"], prune=prune, index_dir=index_dir, **meta["analyzer"])
+        with open(os.path.join(path, VOCABULARY_FILE), "r", encoding="utf-8") as f:
+            engine.vocabulary = {term: row for row, term in enumerate(json.load(f))}
+        with open(os.path.join(path, DOC_IDS_FILE), "r", encoding="utf-8") as f:
+            engine.doc_ids = json.load(f)
+
+        mmap_mode = "r" if mmap else None
+        engine._set_postings(  # pylint: disable=protected-access
+            np.load(os.path.join(path, INDPTR_FILE), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, DOC_ROWS_FILE), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, IMPACTS_FILE), mmap_mode=mmap_mode)
+        )
+        return engine
+
+    def _query_terms(self, query):
+        """Return the rows of the indexed query terms and how often each occurs."""
+        counts = Counter(term for term in self.analyzer(query) if term in self.vocabulary)
+        rows = np.fromiter((self.vocabulary[term] for term in counts), dtype=np.int64,
+                           count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        return rows, weights
+
+    def doc_mask(self, doc_ids):
+        """
+        Return the mask of the documents with the given ids, to restrict a search
+        to them. Unknown ids are ignored.
+
+        Args:
+            doc_ids (Iterable[str]): The ids of the documents to select.
+
+        Returns:
+            np.ndarray: One boolean per indexed document.
+        """
+        if self._rows_by_doc_id is None:
+            self._rows_by_doc_id = {doc_id: row for row, doc_id in enumerate(self.doc_ids)}
+        mask = np.zeros(len(self.doc_ids), dtype=bool)
+        mask[[self._rows_by_doc_id[doc_id] for doc_id in doc_ids
+              if doc_id in self._rows_by_doc_id]] = True
+        return mask
+
+    def search(self, query, return_docs=False, cutoff=100, doc_mask=None):
+        """
+        Retrieve the best scoring documents of a query.
+
+        Args:
+            query (str): The query text.
+            return_docs (bool): Whether to return a list of {"id", "score"} dicts
+                instead of a mapping. The texts are not stored in the index.
+            cutoff (int): Number of documents to return.
+            doc_mask (np.ndarray, optional): Restricts the search to the documents
+                selected by the mask, see doc_mask. The cutoff best of them are
+                returned.
+
+        Returns:
+            dict[str, float] | list[dict]: The ids of the top documents and their
+            scores, best first.
+        """
+        rows, weights = self._query_terms(query)
+        if self.prune:
+            doc_rows, scores = self._score_maxscore(rows, weights, cutoff, doc_mask)
+        else:
+            doc_rows, scores = self._score_exhaustive(rows, weights)
+            if doc_mask is not None:
+                keep = doc_mask[doc_rows]
+                doc_rows, scores = doc_rows[keep], scores[keep]
+        return self._format_results(*_top_k(doc_rows, scores, cutoff), return_docs)
+
+    def msearch(self, queries, cutoff=100):
+        """
+        Retrieve the best scoring documents of several queries with one sparse
+        product of the query-term matrix with the postings.
+
+        Args:
+            queries (list[dict]): Queries with "id" and "text" keys.
+            cutoff (int): Number of documents to return per query.
+
+        Returns:
+            dict[str, dict[str, float]]: For every query id, the ids of its top
+            documents and their scores, best first.
+        """
+        query_positions = [np.zeros(0, dtype=np.int64)]
+        query_terms = [np.zeros(0, dtype=np.int64)]
+        query_weights = [np.zeros(0, dtype=np.float32)]
+        for position, query in enumerate(queries):
+            rows, weights = self._query_terms(query["text"])
+            query_positions.append(np.full(len(rows), position, dtype=np.int64))
+            query_terms.append(rows)
+            query_weights.append(weights)
+        query_matrix = csr_matrix(
+            (np.concatenate(query_weights),
+             (np.concatenate(query_positions), np.concatenate(query_terms))),
+            shape=(len(queries), self._matrix.shape[0]), dtype=np.float32
+        )
+        scores = (query_matrix @ self._matrix).tocsr()
+
+        results = {}
+        for position, query in enumerate(queries):
+            start, end = scores.indptr[position], scores.indptr[position + 1]
+            results[query["id"]] = self._format_results(
+                *_top_k(scores.indices[start:end], scores.data[start:end], cutoff), False
+            )
+        return results
+
+    def _score_exhaustive(self, rows, weights):
+        """Score every document containing a query term."""
+        query_matrix = csr_matrix(
+            (weights, (np.zeros(len(rows), dtype=np.int64), rows)),
+            shape=(1, self._matrix.shape[0]), dtype=np.float32
+        )
+        scores = (query_matrix @ self._matrix).tocsr()
+        return scores.indices, scores.data
+
+    # pylint: disable=too-many-locals
+    def _score_maxscore(self, rows, weights, cutoff, doc_mask=None):
+        """
+        Score the query terms from the highest to the lowest upper bound. When the
+        bound of the remaining terms falls below the score of the current k-th
+        document, no new document can reach the top-k: the remaining terms are
+        then only looked up for the current candidates, and the candidates that
+        cannot reach the k-th score any more are dropped. With a mask, only the
+        postings of the selected documents become candidates.
+        """
+        bounds = self._term_max_impacts[rows] * weights
+        order = np.argsort(-bounds, kind="stable")
+        rows, weights = rows[order], weights[order]
+        remaining_bounds = np.append(np.cumsum(bounds[order][::-1])[::-1][1:], 0.0)
+
+        candidates = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.float64)
+        accepting_new = True
+        for row, weight, remaining_bound in zip(rows, weights, remaining_bounds):
+            start, end = int(self._indptr[row]), int(self._indptr[row + 1])
+            postings = self._doc_rows[start:end]
+            if accepting_new:
+                impacts = self._impacts[start:end]
+                if doc_mask is not None:
+                    selected = doc_mask[postings]
+                    postings, impacts = postings[selected], impacts[selected]
+                candidates, inverse = np.unique(np.concatenate([candidates, postings]),
+                                                return_inverse=True)
+                scores = np.bincount(inverse, minlength=len(candidates), weights=np.concatenate(
+                    [scores, impacts * weight]))
+            else:
+                positions = np.minimum(np.searchsorted(postings, candidates), len(postings) - 1)
+                found = postings[positions] == candidates
+                scores[found] += self._impacts[start + positions[found]] * weight
+
+            if 0 < cutoff <= len(scores):
+                threshold = np.partition(scores, -cutoff)[-cutoff]
+                accepting_new = accepting_new and remaining_bound >= threshold
+                if not accepting_new:
+                    keep = scores + remaining_bound >= threshold
+                    candidates, scores = candidates[keep], scores[keep]
+        return candidates, scores.astype(np.float32)
+
+    def _format_results(self, doc_rows, scores, return_docs):
+        """Map the top document rows to their ids."""
+        if return_docs:
+            return [{"id": self.doc_ids[row], "score": float(score)}
+                    for row, score in zip(doc_rows, scores)]
+        return {self.doc_ids[row]: float(score) for row, score in zip(doc_rows, scores)}
+
+
+def _top_k(doc_rows, scores, cutoff):
+    """Return the cutoff best scoring rows and their scores, best first."""
+    if len(scores) > cutoff:
+        best = np.argpartition(scores, -cutoff)[-cutoff:]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind="stable")][:max(cutoff, 0)]
+    return doc_rows[best], scores[best]
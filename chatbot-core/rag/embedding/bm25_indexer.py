@@ -1,55 +1,149 @@
 """
 Module for the Sparse Retriever Class.
+
+The indexes are built either by retriv or by the in-tree BM25 engine of
+bm25_engine.py, as set by `retrieval.bm25_engine`. Every index is saved next to
+a fingerprint of its input file, of the retriever settings and of the engine.
+At startup a saved index is loaded when its fingerprint matches, and only
+rebuilt, re-tokenizing and re-stemming the whole file, when one of them changed.
+
+retriv is only imported when the retriv engine is used: its package imports
+torch, which the API must not load with the ONNX embedding backend.
 """
 
-from retriv import SparseRetriever
+import hashlib
+import json
+import os
+import time
+from importlib.metadata import version
 from api.config.loader import CONFIG
+from rag.embedding.bm25_engine import BM25_ENGINE_VERSION, BM25Engine, bm25_index_path
 from utils import LoggerFactory
 
+RETRIEVER_SETTINGS = {
+    "model": "bm25",
+    "min_df": 1,
+    "tokenizer": "whitespace",
+    "stemmer": "english",
+    "stopwords": "english",
+    "do_lowercasing": True,
+    "do_ampersand_normalization": True,
+    "do_special_chars_normalization": True,
+    "do_acronyms_normalization": True,
+    "do_punctuation_removal": True
+}
+FINGERPRINT_FILE = "fingerprint.json"
+BM25_ENGINES = ("retriv", "native")
+
 # pylint: disable=too-few-public-methods
 class BM25Indexer:
     """
     Class that represents the indexer for the bm25 Sparse Retriever.
     """
-    def __init__(self, index_configs, logger):
+    def __init__(self, index_configs, logger, engine="retriv"):
         """
         Initialize with a list of index configurations.
         Each config should be a dict with keys: 'index_name' and 'file_path'.
+        The engine is "retriv" or "native", the in-tree BM25Engine.
         """
+        if engine not in BM25_ENGINES:
+            raise ValueError(f"Unknown BM25 engine: {engine}.")
         self.logger = logger
         self.index_configs = index_configs
+        self.engine = engine
         self.retrievers = {}
 
+    def _retriever_class(self):
+        """Returns the class of the retrievers of the engine."""
+        if self.engine == "native":
+            return BM25Engine
+        from retriv import SparseRetriever  # pylint: disable=import-outside-toplevel
+        return SparseRetriever
+
+    def _index_path(self, index_name):
+        """Returns the directory where the engine saves an index."""
+        if self.engine == "native":
+            return bm25_index_path(index_name)
+        from retriv.paths import index_path  # pylint: disable=import-outside-toplevel
+        return index_path(index_name)
+
     def build(self):
         """
-        Builds and stores retrievers by indexing the provided files.
+        Loads the saved retrievers whose fingerprint matches their input file and
+        settings, and builds the others by indexing their file.
+
+        Returns:
+            dict: The number of loaded and built indexes and the time spent on each.
         """
+        stats = {"loaded": 0, "load_seconds": 0.0, "built": 0, "build_seconds": 0.0}
         for config in self.index_configs:
-            retriever = self._index_config(config)
+            start = time.perf_counter()
+            fingerprint = compute_fingerprint(config["file_path"], self.logger, self.engine)
+            retriever = None
+            if fingerprint is None:
+                # The input file is missing: serve the saved index, however old.
+                retriever = self._load_saved(config["index_name"])
+            elif fingerprint == self._saved_fingerprint(config["index_name"]):
+                retriever = self._load_saved(config["index_name"])
+            if retriever:
+                stats["loaded"] += 1
+                stats["load_seconds"] += time.perf_counter() - start
+            elif fingerprint is not None:
+                self.logger.info("Input of the BM25 index '%s' changed, indexing %s.",
+                                 config["index_name"], config["file_path"])
+                retriever = self._index_config(config)
+                if retriever:
+                    self._save_fingerprint(config, fingerprint)
+                stats["built"] += 1
+                stats["build_seconds"] += time.perf_counter() - start
             if retriever:
                 self.retrievers[config["index_name"]] = retriever
 
+        self.logger.info(
+            "BM25 indexes: loaded %d saved indexes in %.2f s, built %d in %.2f s.",
+            stats["loaded"], stats["load_seconds"], stats["built"], stats["build_seconds"]
+        )
+        return stats
+
+    def _saved_fingerprint(self, index_name):
+        """Returns the fingerprint saved with an index, or None."""
+        try:
+            with open(os.path.join(self._index_path(index_name), FINGERPRINT_FILE), "r",
+                      encoding="utf-8") as f:
+                return json.load(f).get("fingerprint")
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _save_fingerprint(self, config, fingerprint):
+        """Saves the fingerprint of the input an index was built from."""
+        try:
+            with open(os.path.join(self._index_path(config["index_name"]), FINGERPRINT_FILE),
+                      "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": fingerprint, "file_path": config["file_path"]}, f)
+        except OSError as e:
+            self.logger.warning("Could not save the fingerprint of the index %s: %s",
+                                config["index_name"], e)
+
+    def _load_saved(self, index_name):
+        """Loads a saved retriever, or returns None if it cannot be read."""
+        try:
+            retriever = self._retriever_class().load(index_name)
+        except Exception as e: # pylint: disable=broad-exception-caught
+            self.logger.warning("Saved index '%s' could not be loaded: %s",
+                                index_name, str(e))
+            return None
+        self.logger.info("Loaded saved BM25 index '%s'.", index_name)
+        return retriever
+
     def _index_config(self, config):
         """
-        Indexes a single file and returns a SparseRetriever object.
+        Indexes a single file and returns a SparseRetriever or BM25Engine object.
         """
         index_name = config["index_name"]
         file_path = config["file_path"]
 
-        sr = SparseRetriever(
-            index_name=index_name,
-            model="bm25",
-            min_df=1,
-            tokenizer="whitespace",
-            stemmer="english",
-            stopwords="english",
-            do_lowercasing=True,
-            do_ampersand_normalization=True,
-            do_special_chars_normalization=True,
-            do_acronyms_normalization=True,
-            do_punctuation_removal=True
-        )
         try:
+            sr = self._retriever_class()(index_name=index_name, **RETRIEVER_SETTINGS)
             sr = sr.index_file(
                 path=file_path,
                 show_progress=True,
@@ -67,7 +161,7 @@ class BM25Indexer:
 
     def get(self, index_name: str):
         """
-        Loads a SparseRetriever for the given index name.
+        Loads the retriever for the given index name.
         If it's already created in this session, returns the cached one.
         Otherwise, loads it from disk.
         """
@@ -75,21 +169,48 @@ class BM25Indexer:
             return self.retrievers[index_name]
 
         try:
-            sr = SparseRetriever.load(index_name)
+            sr = self._retriever_class().load(index_name)
             self.retrievers[index_name] = sr
             return sr
         except Exception as e: # pylint: disable=broad-exception-caught
             self.logger.warning("Index '%s' not found or failed to load: %s", index_name, str(e))
             return None
 
+def compute_fingerprint(file_path, logger, engine="retriv"):
+    """
+    Computes the fingerprint of an index input: the SHA-256 of the file content, the
+    retriever settings and the engine version.
+
+    Args:
+        file_path (str): Path of the JSONL file to index.
+        logger (logging.Logger): Logger for file errors.
+        engine (str): "retriv" or "native".
+
+    Returns:
+        str | None: The hex digest, or None if the file cannot be read.
+    """
+    if engine == "native":
+        engine_version = {"native": BM25_ENGINE_VERSION}
+    else:
+        engine_version = {"retriv": version("retriv")}
+    digest = hashlib.sha256()
+    digest.update(json.dumps({"settings": RETRIEVER_SETTINGS, **engine_version},
+                             sort_keys=True).encode("utf-8"))
+    try:
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except OSError as e:
+        logger.error("Cannot read %s to fingerprint its index: %s", file_path, e)
+        return None
+    return digest.hexdigest()
+
 indexer = BM25Indexer(
         index_configs=[
             {"index_name": "plugins", "file_path": "data/processed/chunks_plugin_docs.jsonl"},
             {"index_name": "docs", "file_path": "data/processed/chunks_docs.jsonl"},
             {"index_name": "discourse", "file_path": "data/processed/chunks_discourse_docs.jsonl"}
         ],
-        logger= LoggerFactory.instance().get_logger("bm25indexer")
+        logger= LoggerFactory.instance().get_logger("bm25indexer"),
+        engine=CONFIG["retrieval"].get("bm25_engine", "retriv")
     )
-
-if not CONFIG["is_test_mode"]:
-    indexer.build()
@@ -1,11 +1,21 @@
 """
 Loads text chunks from preprocessed JSON files, embeds them using SentenceTransformers,
 and returns both embeddings and associated metadata.
+
+iter_embedded_batches streams the chunks instead, reading the JSONL version of
+the files line by line and embedding them batch by batch, so that the memory
+used does not grow with the corpus.
 """
 
 import os
 import json
-from .embedding_utils import load_embedding_model, embed_documents
+from itertools import islice
+import numpy as np
+from .embedding_utils import (
+    load_embedding_model,
+    embed_documents_bucketed,
+    embed_documents_multi_process
+)
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROCESSED_DIR = os.path.join(SCRIPT_DIR, "..", "..", "data", "processed")
@@ -16,6 +26,14 @@ CHUNK_FILES = [
     #"chunks_discourse_docs.json",
     #"chunks_stackoverflow_threads.json"
 ]
+SOURCE_CHUNK_FILES = {
+    "plugins": ["chunks_plugin_docs.json"],
+    "docs": ["chunks_docs.json"],
+    "discourse": ["chunks_discourse_docs.json"],
+    "stackoverflow": ["chunks_stackoverflow_threads.json"]
+}
+# Number of chunks read, embedded and written together by the streaming pipeline.
+STREAM_BATCH_SIZE = 1024
 
 def load_chunks_from_file(path, logger):
     """Load JSON file and return data, with proper error handling."""
@@ -28,18 +46,19 @@ def load_chunks_from_file(path, logger):
         logger.error("JSON decode error in %s: %s", path, e)
     return []
 
-def collect_all_chunks(logger):
+def collect_all_chunks(logger, chunk_files=None):
     """
     Load and aggregate chunks from all selected JSON files.
 
     Args:
         logger (logging.Logger): Logger for warnings and file-level updates.
+        chunk_files (list[str], optional): Files to load. Defaults to CHUNK_FILES.
 
     Returns:
         list[dict]: A combined list of all loaded chunks.
     """
     all_chunks = []
-    for file_name in CHUNK_FILES:
+    for file_name in chunk_files if chunk_files is not None else CHUNK_FILES:
         path = os.path.join(PROCESSED_DIR, file_name)
         chunks = load_chunks_from_file(path, logger)
         if not chunks:
@@ -48,42 +67,174 @@ def collect_all_chunks(logger):
         all_chunks.extend(chunks)
     return all_chunks
 
-def embed_chunks(logger):
+def _structure_chunk(chunk, logger):
+    """Return the chunk in the structure stored in the index, or None if it is invalid."""
+    chunk_metadata = chunk.get("metadata", {})
+    chunk_text = chunk.get("chunk_text", "")
+    if not chunk_metadata or not chunk_text:
+        logger.warning(
+            "Chunk %s has empty metadata or text.",
+            chunk.get("id")
+        )
+        return None
+
+    return {
+        "id": chunk.get("id"),
+        "chunk_text": chunk_text,
+        "metadata": chunk_metadata,
+        "code_blocks": chunk.get("code_blocks", [])
+    }
+
+def prepare_chunks(chunks, logger):
+    """
+    Keep the chunks that have text and metadata, in the structure stored in the index.
+
+    Args:
+        chunks (list[dict]): Chunks loaded from the processed files.
+        logger (logging.Logger): Logger for the skipped chunks.
+
+    Returns:
+        list[dict]: The structured metadata of the valid chunks.
+    """
+    metadata = []
+    for chunk in chunks:
+        structured = _structure_chunk(chunk, logger)
+        if structured is not None:
+            metadata.append(structured)
+    return metadata
+
+def iter_chunks_from_file(path, logger):
+    """
+    Yield the chunks of a processed file one at a time.
+
+    JSONL files are read line by line, skipping the malformed lines. Other files
+    hold a JSON array, which has to be loaded whole.
+
+    Args:
+        path (str): Path of the processed file.
+        logger (logging.Logger): Logger for file errors.
+
+    Yields:
+        dict: The chunks of the file, in order.
+    """
+    if not path.endswith(".jsonl"):
+        logger.warning("%s is not a JSONL file and is loaded whole.", path)
+        yield from load_chunks_from_file(path, logger)
+        return
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning("Skipping line %d of %s: %s", line_number, path, e)
+    except OSError as e:
+        logger.error("File error while reading %s: %s", path, e)
+
+def _streamable_path(file_name):
+    """Return the path of the JSONL version of a processed file, if it exists."""
+    path = os.path.join(PROCESSED_DIR, file_name)
+    jsonl_path = f"{os.path.splitext(path)[0]}.jsonl"
+    return jsonl_path if os.path.exists(jsonl_path) else path
+
+def iter_chunks(logger, chunk_files=None):
+    """
+    Yield the valid chunks of the selected files one at a time, in the structure
+    stored in the index. The JSONL version of a file, written by
+    utils/convert_to_jsonl.py, is read instead of the file when it exists.
+
+    Args:
+        logger (logging.Logger): Logger for warnings and file-level updates.
+        chunk_files (list[str], optional): Files to load. Defaults to CHUNK_FILES.
+
+    Yields:
+        dict: Chunks with id, chunk_text, metadata and code_blocks.
+    """
+    for file_name in chunk_files if chunk_files is not None else CHUNK_FILES:
+        for chunk in iter_chunks_from_file(_streamable_path(file_name), logger):
+            structured = _structure_chunk(chunk, logger)
+            if structured is not None:
+                yield structured
+
+def embed_texts(texts, logger, model=None, cache=None, processes=1):
+    """
+    Embed chunk texts, through the embedding cache when one is given.
+
+    Args:
+        texts (list[str]): The texts to embed.
+        logger (logging.Logger): Logger for progress updates.
+        model (SentenceTransformer, optional): Optionally pass a preloaded model.
+        cache (EmbeddingCache, optional): On-disk cache of the embeddings of previous
+            builds. Only the texts missing from it are embedded by the model.
+        processes (int, optional): Number of embedding processes. Defaults to 1, None
+            uses all the CPU cores.
+
+    Returns:
+        list[np.ndarray]: One embedding per text.
+    """
+    def encode(texts_to_embed):
+        # The model is only loaded when some texts are missing from the cache.
+        encode_model = model or load_embedding_model(MODEL_NAME, logger)
+        if processes == 1:
+            return embed_documents_bucketed(texts_to_embed, encode_model, logger)
+        return embed_documents_multi_process(texts_to_embed, encode_model, logger, processes)
+
+    if cache is not None:
+        return cache.embed(texts, encode)
+    return encode(texts)
+
+def embed_chunks(logger, chunk_files=None, model=None, cache=None):
     """
     Embed all loaded text chunks and return vectors and associated metadata.
 
     Args:
         logger (logging.Logger): Logger for progress updates.
+        chunk_files (list[str], optional): Files to load. Defaults to CHUNK_FILES.
         model (SentenceTransformer, optional): Optionally pass a preloaded model.
+        cache (EmbeddingCache, optional): On-disk cache of the embeddings of previous
+            builds. Only the chunks missing from it are embedded by the model.
 
     Returns:
         tuple: (list[np.ndarray], list[dict]) - embeddings and structured metadata.
     """
-    chunks = collect_all_chunks(logger)
+    chunks = collect_all_chunks(logger, chunk_files)
     logger.info("Collected %d chunks.", len(chunks))
-    metadata = []
-    for chunk in chunks:
-        chunk_id = chunk.get("id")
-        chunk_metadata = chunk.get("metadata", {})
-        code_blocks = chunk.get("code_blocks", [])
-        chunk_text = chunk.get("chunk_text", "")
-
-        if not chunk_metadata or not chunk_text:
-            logger.warning(
-                "Chunk %s has empty metadata or text.",
-                chunk_id
-            )
-            continue
+    metadata = prepare_chunks(chunks, logger)
+    vectors = embed_texts([el["chunk_text"] for el in metadata], logger, model, cache)
 
-        metadata.append({
-            "id": chunk_id,
-            "chunk_text": chunk_text,
-            "metadata": chunk_metadata,
-            "code_blocks": code_blocks
-        })
+    return vectors, metadata
 
-    texts = [el["chunk_text"] for el in metadata]
-    model = load_embedding_model(MODEL_NAME, logger)
-    vectors = embed_documents(texts, model, logger)
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def iter_embedded_batches(logger, chunk_files=None, model=None, cache=None,
+                          batch_size=STREAM_BATCH_SIZE):
+    """
+    Stream the valid chunks of the selected files and embed them batch by batch.
 
-    return vectors, metadata
+    Args:
+        logger (logging.Logger): Logger for progress updates.
+        chunk_files (list[str], optional): Files to load. Defaults to CHUNK_FILES.
+        model (SentenceTransformer, optional): Optionally pass a preloaded model.
+        cache (EmbeddingCache, optional): On-disk cache of the embeddings of previous
+            builds. Only the chunks missing from it are embedded by the model.
+        batch_size (int): Number of chunks per batch. Defaults to STREAM_BATCH_SIZE.
+
+    Yields:
+        tuple: (np.ndarray, list[dict]) - the float32 embeddings of a batch and its
+        structured chunks.
+    """
+    models = [model]
+
+    def encode(texts):
+        # Loaded on the first batch with texts missing from the cache, then reused.
+        if models[0] is None:
+            models[0] = load_embedding_model(MODEL_NAME, logger)
+        return embed_documents_bucketed(texts, models[0], logger)
+
+    chunks = iter_chunks(logger, chunk_files)
+    while batch := list(islice(chunks, batch_size)):
+        texts = [chunk["chunk_text"] for chunk in batch]
+        vectors = cache.embed(texts, encode) if cache is not None else encode(texts)
+        yield np.asarray(vectors, dtype="float32"), batch
@@ -0,0 +1,174 @@
+"""
+Content-addressed on-disk cache of chunk embeddings, used by the index builds.
+
+Every embedding is keyed by the SHA-256 of the model name and the chunk text, so
+a rebuild only runs the model on the chunks that are new or whose text changed
+since the last build. The cache of a model is a directory holding:
+- `vectors.f32`, the float32 vectors appended row by row, read memory-mapped;
+- `keys.bin`, the 32-byte digest of every row, in the same order;
+- `meta.json`, the model name and vector dimension.
+
+The vectors are appended before their keys, so an interrupted build leaves at
+most a few unreferenced rows, which are ignored on the next load.
+"""
+
+import hashlib
+import json
+import os
+import re
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+EMBEDDING_CACHE_DIR = os.path.join(SCRIPT_DIR, "..", "..", "data", "embeddings", "cache")
+KEY_BYTES = 32
+
+
+def embedding_key(model_name, text):
+    """
+    Return the cache key of a text embedded by a model.
+
+    Args:
+        model_name (str): Name of the embedding model.
+        text (str): The embedded text.
+
+    Returns:
+        bytes: The 32-byte SHA-256 digest of the model name and the text.
+    """
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of the embeddings computed by one model.
+
+    The stats report, since the cache was opened, the number of embeddings
+    reused from disk and the number computed by the model.
+    """
+    def __init__(self, model_name, logger, cache_dir=EMBEDDING_CACHE_DIR):
+        self.model_name = model_name
+        self.logger = logger
+        self.directory = os.path.join(cache_dir, re.sub(r"[^\w.-]", "_", model_name))
+        self.dim = None
+        self.stats = {"reused": 0, "encoded": 0}
+        self._rows = {}
+        self._vectors = None
+        self._load()
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def vectors_path(self):
+        """Path of the file holding the vectors."""
+        return os.path.join(self.directory, "vectors.f32")
+
+    @property
+    def keys_path(self):
+        """Path of the file holding the key of every vector."""
+        return os.path.join(self.directory, "keys.bin")
+
+    @property
+    def meta_path(self):
+        """Path of the file holding the model name and dimension."""
+        return os.path.join(self.directory, "meta.json")
+
+    def embed(self, texts, encode):
+        """
+        Return the embedding of every text, running `encode` only on the texts
+        that are not cached, and store the new embeddings.
+
+        Args:
+            texts (list[str]): The texts to embed.
+            encode (Callable[[list[str]], Sequence[np.ndarray]]): Embeds a list of texts.
+
+        Returns:
+            np.ndarray: 2D float32 array with one row per text.
+        """
+        keys = [embedding_key(self.model_name, text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self._rows and key not in missing:
+                missing[key] = text
+
+        if missing:
+            new_vectors = np.asarray(encode(list(missing.values())), dtype="float32")
+            self._append(list(missing), new_vectors)
+
+        n_reused = len(texts) - len(missing)
+        self.stats["reused"] += n_reused
+        self.stats["encoded"] += len(missing)
+        self.logger.info(
+            "Embedding cache: reused %d of %d embeddings (%.1f%%), encoded %d.",
+            n_reused, len(texts), 100 * n_reused / max(len(texts), 1), len(missing)
+        )
+
+        if not texts:
+            return np.empty((0, self.dim or 0), dtype="float32")
+        return np.asarray(self._vectors[[self._rows[key] for key in keys]])
+
+    def _load(self):
+        """Open the cache directory, if a previous build created it."""
+        if not os.path.exists(self.meta_path):
+            return
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            keys = np.fromfile(self.keys_path, dtype=np.uint8)
+            vector_bytes = os.path.getsize(self.vectors_path)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning("Embedding cache at %s is unreadable, starting a new one: %s",
+                                self.directory, e)
+            return
+        if meta.get("model") != self.model_name:
+            self.logger.warning("Embedding cache at %s belongs to model %s. Ignoring it.",
+                                self.directory, meta.get("model"))
+            return
+
+        self.dim = meta["dim"]
+        n_rows = min(len(keys) // KEY_BYTES, vector_bytes // (4 * self.dim))
+        keys = keys[:n_rows * KEY_BYTES].reshape(n_rows, KEY_BYTES)
+        self._rows = {key.tobytes(): row for row, key in enumerate(keys)}
+        self._map_vectors()
+        self.logger.info("Loaded embedding cache with %d vectors from %s.",
+                         len(self._rows), self.directory)
+
+    def _map_vectors(self):
+        """Memory-map the vector file, sized to the rows that have a key."""
+        if not self._rows:
+            self._vectors = np.empty((0, self.dim), dtype="float32")
+            return
+        self._vectors = np.memmap(self.vectors_path, dtype="float32", mode="r",
+                                  shape=(len(self._rows), self.dim))
+
+    def _append(self, keys, vectors):
+        """Append new vectors and their keys to the cache files."""
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            self._reset_files()
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Vectors of dimension {vectors.shape[1]} do not match the "
+                             f"cache dimension {self.dim}.")
+
+        start = len(self._rows)
+        # Drop the rows a previous interrupted build may have left after the last key.
+        with open(self.vectors_path, "r+b") as f:
+            f.truncate(start * 4 * self.dim)
+        with open(self.keys_path, "r+b") as f:
+            f.truncate(start * KEY_BYTES)
+
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype="float32").tobytes())
+        with open(self.keys_path, "ab") as f:
+            f.write(b"".join(keys))
+
+        self._rows.update((key, start + offset) for offset, key in enumerate(keys))
+        self._map_vectors()
+
+    def _reset_files(self):
+        """Create an empty cache for the current model and dimension."""
+        os.makedirs(self.directory, exist_ok=True)
+        for path in (self.vectors_path, self.keys_path):
+            with open(path, "wb"):
+                pass
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_name, "dim": self.dim}, f)
@@ -1,32 +1,184 @@
 """
 Utility functions for loading a sentence transformer model and embedding text documents.
+
+sentence_transformers, and so torch, is only imported when a SentenceTransformer
+model is loaded or required, so that the ONNX backend runs without them.
 """
 
-from sentence_transformers import SentenceTransformer
+import os
+from contextlib import contextmanager
+import numpy as np
+
+# Below this number of texts, starting the worker processes costs more than it saves.
+MULTI_PROCESS_MIN_TEXTS = 2000
+# Padded tokens per forward pass of the length-bucketed embedding, which bounds its
+# activation memory. On CPU, larger batches are slower: they no longer fit the caches.
+MAX_BATCH_TOKENS = 2048
+MAX_BATCH_SIZE = 64
+EMBEDDING_BACKENDS = ["torch", "onnx"]
 
-def load_embedding_model(model_name, logger):
+def load_embedding_model(model_name, logger, backend="torch", onnx_model_dir=None):
     """
     Load the sentence transformer model for generating text embeddings.
 
+    Args:
+        model_name (str): Name of the model.
+        logger (logging.Logger): Logger for status messages.
+        backend (str, optional): One of EMBEDDING_BACKENDS. "onnx" loads the model
+            exported to onnx_model_dir by rag/embedding/onnx_embedding.py.
+        onnx_model_dir (str, optional): Directory of the exported ONNX model.
+
     Returns:
-        SentenceTransformer: The loaded embedding model.
+        SentenceTransformer | OnnxEmbeddingModel: The loaded embedding model.
     """
+    # pylint: disable=import-outside-toplevel
+    if backend == "onnx":
+        from rag.embedding.onnx_embedding import OnnxEmbeddingModel
+        model = OnnxEmbeddingModel(onnx_model_dir, logger)
+        if model.config["model_name"] != model_name:
+            logger.warning(f"The ONNX model in {onnx_model_dir} was exported from "
+                           f"{model.config['model_name']}, not {model_name}.")
+        return model
+    if backend != "torch":
+        raise ValueError(f"Unknown embedding backend '{backend}', "
+                         f"expected one of {EMBEDDING_BACKENDS}.")
+
+    from sentence_transformers import SentenceTransformer
     logger.info(f"Loading embedding model: {model_name}")
     return SentenceTransformer(model_name)
 
+def _require_sentence_transformer(model):
+    """Raise a TypeError if the model is not a SentenceTransformer."""
+    from sentence_transformers import SentenceTransformer  # pylint: disable=import-outside-toplevel
+    if not isinstance(model, SentenceTransformer):
+        raise TypeError("Model must be a SentenceTransformer instance.")
+
 def embed_documents(texts, model, logger, batch_size=32):
     """
     Embed a list of text documents into dense vector representations using the given model.
 
     Args:
         texts (List[str]): List of documents or text chunks to embed.
-        model (SentenceTransformer): A loaded SentenceTransformer model.
+        model (SentenceTransformer | OnnxEmbeddingModel): A loaded embedding model.
         batch_size (int, optional): Number of documents to embed in parallel. Defaults to 32.
 
     Returns:
         List[np.ndarray]: A list of embedding vectors (one per input document).
     """
-    if not isinstance(model, SentenceTransformer):
-        raise TypeError("Model must be a SentenceTransformer instance.")
+    # Checked by interface, so that an ONNX model does not need torch to be imported.
+    if not all(callable(getattr(model, method, None))
+               for method in ("encode", "get_sentence_embedding_dimension")):
+        raise TypeError("Model must be a SentenceTransformer instance or an OnnxEmbeddingModel.")
     logger.info(f"Embedding {len(texts)} documents")
     return model.encode(texts, batch_size=batch_size, show_progress_bar=True)
+
+def plan_length_batches(lengths, max_batch_tokens=MAX_BATCH_TOKENS, max_batch_size=MAX_BATCH_SIZE):
+    """
+    Group texts of similar length into batches whose padded size fits a token budget.
+
+    The texts are taken from the shortest to the longest, and a batch is closed
+    when adding the next text would make its size times its longest length exceed
+    max_batch_tokens. Short texts thus share large batches with little padding.
+
+    Args:
+        lengths (Sequence[int]): Token length of every text.
+        max_batch_tokens (int): Budget of padded tokens per batch.
+        max_batch_size (int): Maximum number of texts per batch.
+
+    Returns:
+        list[np.ndarray]: The indices of the texts of every batch.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    order = np.argsort(lengths, kind="stable")
+    batches, start = [], 0
+    for end in range(1, len(order) + 1):
+        if end == len(order):
+            batches.append(order[start:end])
+        elif (end + 1 - start > max_batch_size
+              or (end + 1 - start) * lengths[order[end]] > max_batch_tokens):
+            batches.append(order[start:end])
+            start = end
+    return batches
+
+def embed_documents_bucketed(texts, model, logger, max_batch_tokens=MAX_BATCH_TOKENS,
+                             max_batch_size=MAX_BATCH_SIZE):
+    """
+    Embed documents in batches of similar token length, sized to a token budget.
+
+    Identical texts are embedded once, and the embeddings are returned in the
+    order of the texts.
+
+    Args:
+        texts (List[str]): List of documents or text chunks to embed.
+        model (SentenceTransformer): A loaded SentenceTransformer model.
+        max_batch_tokens (int, optional): Budget of padded tokens per batch.
+        max_batch_size (int, optional): Maximum number of documents per batch.
+
+    Returns:
+        np.ndarray: One float32 embedding vector per input document.
+    """
+    _require_sentence_transformer(model)
+    unique_rows = {}
+    inverse = np.array([unique_rows.setdefault(text, len(unique_rows)) for text in texts],
+                       dtype=np.int64)
+    unique_texts = list(unique_rows)
+    if not unique_texts:
+        return np.empty((0, model.get_sentence_embedding_dimension()), dtype="float32")
+
+    lengths = [len(ids) for ids in model.tokenizer(
+        unique_texts, truncation=True, max_length=model.max_seq_length
+    )["input_ids"]]
+    batches = plan_length_batches(lengths, max_batch_tokens, max_batch_size)
+    logger.info(f"Embedding {len(texts)} documents ({len(unique_texts)} unique) "
+                f"in {len(batches)} length-bucketed batches")
+
+    embeddings = None
+    for batch in batches:
+        batch_embeddings = model.encode([unique_texts[i] for i in batch],
+                                        batch_size=len(batch), show_progress_bar=False)
+        if embeddings is None:
+            embeddings = np.empty((len(unique_texts), batch_embeddings.shape[1]),
+                                  dtype="float32")
+        embeddings[batch] = batch_embeddings
+    return embeddings[inverse]
+
+@contextmanager
+def _single_threaded_workers():
+    """Make the spawned worker processes use one thread each, set before torch is imported."""
+    previous = os.environ.get("OMP_NUM_THREADS")
+    os.environ["OMP_NUM_THREADS"] = "1"
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("OMP_NUM_THREADS")
+        else:
+            os.environ["OMP_NUM_THREADS"] = previous
+
+def embed_documents_multi_process(texts, model, logger, processes=None, batch_size=32):
+    """
+    Embed documents with a pool of worker processes, one per CPU core by default.
+    Each worker runs single-threaded, which scales better than the intra-op
+    threads of a single process on CPU.
+
+    Args:
+        texts (List[str]): List of documents or text chunks to embed.
+        model (SentenceTransformer): A loaded SentenceTransformer model.
+        processes (int, optional): Number of worker processes. Defaults to the CPU count.
+        batch_size (int, optional): Number of documents per batch. Defaults to 32.
+
+    Returns:
+        np.ndarray: One embedding vector per input document.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or len(texts) < MULTI_PROCESS_MIN_TEXTS:
+        return embed_documents(texts, model, logger, batch_size=batch_size)
+    _require_sentence_transformer(model)
+
+    logger.info(f"Embedding {len(texts)} documents with {processes} processes")
+    with _single_threaded_workers():
+        pool = model.start_multi_process_pool(["cpu"] * processes)
+    try:
+        return model.encode_multi_process(texts, pool, batch_size=batch_size)
+    finally:
+        model.stop_multi_process_pool(pool)
@@ -0,0 +1,185 @@
+"""
+ONNX Runtime backend for the embedding model, used by the API to embed queries
+without loading PyTorch.
+
+export_onnx_model traces the whole SentenceTransformer pipeline (transformer,
+pooling and normalization) to ONNX and quantizes its weights to int8. The
+exported directory holds:
+- `model.onnx`, the float32 graph, and `model_int8.onnx`, the quantized one;
+- `tokenizer.json`, the fast tokenizer of the model;
+- `embedding_config.json`, the model name, dimension and maximum sequence length.
+
+OnnxEmbeddingModel serves `encode` from that directory with onnxruntime and the
+tokenizers library only. The export itself needs torch and onnx.
+
+Usage:
+    python rag/embedding/onnx_embedding.py --output-dir api/models/embedding-onnx
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+import onnxruntime
+from tokenizers import Tokenizer
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "embedding_config.json"
+ONNX_OPSET = 17
+
+
+def export_onnx_model(model, model_name, output_dir, logger, quantize=True):
+    """
+    Export a SentenceTransformer model to ONNX and quantize it to int8.
+
+    Args:
+        model (SentenceTransformer): The loaded model.
+        model_name (str): Name of the model, recorded in the config.
+        output_dir (str): Directory to write the exported files to.
+        logger (logging.Logger): Logger for status messages.
+        quantize (bool): Whether to also write the int8 quantized graph. Defaults to True.
+    """
+    # pylint: disable=import-outside-toplevel
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    # pylint: disable=too-few-public-methods
+    class _Pipeline(torch.nn.Module):
+        """Wraps the model so that the traced graph takes and returns plain tensors."""
+        def __init__(self, model, input_names):
+            super().__init__()
+            self.model = model
+            self.input_names = input_names
+
+        def forward(self, *inputs):
+            """Return the sentence embeddings of the tokenized inputs."""
+            return self.model(dict(zip(self.input_names, inputs)))["sentence_embedding"]
+
+    os.makedirs(output_dir, exist_ok=True)
+    model.eval()
+    features = model.tokenize(["An example query to trace the model."])
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids")
+                   if name in features]
+    model_path = os.path.join(output_dir, MODEL_FILE)
+    logger.info("Exporting %s to ONNX at %s", model_name, model_path)
+    with torch.no_grad():
+        torch.onnx.export(
+            _Pipeline(model, input_names),
+            tuple(features[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["sentence_embedding"],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names},
+                          "sentence_embedding": {0: "batch"}},
+            opset_version=ONNX_OPSET,
+            dynamo=False
+        )
+
+    if quantize:
+        quantize_dynamic(model_path, os.path.join(output_dir, QUANTIZED_MODEL_FILE),
+                         weight_type=QuantType.QInt8)
+        logger.info("Quantized the ONNX model to int8.")
+
+    model.tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "dim": model.get_sentence_embedding_dimension(),
+            "max_seq_length": model.max_seq_length
+        }, f)
+
+
+class OnnxEmbeddingModel:
+    """
+    Embedding model exported by export_onnx_model, run with onnxruntime.
+
+    Provides the subset of the SentenceTransformer interface used to embed
+    queries: encode and get_sentence_embedding_dimension.
+    """
+    def __init__(self, model_dir, logger, quantized=True, threads=None):
+        with open(os.path.join(model_dir, CONFIG_FILE), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.max_seq_length = self.config["max_seq_length"]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.no_padding()
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        model_file = QUANTIZED_MODEL_FILE if quantized else MODEL_FILE
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        logger.info("Loaded ONNX embedding model %s from %s",
+                    self.config["model_name"], os.path.join(model_dir, model_file))
+
+    def get_sentence_embedding_dimension(self):
+        """Return the dimension of the embeddings."""
+        return self.config["dim"]
+
+    def encode(self, sentences, batch_size=32, **_):
+        """
+        Embed texts like SentenceTransformer.encode, in batches of similar length.
+
+        Args:
+            sentences (str | list[str]): The texts to embed.
+            batch_size (int, optional): Number of texts per forward pass. Defaults to 32.
+
+        Returns:
+            np.ndarray: One float32 embedding per text, or a single embedding when
+            a single string is given.
+        """
+        if isinstance(sentences, str):
+            return self.encode([sentences], batch_size)[0]
+
+        encodings = self.tokenizer.encode_batch(list(sentences))
+        embeddings = np.empty((len(encodings), self.config["dim"]), dtype="float32")
+        order = np.argsort([len(encoding.ids) for encoding in encodings], kind="stable")
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = self.session.run(
+                ["sentence_embedding"], self._feed([encodings[i] for i in batch])
+            )[0]
+        return embeddings
+
+    def _feed(self, encodings):
+        """Build the padded int64 inputs of a batch of encodings."""
+        length = max(len(encoding.ids) for encoding in encodings)
+        columns = {"input_ids": "ids", "attention_mask": "attention_mask",
+                   "token_type_ids": "type_ids"}
+        feed = {}
+        for name in self.input_names:
+            feed[name] = np.zeros((len(encodings), length), dtype=np.int64)
+            for row, encoding in enumerate(encodings):
+                values = getattr(encoding, columns[name])
+                feed[name][row, :len(values)] = values
+        return feed
+
+
+def main():
+    """Export the embedding model of the API to ONNX."""
+    # pylint: disable=import-outside-toplevel
+    from sentence_transformers import SentenceTransformer
+    from api.config.loader import CONFIG
+    from utils import LoggerFactory
+
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX.")
+    parser.add_argument("--model", default=CONFIG["retrieval"]["embedding_model_name"],
+                        help="Model to export. Defaults to the embedding model of the API.")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--no-quantize", action="store_true",
+                        help="Only write the float32 graph.")
+    args = parser.parse_args()
+
+    logger = LoggerFactory.instance().get_logger("onnx-export")
+    export_onnx_model(SentenceTransformer(args.model), args.model, args.output_dir, logger,
+                      quantize=not args.no_quantize)
+
+
+if __name__ == "__main__":
+    main()
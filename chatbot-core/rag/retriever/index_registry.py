@@ -0,0 +1,293 @@
+"""
+Process-wide registry of loaded vector indexes.
+
+Each source (e.g. "plugins") is loaded from disk once and the same FAISS index,
+chunk store and manifest are handed out to every caller. Before serving a cached entry
+the registry checks the files on disk and reloads the source when their
+modification time or size has changed.
+"""
+
+import os
+import time
+from threading import Lock
+import numpy as np
+from api.config.loader import CONFIG
+from rag.vectorstore.chunk_store import ChunkStore
+from rag.vectorstore.vectorstore_utils import (
+    load_faiss_index,
+    load_metadata,
+    load_chunk_store,
+    load_manifest,
+    apply_search_params,
+    load_binary_index,
+    load_vectors
+)
+
+VECTOR_STORE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "embeddings")
+
+
+def get_index_paths(source_name):
+    """
+    Return the on-disk paths of the FAISS index and metadata for a source.
+    The metadata path is the chunk store directory, unless only a legacy pickled
+    metadata file is available.
+
+    Args:
+        source_name (str): The source name that we want to consider.
+
+    Returns:
+        tuple[str, str]: The index path and the metadata path.
+    """
+    index_path = os.path.join(VECTOR_STORE_DIR, f"{source_name}_index.idx")
+    chunk_store_path = os.path.join(VECTOR_STORE_DIR, f"{source_name}_chunks")
+    legacy_metadata_path = os.path.join(VECTOR_STORE_DIR, f"{source_name}_metadata.pkl")
+    if os.path.isdir(chunk_store_path) or not os.path.exists(legacy_metadata_path):
+        return index_path, chunk_store_path
+    return index_path, legacy_metadata_path
+
+
+def get_manifest_path(source_name):
+    """
+    Return the on-disk path of the manifest of a source. The manifest is
+    optional: indexes built before it was introduced do not have one.
+
+    Args:
+        source_name (str): The source name that we want to consider.
+
+    Returns:
+        str: The manifest path.
+    """
+    return os.path.join(VECTOR_STORE_DIR, f"{source_name}_manifest.json")
+
+
+def get_binary_paths(source_name):
+    """
+    Return the on-disk paths of the optional binary first-stage index of a
+    source and of the float vectors used to rescore its candidates.
+
+    Args:
+        source_name (str): The source name that we want to consider.
+
+    Returns:
+        tuple[str, str]: The binary index path and the vectors path.
+    """
+    return (
+        os.path.join(VECTOR_STORE_DIR, f"{source_name}_binary.idx"),
+        os.path.join(VECTOR_STORE_DIR, f"{source_name}_vectors.npy")
+    )
+
+
+def _file_signature(path):
+    """
+    Return a (mtime_ns, size) tuple identifying the current version of a file,
+    or None if the file does not exist. For a directory, the signatures of all
+    the files it contains are returned.
+    """
+    if os.path.isdir(path):
+        return tuple(
+            (name, _file_signature(os.path.join(path, name)))
+            for name in sorted(os.listdir(path))
+        )
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class VectorIndexRegistry:
+    """
+    Thread-safe cache of FAISS indexes and chunk stores, keyed by source name.
+
+    The returned index and chunk store are shared between all the callers, so they
+    must be treated as read-only.
+    """
+    def __init__(self):
+        self._entries = {}
+        self._stats = {}
+        self._lock = Lock()
+        self._source_locks = {}
+
+    def get(self, source_name, logger):
+        """
+        Return the index and chunk store of a source, loading them from disk if
+        they are not cached yet or if the files changed since the last load.
+
+        Args:
+            source_name (str): The source name that we want to consider.
+            logger (logging.Logger): Logger for status and error messages.
+
+        Returns:
+            Tuple[faiss.Index, ChunkStore]: The FAISS index and corresponding chunk store.
+        """
+        entry = self._get_entry(source_name, logger)
+        return entry["index"], entry["metadata"]
+
+    def get_manifest(self, source_name, logger):
+        """
+        Return the manifest of a source, loading the source if needed.
+
+        Args:
+            source_name (str): The source name that we want to consider.
+            logger (logging.Logger): Logger for status and error messages.
+
+        Returns:
+            dict: The manifest of the source, empty if it has none.
+        """
+        return self._get_entry(source_name, logger)["manifest"]
+
+    def get_binary_stage(self, source_name, logger):
+        """
+        Return the binary first stage of a source, loaded only when
+        `retrieval.binary_first_stage` is enabled.
+
+        Args:
+            source_name (str): The source name that we want to consider.
+            logger (logging.Logger): Logger for status and error messages.
+
+        Returns:
+            dict | None: The binary index ("index"), the memory-mapped float vectors
+            ("vectors") and the binarization thresholds ("thresholds"), or None if
+            the source has no binary stage.
+        """
+        return self._get_entry(source_name, logger)["binary_stage"]
+
+    def get_stats(self):
+        """
+        Return the load statistics of every source seen so far.
+
+        Returns:
+            dict: source name -> {"load_count", "hits", "last_load_seconds",
+                  "total_load_seconds"}.
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def clear(self):
+        """Drop all the cached entries and statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+            self._source_locks.clear()
+
+    def _get_entry(self, source_name, logger):
+        """Return the cached entry of a source, (re)loading it when needed."""
+        paths = (
+            *get_index_paths(source_name),
+            get_manifest_path(source_name),
+            *get_binary_paths(source_name)
+        )
+
+        with self._get_source_lock(source_name):
+            signature = tuple(_file_signature(path) for path in paths)
+            entry = self._entries.get(source_name)
+            if entry is not None and entry["signature"] == signature:
+                self._stats[source_name]["hits"] += 1
+                return entry
+
+            if entry is not None:
+                logger.info("Files of source '%s' changed on disk. Reloading.", source_name)
+
+            index, metadata, manifest, binary_stage = self._load(source_name, paths, logger)
+            entry = {
+                "signature": signature,
+                "index": index,
+                "metadata": metadata,
+                "manifest": manifest,
+                "binary_stage": binary_stage
+            }
+
+            # Only the index and chunk store must exist, the other files are optional.
+            if index is not None and metadata is not None and None not in signature[:2]:
+                self._entries[source_name] = entry
+            else:
+                self._entries.pop(source_name, None)
+
+            return entry
+
+    def _get_source_lock(self, source_name):
+        """Return the lock guarding the loading of a single source."""
+        with self._lock:
+            if source_name not in self._source_locks:
+                self._source_locks[source_name] = Lock()
+                self._stats[source_name] = {
+                    "load_count": 0,
+                    "hits": 0,
+                    "last_load_seconds": 0.0,
+                    "total_load_seconds": 0.0
+                }
+            return self._source_locks[source_name]
+
+    def _load(self, source_name, paths, logger):
+        """
+        Load the index, chunk store, manifest and binary stage from disk and record
+        the timing. Legacy pickled metadata lists are converted to an in-memory
+        chunk store.
+        """
+        index_path, metadata_path, manifest_path, *binary_paths = paths
+        start = time.perf_counter()
+
+        index = load_faiss_index(
+            index_path,
+            logger,
+            mmap=CONFIG["retrieval"].get("index_mmap", False)
+        )
+        if os.path.isdir(metadata_path):
+            metadata = load_chunk_store(metadata_path, logger)
+        else:
+            metadata = load_metadata(metadata_path, logger)
+            if metadata is not None:
+                metadata = ChunkStore.from_chunks(metadata)
+        manifest = load_manifest(manifest_path, logger)
+        if index is not None:
+            self._apply_manifest(source_name, index, manifest, logger)
+        binary_stage = None
+        if CONFIG["retrieval"].get("binary_first_stage", False) and os.path.exists(binary_paths[0]):
+            binary_stage = self._load_binary_stage(*binary_paths, manifest, logger)
+
+        elapsed = time.perf_counter() - start
+        stats = self._stats[source_name]
+        stats["load_count"] += 1
+        stats["last_load_seconds"] = elapsed
+        stats["total_load_seconds"] += elapsed
+        logger.info("Loaded source '%s' in %.3fs (load #%d).",
+                    source_name, elapsed, stats["load_count"])
+
+        return index, metadata, manifest, binary_stage
+
+    @staticmethod
+    def _load_binary_stage(binary_path, vectors_path, manifest, logger):
+        """Load the binary index and the float vectors used for rescoring."""
+        binary_index = load_binary_index(binary_path, logger)
+        vectors = load_vectors(vectors_path, logger)
+        thresholds = manifest.get("binary", {}).get("thresholds")
+        if binary_index is None or vectors is None or thresholds is None:
+            logger.warning("Incomplete binary stage in %s. Ignoring it.", binary_path)
+            return None
+        return {
+            "index": binary_index,
+            "vectors": vectors,
+            "thresholds": np.asarray(thresholds, dtype=np.float32)
+        }
+
+    @staticmethod
+    def _apply_manifest(source_name, index, manifest, logger):
+        """
+        Configure the index with the search parameters chosen when it was built.
+        For HNSW indexes, the efSearch set for the source in the config overrides
+        the one of the manifest.
+        """
+        index_spec = manifest.get("index", {})
+        if "n_vectors" in index_spec and index_spec["n_vectors"] != index.ntotal:
+            logger.warning(
+                "Manifest of source '%s' describes %d vectors but the index holds %d.",
+                source_name, index_spec["n_vectors"], index.ntotal
+            )
+        search_params = dict(index_spec.get("search_params", {}))
+        ef_search = CONFIG["retrieval"].get("hnsw_ef_search", {}).get(source_name)
+        if index_spec.get("type") == "hnsw" and ef_search is not None:
+            search_params["efSearch"] = ef_search
+        apply_search_params(index, search_params, logger)
+
+
+index_registry = VectorIndexRegistry()
@@ -0,0 +1,159 @@
+"""
+Process-wide LRU cache of query embeddings.
+
+Users keep asking the same questions, and every query otherwise costs a full
+forward pass of the embedding model. Queries are normalized (surrounding and
+repeated whitespace, case) before being looked up, so that trivial variants
+share one entry. Lowercasing does not change the embedding of an uncased model
+such as all-MiniLM-L6-v2; it can be disabled for cased models.
+
+The cache is bounded by a number of entries and by the memory held by the
+vectors, and entries expire after a TTL so that a replaced model or index is
+eventually reflected.
+"""
+
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+import numpy as np
+from api.config.loader import CONFIG
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query, lowercase=True):
+    """
+    Normalize a query for cache lookups.
+
+    Args:
+        query (str): The raw query.
+        lowercase (bool): Whether to fold the case. Defaults to True.
+
+    Returns:
+        str: The query with collapsed whitespace and, optionally, lowercased.
+    """
+    normalized = _WHITESPACE.sub(" ", query).strip()
+    return normalized.lower() if lowercase else normalized
+
+
+# pylint: disable=too-many-instance-attributes
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU cache mapping normalized queries to their embedding.
+
+    The stats count the hits, the misses, the entries evicted to respect the
+    bounds and the entries dropped because their TTL elapsed.
+    """
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, ttl_seconds=3600,
+                 lowercase=True, enabled=True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.lowercase = lowercase
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get_or_encode(self, queries, encode):
+        """
+        Return the embedding of every query, encoding only the ones not cached.
+
+        The normalized queries are encoded, in a single call to `encode`, so that
+        the cached vector does not depend on which variant was seen first.
+
+        Args:
+            queries (list[str]): The queries to embed.
+            encode (Callable[[list[str]], Sequence[np.ndarray]]): Embeds a list of texts.
+
+        Returns:
+            np.ndarray: 2D float32 array with one row per query. When the cache is
+            disabled, the output of `encode` for the raw queries is returned as is.
+        """
+        if not self.enabled:
+            return encode(queries)
+
+        keys = [normalize_query(query, self.lowercase) for query in queries]
+        with self._lock:
+            found = {key: self._lookup(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, vector in found.items() if vector is None]
+
+        if missing:
+            vectors = np.asarray(encode(missing), dtype="float32")
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    found[key] = vector
+                    self._insert(key, vector)
+
+        return np.stack([found[key] for key in keys])
+
+    def get_stats(self):
+        """
+        Return the cache counters and current size.
+
+        Returns:
+            dict: hits, misses, evictions, expirations, entries and bytes.
+        """
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+    def clear(self):
+        """Drop all the entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def _lookup(self, key):
+        """Return the cached vector of a key, or None. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+            self._remove(key)
+            self._stats["expirations"] += 1
+            entry = None
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry[0]
+
+    def _insert(self, key, vector):
+        """Store a vector, evicting the least recently used entries. Caller holds the lock."""
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (vector, time.monotonic())
+        self._bytes += self._entry_bytes(key, vector)
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        """Remove an entry and release its size. Caller holds the lock."""
+        vector, _ = self._entries.pop(key)
+        self._bytes -= self._entry_bytes(key, vector)
+
+    @staticmethod
+    def _entry_bytes(key, vector):
+        """Approximate memory held by an entry: the vector and the UTF-8 key."""
+        return vector.nbytes + len(key.encode("utf-8"))
+
+
+def _build_cache():
+    """Create the process-wide cache from the retrieval config."""
+    cache_config = CONFIG["retrieval"].get("query_cache", {})
+    return QueryEmbeddingCache(
+        max_entries=cache_config.get("max_entries", 1024),
+        max_bytes=int(cache_config.get("max_megabytes", 16) * 1024 * 1024),
+        ttl_seconds=cache_config.get("ttl_seconds", 3600),
+        lowercase=cache_config.get("lowercase", True),
+        enabled=cache_config.get("enabled", True)
+    )
+
+
+query_embedding_cache = _build_cache()
@@ -0,0 +1,89 @@
+"""
+Per-request cache of query embeddings.
+
+All the search tools invoked while answering a chat message embed the same
+query (or the same few sub-queries). A RetrievalContext is created once per
+request and shared by the tools, so that every distinct query is encoded only
+once, whatever the number of tools and reformulation iterations. Queries that
+are new to the request are looked up in the process-wide query embedding cache
+before reaching the model.
+"""
+
+from threading import Lock
+import numpy as np
+from rag.embedding.embedding_utils import embed_documents
+from rag.retriever.query_cache import query_embedding_cache
+
+
+# pylint: disable=too-many-instance-attributes
+class RetrievalContext:
+    """
+    Holds the query vectors computed during a single request.
+
+    The counters make the deduplication observable: `lookups` is the number of
+    query vectors handed out, `encoded_queries` the number of vectors actually
+    computed by the model and `encode_calls` the number of calls to the model.
+    """
+    def __init__(self, model, logger, cache=None):
+        self.model = model
+        self.logger = logger
+        self.cache = cache if cache is not None else query_embedding_cache
+        self._vectors = {}
+        self._lock = Lock()
+        self.lookups = 0
+        self.encoded_queries = 0
+        self.encode_calls = 0
+
+    def prime(self, queries):
+        """
+        Encode, with a single model call, the queries that are not cached yet.
+
+        Args:
+            queries (list[str]): The queries that are going to be searched.
+        """
+        with self._lock:
+            self._encode_missing(queries)
+
+    def get_query_vectors(self, queries):
+        """
+        Return the embedding of every query, encoding only the unseen ones.
+
+        Args:
+            queries (list[str]): The queries to embed.
+
+        Returns:
+            np.ndarray: 2D float32 array with one row per query.
+        """
+        with self._lock:
+            self._encode_missing(queries)
+            self.lookups += len(queries)
+            return np.stack([self._vectors[query] for query in queries])
+
+    def get_stats(self):
+        """
+        Return the deduplication counters of the context.
+
+        Returns:
+            dict: lookups, encoded_queries and encode_calls.
+        """
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "encoded_queries": self.encoded_queries,
+                "encode_calls": self.encode_calls
+            }
+
+    def _encode_missing(self, queries):
+        """Encode the distinct queries missing from the cache. Caller holds the lock."""
+        missing = list(dict.fromkeys(q for q in queries if q not in self._vectors))
+        if not missing:
+            return
+        vectors = self.cache.get_or_encode(missing, self._encode)
+        for query, vector in zip(missing, vectors):
+            self._vectors[query] = vector
+
+    def _encode(self, texts):
+        """Run the embedding model, counting the calls that miss the shared cache."""
+        self.encoded_queries += len(texts)
+        self.encode_calls += 1
+        return embed_documents(texts, self.model, self.logger)
@@ -3,10 +3,22 @@ Query interface for retrieving the most relevant embedded text chunks using a FA
 """
 
 from rag.embedding.embedding_utils import embed_documents
-from rag.retriever.retriever_utils import load_vector_index, search_index
+from rag.retriever.query_cache import query_embedding_cache
+from rag.retriever.retriever_utils import (
+    load_vector_index,
+    load_unified_index,
+    load_binary_stage,
+    search_index_batch,
+    search_filtered_index_batch,
+    search_unified_index_batch,
+    search_binary_index_batch
+)
 from api.config.loader import CONFIG
 
-def get_relevant_documents(query, model, logger, source_name, top_k=5):
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def get_relevant_documents(query, model, logger, source_name, top_k=5, retrieval_context=None,
+                           filters=None):
     """
     Retrieve the top-k most relevant chunks for a given natural language query.
 
@@ -16,22 +28,162 @@ def get_relevant_documents(query, model, logger, source_name, top_k=5):
         logger (logging.Logger): Logger for warnings and file-level updates.
         source_name (str): The source name that we want to consider.
         top_k (int): Number of top results to retrieve. Defaults to 5.
+        retrieval_context (RetrievalContext, optional): Per-request cache of the
+            query embeddings. If None, the query is embedded with the model.
+        filters (dict, optional): Metadata field -> value pairs the retrieved chunks
+            must match, e.g. {"title": "git"}.
 
     Returns:
         tuple[list[dict], list[float]]: Retrieved metadata and similarity scores.
     """
-    if not query.strip():
+    results = get_relevant_documents_batch([query], model, logger, [source_name], top_k,
+                                           retrieval_context, filters)
+    return results[0][source_name]
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+# pylint: disable=too-many-locals
+def get_relevant_documents_batch(queries, model, logger, source_names, top_k=5,
+                                 retrieval_context=None, filters=None):
+    """
+    Retrieve the top-k most relevant chunks for several queries across several sources.
+    All the queries are embedded with a single encode call and every source index is
+    searched once with the whole query matrix. When `retrieval.unified_index` is
+    enabled, all the sources are searched with a single pass over the unified index.
+    When `retrieval.binary_first_stage` is enabled, the sources having a binary index
+    are searched with it and their candidates rescored with the float vectors.
+    With filters, only the chunks whose metadata match them are searched, so the
+    top-k results are the best matching chunks rather than the matching part of
+    the global top-k.
+
+    Args:
+        queries (list[str]): The input query strings.
+        model (SentenceTransformer): A loaded SentenceTransformer model.
+        logger (logging.Logger): Logger for warnings and file-level updates.
+        source_names (list[str]): The source names that we want to consider.
+        top_k (int): Number of top results to retrieve per query and source. Defaults to 5.
+        retrieval_context (RetrievalContext, optional): Per-request cache of the
+            query embeddings. If None, the queries are embedded with the model.
+        filters (dict, optional): Metadata field -> value pairs the retrieved chunks
+            must match, e.g. {"title": "git"}.
+
+    Returns:
+        list[dict[str, tuple[list[dict], list[float]]]]: For each query, in order, the
+        retrieved metadata and similarity scores of every source.
+    """
+    results = [{source_name: ([], []) for source_name in source_names} for _ in queries]
+
+    valid_positions = [i for i, query in enumerate(queries) if query.strip()]
+    if len(valid_positions) < len(queries):
         logger.warning("Empty query received.")
-        return [], []
+    if not valid_positions:
+        return results
+
+    if CONFIG["retrieval"].get("unified_index", False):
+        index, metadata, source_ranges = load_unified_index(logger)
+        if source_ranges:
+            query_vectors = _embed_queries([queries[i] for i in valid_positions], model, logger,
+                                           retrieval_context)
+            if filters:
+                unified_results = _search_unified_filtered(
+                    query_vectors, index, metadata, source_ranges, source_names, logger, top_k,
+                    filters
+                )
+            else:
+                unified_results = search_unified_index_batch(
+                    query_vectors, index, metadata, source_ranges, source_names, logger, top_k
+                )
+            for position, query_results in zip(valid_positions, unified_results):
+                results[position] = {
+                    source_name: _filter_by_threshold(*source_result)
+                    for source_name, source_result in query_results.items()
+                }
+            return results
+        logger.warning("Unified index not available. Searching the per-source indexes.")
 
-    index, metadata = load_vector_index(logger, source_name)
+    sources = _load_sources(logger, source_names)
+    if not sources:
+        return results
 
-    if not index or not metadata:
-        return [], []
+    query_vectors = _embed_queries([queries[i] for i in valid_positions], model, logger,
+                                   retrieval_context)
+
+    for source_name, (index, metadata) in sources.items():
+        source_results = _search_source(query_vectors, source_name, index, metadata, logger,
+                                        top_k, filters)
+        for position, source_result in zip(valid_positions, source_results):
+            results[position][source_name] = _filter_by_threshold(*source_result)
+
+    return results
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def _search_source(query_vectors, source_name, index, metadata, logger, top_k, filters=None):
+    """
+    Search a source, through its binary first stage with float rescoring when
+    `retrieval.binary_first_stage` is enabled and the source has one. A filtered
+    search only looks at the rows of the chunks matching the filters.
+    """
+    if filters:
+        return search_filtered_index_batch(
+            query_vectors, index, metadata, logger, top_k, metadata.rows_matching(filters),
+            CONFIG["retrieval"].get("filter_exact_max_rows", 0)
+        )
+    if CONFIG["retrieval"].get("binary_first_stage", False):
+        binary_stage = load_binary_stage(logger, source_name)
+        if binary_stage is not None:
+            return search_binary_index_batch(
+                query_vectors, binary_stage, metadata, logger, top_k,
+                CONFIG["retrieval"]["binary_candidates"]
+            )
+    return search_index_batch(query_vectors, index, metadata, logger, top_k)
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def _search_unified_filtered(query_vectors, index, metadata, source_ranges, source_names,
+                             logger, top_k, filters):
+    """
+    Search the rows of the unified index matching the filters, source by source,
+    so that every source gets its own top_k matching chunks.
+    """
+    rows = metadata.rows_matching(filters)
+    results = [{name: ([], []) for name in source_names} for _ in range(len(query_vectors))]
+    for source_name in source_names:
+        if source_name not in source_ranges:
+            logger.warning("Source %s is not part of the unified index.", source_name)
+            continue
+        start, end = source_ranges[source_name]
+        source_results = search_filtered_index_batch(
+            query_vectors, index, metadata, logger, top_k,
+            rows[(rows >= start) & (rows < end)],
+            CONFIG["retrieval"].get("filter_exact_max_rows", 0)
+        )
+        for result, source_result in zip(results, source_results):
+            result[source_name] = source_result
+    return results
+
+def _embed_queries(queries, model, logger, retrieval_context):
+    """
+    Embed the queries, through the retrieval context when one is available and
+    otherwise through the process-wide query embedding cache.
+    """
+    if retrieval_context is not None:
+        return retrieval_context.get_query_vectors(queries)
+    return query_embedding_cache.get_or_encode(
+        queries, lambda texts: embed_documents(texts, model, logger)
+    )
 
-    query_vector = embed_documents([query], model, logger)[0]
-    data, scores = search_index(query_vector, index, metadata, logger, top_k)
+def _load_sources(logger, source_names):
+    """Load the index and metadata of every source, skipping the unavailable ones."""
+    sources = {}
+    for source_name in source_names:
+        index, metadata = load_vector_index(logger, source_name)
+        if index and metadata:
+            sources[source_name] = (index, metadata)
+    return sources
 
+def _filter_by_threshold(data, scores):
+    """Keep only the results whose distance is within the semantic threshold."""
     filtered = [(d, s) for d, s in zip(data, scores)
                 if s <= CONFIG["retrieval"]["semantic_threshold"]]
     filtered_data, filtered_scores = zip(*filtered) if filtered else ([], [])
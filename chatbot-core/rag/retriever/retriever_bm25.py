@@ -2,14 +2,20 @@
 Query interface for retrieving the most relevant embedded text chunks using a Sparse Retriever.
 """
 
+from itertools import islice
 from rag.retriever.retriever_utils import load_vector_index
+from rag.embedding.bm25_engine import BM25Engine
 from rag.embedding.bm25_indexer import indexer
+from api.config.loader import CONFIG
 
-
-def perform_keyword_search_from_source(query, logger, source_name, keyword_threshold, top_k=5):
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def perform_keyword_search_from_source(query, logger, source_name, keyword_threshold, top_k=5,
+                                       filters=None):
     """
     Convenience wrapper for performing a keyword-based search using a given source name.
-    This function handles retrieving the index and metadata internally.
+    This function handles retrieving the index and metadata internally. With filters,
+    only the chunks whose metadata match them are searched.
 
     Args:
         query (str): The input query string.
@@ -17,6 +23,8 @@ def perform_keyword_search_from_source(query, logger, source_name, keyword_thres
         source_name (str): The source name that we want to consider.
         keyword_threshold (float): Minimum score required to keep a result.
         top_k (int, optional): Number of top results to retrieve. Defaults to 5.
+        filters (dict, optional): Metadata field -> value pairs the retrieved chunks
+            must match, e.g. {"title": "git"}.
 
     Returns:
         list[dict]: A list of dictionaries, each containing a retrieved chunk and its score.
@@ -25,11 +33,21 @@ def perform_keyword_search_from_source(query, logger, source_name, keyword_thres
     _, metadata = load_vector_index(logger, source_name)
     if not index or not metadata:
         return []
-    return perform_keyword_search(query, logger, index, metadata, keyword_threshold, top_k)
+
+    doc_ids = None
+    if filters:
+        rows = metadata.rows_matching(filters)
+        if len(rows) == 0:
+            return []
+        if len(rows) < len(metadata):
+            doc_ids = [metadata.get_id(row) for row in rows]
+    return perform_keyword_search(query, logger, index, metadata, keyword_threshold, top_k,
+                                  doc_ids)
 
 # pylint: disable=too-many-arguments
 # pylint: disable=too-many-positional-arguments
-def perform_keyword_search(query, logger, index, metadata, keyword_threshold, top_k=5):
+def perform_keyword_search(query, logger, index, metadata, keyword_threshold, top_k=5,
+                           doc_ids=None):
     """
     Retrieve the top-k most relevant chunks for a given natural language query
     using a provided keyword-based index and metadata.
@@ -38,9 +56,10 @@ def perform_keyword_search(query, logger, index, metadata, keyword_threshold, to
         query (str): The input query string.
         logger (logging.Logger): Logger for warnings and updates.
         index (SparseRetriever): The built keyword-based index to search.
-        metadata (list[dict]): Metadata entries associated with each stored vector.
+        metadata (ChunkStore): Chunk store associated with the index.
         keyword_threshold (float): Minimum score required to keep a result.
         top_k (int, optional): Number of top results to retrieve. Defaults to 5.
+        doc_ids (list[str], optional): Restricts the search to the chunks with these ids.
 
     Returns:
         list[dict]: A list of dictionaries, each containing a retrieved chunk and its score.
@@ -48,41 +67,69 @@ def perform_keyword_search(query, logger, index, metadata, keyword_threshold, to
     if not query.strip():
         logger.warning("Empty query received.")
         return []
-    data, scores = search_bm25_index(query, index, metadata, logger, top_k)
+    data, scores = search_bm25_index(query, index, metadata, logger, top_k, doc_ids)
     return [
         {"chunk": d, "score": s}
         for d, s in zip(data, scores)
         if s >= keyword_threshold
     ]
 
-def search_bm25_index(query, index, metadata, logger, top_k):
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def search_bm25_index(query, index, metadata, logger, top_k, doc_ids=None):
     """
-    Perform the effective sparse research, using a sparse retriever.
+    Perform the effective sparse research, using a sparse retriever. The retriever
+    only returns the ids of the matches; their rows are then found with one lookup
+    in the id index of the chunk store, so that hydrating the top-k results costs
+    O(k log n) and only reads the k chunks, even from a memory-mapped store.
+
+    The in-tree engine scores only the documents of doc_ids. The retriv retriever
+    cannot restrict its scoring, so `retrieval.filter_keyword_oversampling` times
+    top_k results are retrieved and the first top_k of doc_ids are kept.
 
     Args:
         query (str): The input query string.
         index (SparseRetriever): The built index on which we're searching.
-        metadata (List[dict]): Metadata entries associated with each stored vector.
+        metadata (ChunkStore): Chunk store associated with the index.
         logger (logging.Logger): Logger for warnings and file-level updates.
         top_k (int): Number of top results to retrieve.
+        doc_ids (list[str], optional): Restricts the search to the chunks with these ids.
     
     Returns:
         tuple[list[dict], list[float]]: Retrieved data and similarity scores.
     """
     search_results, scores = [], []
-    metadata_by_id = {item["id"]: item for item in metadata}
-    relevant_chunks = index.search(
-        query=query,
-        return_docs=True,
-        cutoff=top_k,
-    )
+    if doc_ids is None:
+        relevant_chunks = index.search(
+            query=query,
+            return_docs=False,
+            cutoff=top_k,
+        )
+    elif isinstance(index, BM25Engine):
+        relevant_chunks = index.search(
+            query=query,
+            return_docs=False,
+            cutoff=top_k,
+            doc_mask=index.doc_mask(doc_ids)
+        )
+    else:
+        allowed = set(doc_ids)
+        relevant_chunks = index.search(
+            query=query,
+            return_docs=False,
+            cutoff=top_k * CONFIG["retrieval"].get("filter_keyword_oversampling", 1),
+        )
+        relevant_chunks = dict(islice(
+            ((chunk_id, score) for chunk_id, score in relevant_chunks.items()
+             if chunk_id in allowed), top_k
+        ))
 
-    for chunk in relevant_chunks:
-        scores.append(chunk["score"])
-        match = metadata_by_id.get(chunk["id"])
-        if match:
-            search_results.append(match)
+    rows = metadata.rows_of(list(relevant_chunks))
+    for (chunk_id, score), row in zip(relevant_chunks.items(), rows):
+        if row >= 0:
+            search_results.append(metadata[row])
+            scores.append(float(score))
         else:
-            logger.warning("No metadata found for chunk ID: %s", chunk["id"])
+            logger.warning("No metadata found for chunk ID: %s", chunk_id)
 
     return search_results, scores
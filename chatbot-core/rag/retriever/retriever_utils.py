@@ -3,15 +3,17 @@ Utilities for loading the FAISS vector index and performing similarity search
 to retrieve relevant document chunks based on a query vector.
 """
 
-import os
+import faiss
 import numpy as np
-from rag.vectorstore.vectorstore_utils import load_faiss_index, load_metadata
-
-VECTOR_STORE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "embeddings")
+from rag.retriever.index_registry import index_registry
+from rag.vectorstore.binary_index import binarize, rescore_candidates
+from rag.vectorstore.vectorstore_utils import UNIFIED_SOURCE_NAME
 
 def load_vector_index(logger, source_name):
     """
-    Load the FAISS index and associated metadata from disk.
+    Load the FAISS index and associated metadata of a source. The files are read
+    from disk only the first time (or when they change); afterwards the shared
+    handles cached in the index registry are returned.
 
     Args:
         logger (logging.Logger): Logger for status and error messages.
@@ -23,13 +25,108 @@ def load_vector_index(logger, source_name):
     if not source_name.strip():
         logger.warning("No source name provided. Returning empty results.")
         return [], []
-    index_path = os.path.join(VECTOR_STORE_DIR, f"{source_name}_index.idx")
-    metadata_path = os.path.join(VECTOR_STORE_DIR, f"{source_name}_metadata.pkl")
 
-    index = load_faiss_index(index_path, logger)
-    metadata = load_metadata(metadata_path, logger)
+    return index_registry.get(source_name, logger)
+
+def load_binary_stage(logger, source_name):
+    """
+    Load the binary first stage of a source, if it has one and it is enabled.
+
+    Args:
+        logger (logging.Logger): Logger for status and error messages.
+        source_name (str): The source name that we want to consider.
+
+    Returns:
+        dict | None: The binary index, float vectors and thresholds, or None.
+    """
+    return index_registry.get_binary_stage(source_name, logger)
+
+def load_unified_index(logger):
+    """
+    Load the unified index holding the vectors of all the sources, together with
+    the ID range of every source recorded in its manifest.
+
+    Args:
+        logger (logging.Logger): Logger for status and error messages.
+
+    Returns:
+        Tuple[faiss.Index, ChunkStore, dict]: The FAISS index, the chunk store and
+        the source name -> [start, end) ID ranges. The ranges are empty if the
+        unified index is not available.
+    """
+    index, metadata = index_registry.get(UNIFIED_SOURCE_NAME, logger)
+    if index is None or metadata is None:
+        return index, metadata, {}
+    manifest = index_registry.get_manifest(UNIFIED_SOURCE_NAME, logger)
+    return index, metadata, manifest.get("sources", {})
+
+def build_source_selector(source_ranges, source_names):
+    """
+    Build a FAISS ID selector accepting only the vectors of the given sources.
+    Adjacent ranges are merged, so that selecting consecutive sources costs a
+    single range check.
+
+    Args:
+        source_ranges (dict): Source name -> [start, end) ID range.
+        source_names (list[str]): The sources to select.
+
+    Returns:
+        faiss.IDSelector | None: The selector, or None if no source is known.
+    """
+    ranges = sorted(tuple(source_ranges[name]) for name in source_names if name in source_ranges)
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    if not merged:
+        return None
 
-    return index, metadata
+    selectors = [faiss.IDSelectorRange(start, end) for start, end in merged]
+    selector = selectors[0]
+    for other in selectors[1:]:
+        combined = faiss.IDSelectorOr(selector, other)
+        # SWIG does not keep the sub-selectors alive on its own.
+        combined.referenced_objects = [selector, other]
+        selector = combined
+    return selector
+
+def build_rows_selector(rows):
+    """
+    Build a FAISS ID selector accepting only the given vector IDs, e.g. the rows
+    of a metadata filter.
+
+    Args:
+        rows (np.ndarray): The IDs to select.
+
+    Returns:
+        faiss.IDSelector: The selector.
+    """
+    rows = np.ascontiguousarray(rows, dtype=np.int64)
+    return faiss.IDSelectorBatch(len(rows), faiss.swig_ptr(rows))
+
+def _search_parameters(index, id_selector):
+    """Return search parameters applying the selector with the index's own search settings."""
+    ivf = faiss.try_extract_index_ivf(index)
+    downcast = faiss.downcast_index(index)
+    if ivf is not None:
+        params = faiss.SearchParametersIVF()
+        params.nprobe = ivf.nprobe
+    elif isinstance(downcast, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = downcast.hnsw.efSearch
+    else:
+        params = faiss.SearchParameters()
+    params.sel = id_selector
+    return params
+
+def _run_search(query_vectors, index, top_k, id_selector):
+    """Run a single FAISS search, restricted to the selected IDs if a selector is given."""
+    query_vectors = np.asarray(query_vectors, dtype="float32")
+    if id_selector is None:
+        return index.search(query_vectors, top_k)
+    return index.search(query_vectors, top_k, params=_search_parameters(index, id_selector))
 
 def search_index(query_vector, index, metadata, logger, top_k):
     """
@@ -38,7 +135,7 @@ def search_index(query_vector, index, metadata, logger, top_k):
     Args:
         query_vector (np.ndarray): A single embedding vector.
         index (faiss.Index): A trained and populated FAISS index.
-        metadata (List[dict]): Metadata entries associated with each stored vector.
+        metadata (ChunkStore | List[dict]): Chunks associated with each stored vector.
         top_k (int): Number of nearest neighbors to retrieve.
 
     Returns:
@@ -48,9 +145,33 @@ def search_index(query_vector, index, metadata, logger, top_k):
         logger.error("Invalid query vector received.")
         return [], []
 
+    return search_index_batch(query_vector.reshape(1, -1), index, metadata, logger, top_k)[0]
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def search_index_batch(query_vectors, index, metadata, logger, top_k, id_selector=None):
+    """
+    Search the FAISS index with a matrix of query vectors in a single call and
+    return the top-k closest metadata results of every query.
+
+    Args:
+        query_vectors (np.ndarray): 2D array of shape (n_queries, dim).
+        index (faiss.Index): A trained and populated FAISS index.
+        metadata (ChunkStore | List[dict]): Chunks associated with each stored vector.
+        top_k (int): Number of nearest neighbors to retrieve per query.
+        id_selector (faiss.IDSelector, optional): Restricts the search to the selected
+            vector IDs, e.g. to some sources of the unified index.
+
+    Returns:
+        List[Tuple[List[dict], List[float]]]: Retrieved data and scores, one entry per query.
+    """
+    if query_vectors is None or len(query_vectors) == 0:
+        logger.error("Invalid query vector received.")
+        return []
+
     if index.ntotal == 0:
         logger.warning("FAISS index is empty. No search will be performed.")
-        return [], []
+        return [([], []) for _ in range(len(query_vectors))]
 
     if index.ntotal != len(metadata):
         logger.warning(
@@ -60,27 +181,165 @@ def search_index(query_vector, index, metadata, logger, top_k):
             len(metadata)
         )
 
-    query_vector = np.array(query_vector).astype("float32").reshape(1, -1)
-    distances, indices = index.search(query_vector, top_k)
+    distances, indices = _run_search(query_vectors, index, top_k, id_selector)
+    return _collect_results(distances, indices, metadata, logger)
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def search_filtered_index_batch(query_vectors, index, metadata, logger, top_k, rows,
+                                exact_max_rows=0):
+    """
+    Search only the given rows of the FAISS index, e.g. the chunks of one plugin.
+
+    Up to exact_max_rows rows, their vectors are read back from an L2 index and
+    ranked by exact distance: an ANN search with a very selective ID selector
+    visits its usual number of candidates and can miss most of the selected
+    rows. Larger selections, and indexes that cannot give their vectors back, are
+    searched with an ID selector.
+
+    Args:
+        query_vectors (np.ndarray): 2D array of shape (n_queries, dim).
+        index (faiss.Index): A trained and populated FAISS index.
+        metadata (ChunkStore | List[dict]): Chunks associated with each stored vector.
+        logger (logging.Logger): Logger for status and error messages.
+        top_k (int): Number of nearest neighbors to retrieve per query.
+        rows (np.ndarray): The sorted vector IDs to search.
+        exact_max_rows (int): Largest selection ranked by exact distance.
+
+    Returns:
+        List[Tuple[List[dict], List[float]]]: Retrieved data and scores, one entry per query.
+    """
+    if query_vectors is None or len(query_vectors) == 0:
+        logger.error("Invalid query vector received.")
+        return []
+    if len(rows) == 0:
+        return [([], []) for _ in range(len(query_vectors))]
+
+    if len(rows) <= exact_max_rows and index.metric_type == faiss.METRIC_L2:
+        try:
+            vectors = index.reconstruct_batch(np.asarray(rows, dtype=np.int64))
+        except RuntimeError:
+            vectors = None
+        if vectors is not None:
+            query_vectors = np.asarray(query_vectors, dtype="float32")
+            candidates = np.broadcast_to(np.arange(len(rows)), (len(query_vectors), len(rows)))
+            distances, positions = rescore_candidates(query_vectors, candidates, vectors, top_k)
+            indices = np.where(positions >= 0, np.asarray(rows)[positions], -1)
+            return _collect_results(distances, indices, metadata, logger)
+
+    return search_index_batch(query_vectors, index, metadata, logger, top_k,
+                              id_selector=build_rows_selector(rows))
+
+def _collect_results(distances, indices, metadata, logger):
+    """Turn FAISS distances and row ids into (data, scores) pairs, one per query."""
     results = []
+    for row_distances, row_indices in zip(distances, indices):
+        data, scores = [], []
+        for distance, idx in zip(row_distances, row_indices):
+            if idx < 0:
+                continue
+            if idx < len(metadata):
+                data.append(metadata[idx])
+                scores.append(float(distance))
+            else:
+                logger.error("FAISS returned index %d out of range (metadata size: %d)",
+                    idx,
+                    len(metadata)
+                )
+        results.append((data, scores))
 
-    for i in range(len(indices[0])):
-        idx = indices[0][i]
-        if idx < len(metadata):
-            results.append({
-                "metadata": metadata[idx],
-                "score": float(distances[0][i])
-            })
-        else:
-            logger.error("FAISS returned index %d out of range (metadata size: %d)",
-                idx,
-                len(metadata)
-            )
-
-    data = []
-    scores = []
-    for result in results:
-        data.append(result["metadata"])
-        scores.append(result["score"])
-
-    return data, scores
+    return results
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+# pylint: disable=too-many-locals
+def search_unified_index_batch(query_vectors, index, metadata, source_ranges, source_names,
+                               logger, top_k):
+    """
+    Search several sources of the unified index with a single ANN pass.
+
+    The search is restricted to the requested sources with an ID selector and
+    asks for top_k results per source; the hits are then split by source using
+    the ID ranges. When a source is crowded out of the shared candidate list it
+    can get fewer than top_k results, in which case its hits are the ones a
+    per-source search would have ranked first.
+
+    Args:
+        query_vectors (np.ndarray): 2D array of shape (n_queries, dim).
+        index (faiss.Index): The unified FAISS index.
+        metadata (ChunkStore | List[dict]): Chunks associated with each stored vector.
+        source_ranges (dict): Source name -> [start, end) ID range.
+        source_names (list[str]): The sources to search.
+        logger (logging.Logger): Logger for status and error messages.
+        top_k (int): Number of nearest neighbors to retrieve per query and source.
+
+    Returns:
+        List[dict[str, Tuple[List[dict], List[float]]]]: For each query, the retrieved
+        data and scores of every requested source.
+    """
+    known_sources = [name for name in source_names if name in source_ranges]
+    missing_sources = [name for name in source_names if name not in source_ranges]
+    if missing_sources:
+        logger.warning("Sources %s are not part of the unified index.", missing_sources)
+
+    results = [{name: ([], []) for name in source_names} for _ in range(len(query_vectors))]
+    if not known_sources or index.ntotal == 0:
+        return results
+
+    selector = build_source_selector(source_ranges, known_sources)
+    distances, indices = _run_search(query_vectors, index, top_k * len(known_sources), selector)
+
+    starts = np.array([source_ranges[name][0] for name in known_sources])
+    ends = np.array([source_ranges[name][1] for name in known_sources])
+    for result, row_distances, row_indices in zip(results, distances, indices):
+        for distance, idx in zip(row_distances, row_indices):
+            if idx < 0:
+                continue
+            if idx >= len(metadata):
+                logger.error("FAISS returned index %d out of range (metadata size: %d)",
+                    idx,
+                    len(metadata)
+                )
+                continue
+            position = np.flatnonzero((starts <= idx) & (idx < ends))
+            if len(position) == 0:
+                continue
+            data, scores = result[known_sources[position[0]]]
+            if len(data) < top_k:
+                data.append(metadata[idx])
+                scores.append(float(distance))
+
+    return results
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def search_binary_index_batch(query_vectors, binary_stage, metadata, logger, top_k,
+                              n_candidates):
+    """
+    Two-stage search: the binarized queries retrieve n_candidates rows from the
+    binary index by Hamming distance, which are then rescored with the exact L2
+    distance on the float vectors. The scores are on the same scale as the ones
+    of search_index_batch.
+
+    Args:
+        query_vectors (np.ndarray): 2D array of shape (n_queries, dim).
+        binary_stage (dict): Binary index, float vectors and thresholds of the source.
+        metadata (ChunkStore | List[dict]): Chunks associated with each stored vector.
+        logger (logging.Logger): Logger for status and error messages.
+        top_k (int): Number of nearest neighbors to retrieve per query.
+        n_candidates (int): Number of first-stage candidates rescored per query.
+
+    Returns:
+        List[Tuple[List[dict], List[float]]]: Retrieved data and scores, one entry per query.
+    """
+    if query_vectors is None or len(query_vectors) == 0:
+        logger.error("Invalid query vector received.")
+        return []
+
+    query_vectors = np.asarray(query_vectors, dtype="float32")
+    binary_index = binary_stage["index"]
+    codes = binarize(query_vectors, binary_stage["thresholds"])
+    _, candidates = binary_index.search(codes, max(n_candidates, top_k))
+    distances, indices = rescore_candidates(query_vectors, candidates,
+                                            binary_stage["vectors"], top_k)
+    return _collect_results(distances, indices, metadata, logger)
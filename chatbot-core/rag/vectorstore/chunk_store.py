@@ -0,0 +1,338 @@
+"""
+Columnar, memory-mapped storage for the embedded chunks.
+
+A chunk store is a directory holding:
+    - text.bin / text_offsets.npy: the UTF-8 chunk texts, concatenated, and the
+      (n + 1) byte offsets delimiting them.
+    - meta.bin / meta_offsets.npy: the JSON-encoded {"metadata", "code_blocks"}
+      of every chunk, concatenated, and their offsets.
+    - ids.npy: the chunk ids, as a fixed-width bytes column.
+    - ids_order.npy: the rows sorted by chunk id, the persistent id -> row
+      index used to look chunks up by id.
+
+Row i of the store matches vector i of the FAISS index. The files are
+memory-mapped, so opening a store is cheap and a chunk dict is only built when a
+row is actually requested (e.g. for the top-k results of a search). Looking up k
+ids is a binary search of the mapped index, without reading all the ids.
+Filtering the rows by a metadata value goes through a MetadataIndex, built in
+memory the first time a field is filtered on.
+"""
+
+import json
+import os
+from array import array
+import numpy as np
+from rag.vectorstore.metadata_index import MetadataIndex
+
+TEXT_FILE = "text.bin"
+TEXT_OFFSETS_FILE = "text_offsets.npy"
+META_FILE = "meta.bin"
+META_OFFSETS_FILE = "meta_offsets.npy"
+IDS_FILE = "ids.npy"
+IDS_ORDER_FILE = "ids_order.npy"
+
+
+def _encode_column(values):
+    """Concatenate a list of bytes values, returning the blob and its offsets."""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    if values:
+        offsets[1:] = np.cumsum([len(v) for v in values])
+    return b"".join(values), offsets
+
+
+def _map_blob(path):
+    """Memory-map a binary blob; empty files cannot be mapped and give an empty array."""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+class ChunkStore:
+    """
+    Read-only, list-like view over the stored chunks.
+
+    Supports len(), indexing by row and iteration like the metadata list it
+    replaces, plus direct access to a single column and lookup by chunk id.
+    """
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def __init__(self, ids, text_blob, text_offsets, meta_blob, meta_offsets, ids_order=None):
+        self._ids = ids
+        self._text_blob = text_blob
+        self._text_offsets = text_offsets
+        self._meta_blob = meta_blob
+        self._meta_offsets = meta_offsets
+        self._ids_order = ids_order
+        self._metadata_index = MetadataIndex(self.metadata_column)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open a chunk store directory, memory-mapping all of its files. Stores
+        written before the id index existed sort their ids on the first lookup.
+
+        Args:
+            path (str): Directory of the chunk store.
+
+        Returns:
+            ChunkStore: The opened store.
+        """
+        ids_order_path = os.path.join(path, IDS_ORDER_FILE)
+        return cls(
+            ids=np.load(os.path.join(path, IDS_FILE), mmap_mode="r"),
+            text_blob=_map_blob(os.path.join(path, TEXT_FILE)),
+            text_offsets=np.load(os.path.join(path, TEXT_OFFSETS_FILE), mmap_mode="r"),
+            meta_blob=_map_blob(os.path.join(path, META_FILE)),
+            meta_offsets=np.load(os.path.join(path, META_OFFSETS_FILE), mmap_mode="r"),
+            ids_order=(np.load(ids_order_path, mmap_mode="r")
+                       if os.path.exists(ids_order_path) else None)
+        )
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """
+        Build an in-memory store from a list of chunk dicts, e.g. a legacy
+        pickled metadata list.
+
+        Args:
+            chunks (list[dict]): Chunks with id, chunk_text, metadata and code_blocks.
+
+        Returns:
+            ChunkStore: The in-memory store.
+        """
+        ids, texts, metas = _split_columns(chunks)
+        text_blob, text_offsets = _encode_column(texts)
+        meta_blob, meta_offsets = _encode_column(metas)
+        return cls(
+            ids=np.array(ids, dtype=bytes) if ids else np.zeros(0, dtype="S1"),
+            text_blob=np.frombuffer(text_blob, dtype=np.uint8),
+            text_offsets=text_offsets,
+            meta_blob=np.frombuffer(meta_blob, dtype=np.uint8),
+            meta_offsets=meta_offsets
+        )
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, row):
+        """Materialize the chunk dict stored at the given row."""
+        if not 0 <= row < len(self):
+            raise IndexError(f"Row {row} out of range for chunk store of size {len(self)}.")
+        meta = json.loads(self._slice(self._meta_blob, self._meta_offsets, row))
+        return {
+            "id": self.get_id(row),
+            "chunk_text": self.get_text(row),
+            "metadata": meta["metadata"],
+            "code_blocks": meta["code_blocks"]
+        }
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def get_id(self, row):
+        """Return the chunk id stored at the given row."""
+        return self._ids[row].decode("utf-8")
+
+    def get_text(self, row):
+        """Return the chunk text stored at the given row."""
+        return self._slice(self._text_blob, self._text_offsets, row)
+
+    def row_of(self, chunk_id):
+        """Return the row of a chunk id, or None if the id is unknown."""
+        row = int(self.rows_of([chunk_id])[0])
+        return None if row < 0 else row
+
+    def rows_of(self, chunk_ids):
+        """
+        Return the rows of several chunk ids with one binary search of the id index.
+
+        Args:
+            chunk_ids (list[str]): The chunk ids to look up.
+
+        Returns:
+            np.ndarray: The row of every id, -1 for the unknown ones.
+        """
+        rows = np.full(len(chunk_ids), -1, dtype=np.int64)
+        keys = [chunk_id.encode("utf-8") for chunk_id in chunk_ids]
+        # Longer ids would be truncated to the width of the column and cannot match.
+        fitting = [i for i, key in enumerate(keys) if len(key) <= self._ids.dtype.itemsize]
+        if not fitting or len(self) == 0:
+            return rows
+        if self._ids_order is None:
+            self._ids_order = _sort_ids(self._ids)
+
+        positions = np.searchsorted(self._ids, np.array([keys[i] for i in fitting],
+                                                        dtype=self._ids.dtype),
+                                    sorter=self._ids_order)
+        for i, position in zip(fitting, positions):
+            if position < len(self):
+                row = int(self._ids_order[position])
+                if self._ids[row] == keys[i]:
+                    rows[i] = row
+        return rows
+
+    def metadata_column(self, field):
+        """
+        Return the value of a metadata field for every row, None where it is missing.
+
+        Args:
+            field (str): The metadata field, e.g. "title" or "data_source".
+
+        Returns:
+            list: One value per row.
+        """
+        return [json.loads(self._slice(self._meta_blob, self._meta_offsets, row))
+                ["metadata"].get(field) for row in range(len(self))]
+
+    def rows_matching(self, filters):
+        """
+        Return the rows whose metadata match all the filters, e.g.
+        {"title": "git"}. Values are compared lowercased, without spaces and hyphens.
+
+        Args:
+            filters (dict): Metadata field -> value pairs.
+
+        Returns:
+            np.ndarray: The sorted matching rows.
+        """
+        return self._metadata_index.rows(filters)
+
+    def get_by_id(self, chunk_id):
+        """Materialize the chunk dict with the given id, or return None if unknown."""
+        row = self.row_of(chunk_id)
+        return None if row is None else self[row]
+
+    @staticmethod
+    def _slice(blob, offsets, row):
+        """Decode the UTF-8 value of a row from a blob column."""
+        return bytes(blob[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+
+def _sort_ids(ids):
+    """Return the id index of an ids column: its rows in the order of the sorted ids."""
+    return np.argsort(ids, kind="stable").astype(np.int64)
+
+
+def _split_columns(chunks):
+    """Split chunk dicts into the encoded id, text and metadata columns."""
+    ids, texts, metas = [], [], []
+    for chunk in chunks:
+        ids.append(str(chunk["id"]).encode("utf-8"))
+        texts.append(chunk.get("chunk_text", "").encode("utf-8"))
+        metas.append(json.dumps({
+            "metadata": chunk.get("metadata", {}),
+            "code_blocks": chunk.get("code_blocks", [])
+        }, ensure_ascii=False).encode("utf-8"))
+    return ids, texts, metas
+
+
+def _replace_file(path, write):
+    """
+    Write a file next to its destination and move it into place, so that a
+    process still mapping the previous version keeps reading a valid file.
+    """
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_bytes(path, data):
+    """Write raw bytes to a file."""
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def write_chunk_store(chunks, path):
+    """
+    Write a list of chunk dicts to a chunk store directory. Existing files are
+    replaced rather than overwritten in place, as they may be memory-mapped by a
+    running process.
+
+    Args:
+        chunks (list[dict]): Chunks with id, chunk_text, metadata and code_blocks.
+        path (str): Directory of the chunk store. Created if missing.
+    """
+    os.makedirs(path, exist_ok=True)
+    ids, texts, metas = _split_columns(chunks)
+    text_blob, text_offsets = _encode_column(texts)
+    meta_blob, meta_offsets = _encode_column(metas)
+    ids_column = np.array(ids, dtype=bytes) if ids else np.zeros(0, dtype="S1")
+
+    _replace_file(os.path.join(path, TEXT_FILE), lambda p: _write_bytes(p, text_blob))
+    _replace_file(os.path.join(path, META_FILE), lambda p: _write_bytes(p, meta_blob))
+    for name, column in [
+        (TEXT_OFFSETS_FILE, text_offsets),
+        (META_OFFSETS_FILE, meta_offsets),
+        (IDS_FILE, ids_column),
+        (IDS_ORDER_FILE, _sort_ids(ids_column))
+    ]:
+        _replace_file(os.path.join(path, name), lambda p, c=column: _save_npy(p, c))
+
+
+def _save_npy(path, column):
+    """Save a numpy column to the exact path given (np.save would append .npy)."""
+    with open(path, "wb") as f:
+        np.save(f, column)
+
+
+class ChunkStoreWriter:
+    """
+    Write a chunk store one chunk at a time, without holding the texts and
+    metadata in memory: they are appended to the blob files as they come, and
+    only the offsets and ids are kept until the store is closed.
+
+    The files are written next to their destination and moved into place on
+    close, like write_chunk_store. Use it as a context manager.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._ids = []
+        self._offsets = {TEXT_FILE: array("q", [0]), META_FILE: array("q", [0])}
+        self._files = {}
+
+    def __enter__(self):
+        os.makedirs(self.path, exist_ok=True)
+        self._files = {
+            name: open(os.path.join(self.path, f"{name}.tmp"), "wb")  # pylint: disable=consider-using-with
+            for name in (TEXT_FILE, META_FILE)
+        }
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        for f in self._files.values():
+            f.close()
+        if exc_type is None:
+            self._finish()
+        else:
+            for name in self._files:
+                os.remove(os.path.join(self.path, f"{name}.tmp"))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, chunk):
+        """
+        Append a chunk to the store.
+
+        Args:
+            chunk (dict): Chunk with id, chunk_text, metadata and code_blocks.
+        """
+        ids, texts, metas = _split_columns([chunk])
+        self._ids.append(ids[0])
+        for name, value in ((TEXT_FILE, texts[0]), (META_FILE, metas[0])):
+            self._files[name].write(value)
+            self._offsets[name].append(self._offsets[name][-1] + len(value))
+
+    def _finish(self):
+        """Write the offsets and ids and move every file into place."""
+        for name in (TEXT_FILE, META_FILE):
+            os.replace(os.path.join(self.path, f"{name}.tmp"), os.path.join(self.path, name))
+        ids_column = np.array(self._ids, dtype=bytes) if self._ids else np.zeros(0, dtype="S1")
+        for name, column in [
+            (TEXT_OFFSETS_FILE, np.frombuffer(self._offsets[TEXT_FILE], dtype=np.int64)),
+            (META_OFFSETS_FILE, np.frombuffer(self._offsets[META_FILE], dtype=np.int64)),
+            (IDS_FILE, ids_column),
+            (IDS_ORDER_FILE, _sort_ids(ids_column))
+        ]:
+            _replace_file(os.path.join(self.path, name), lambda p, c=column: _save_npy(p, c))
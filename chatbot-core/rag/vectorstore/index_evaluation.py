@@ -0,0 +1,77 @@
+"""
+Evaluation of a FAISS index against exact search: recall@k, memory per vector
+and single-query search latency.
+"""
+
+import time
+import faiss
+import numpy as np
+
+
+def sample_queries(vectors, n_queries, seed=0):
+    """
+    Sample evaluation queries from the indexed vectors.
+
+    Args:
+        vectors (np.ndarray): 2D float32 array of the indexed vectors.
+        n_queries (int): Maximum number of queries to sample.
+        seed (int): Seed of the sampling, so that runs are comparable.
+
+    Returns:
+        np.ndarray: 2D float32 array of queries.
+    """
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+    return np.ascontiguousarray(vectors[np.sort(rows)])
+
+
+def index_bytes_per_vector(index):
+    """
+    Return the serialized size of an index divided by its number of vectors,
+    which accounts for the codes as well as the centroids and codebooks.
+
+    Args:
+        index (faiss.Index): A populated FAISS index.
+
+    Returns:
+        float: The number of bytes per indexed vector.
+    """
+    return faiss.serialize_index(index).nbytes / max(index.ntotal, 1)
+
+
+def evaluate_index(index, vectors, queries, top_k=10):
+    """
+    Compare an index with an exact flat search over the same vectors.
+
+    Args:
+        index (faiss.Index): The populated index to evaluate.
+        vectors (np.ndarray): 2D float32 array of the indexed vectors, in index order.
+        queries (np.ndarray): 2D float32 array of evaluation queries.
+        top_k (int): Number of neighbors used for recall@k. Defaults to 10.
+
+    Returns:
+        dict: recall_at_k, top_k, bytes_per_vector, p50_ms and p99_ms.
+    """
+    exact_index = faiss.IndexFlatL2(vectors.shape[1])
+    exact_index.add(vectors)  # pylint: disable=no-value-for-parameter
+    _, expected = exact_index.search(queries, top_k)  # pylint: disable=no-value-for-parameter
+
+    latencies = []
+    found = np.empty_like(expected)
+    for row, query in enumerate(queries):
+        start = time.perf_counter()
+        _, labels = index.search(query.reshape(1, -1), top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found[row] = labels[0]
+
+    hits = sum(
+        len(np.intersect1d(found_row, expected_row))
+        for found_row, expected_row in zip(found, expected)
+    )
+    return {
+        "top_k": top_k,
+        "recall_at_k": hits / expected.size,
+        "bytes_per_vector": round(index_bytes_per_vector(index), 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 4)
+    }
@@ -0,0 +1,75 @@
+"""
+In-place removal of vectors from a built index.
+
+The indexes label every vector with its row in the chunk store, and the search
+results are mapped back to chunks through that row. Removing vectors must keep
+this invariant: the remaining vectors are renumbered to their new, compacted
+rows, in the same order, so that the chunk store can simply drop the removed
+rows and new vectors can be appended after the remaining ones.
+
+Flat (including scalar and product quantized) indexes already compact their
+storage in order when removing vectors. IVF indexes keep the label of every
+vector in their inverted lists, which are renumbered here. HNSW graphs do not
+support removals.
+"""
+
+import faiss
+import numpy as np
+
+
+def _row_lookup(n_rows, removed_rows):
+    """Return the new row of every old row, -1 for the removed ones."""
+    keep = np.ones(n_rows, dtype=bool)
+    keep[removed_rows] = False
+    lookup = np.full(n_rows, -1, dtype=np.int64)
+    lookup[keep] = np.arange(keep.sum())
+    return lookup
+
+
+def _extract_ivf(index):
+    """Return the IVF index holding the inverted lists of an index, if any."""
+    if isinstance(index, faiss.IndexBinary):
+        downcast = faiss.downcast_IndexBinary(index)
+        return downcast if isinstance(downcast, faiss.IndexBinaryIVF) else None
+    return faiss.try_extract_index_ivf(index)
+
+
+def _renumber_inverted_lists(ivf, lookup):
+    """Replace the label stored for every vector of the inverted lists."""
+    invlists = ivf.invlists
+    for list_no in range(ivf.nlist):
+        list_size = invlists.list_size(list_no)
+        if list_size == 0:
+            continue
+        ids_ptr = invlists.get_ids(list_no)
+        ids = faiss.rev_swig_ptr(ids_ptr, list_size)
+        ids[:] = lookup[ids]
+        invlists.release_ids(list_no, ids_ptr)
+
+
+def remove_index_rows(index, rows):
+    """
+    Remove vectors from an index by row and renumber the remaining ones.
+
+    Args:
+        index (faiss.Index | faiss.IndexBinary): A populated index labelling its
+            vectors with consecutive rows, not memory-mapped.
+        rows (Iterable[int]): The rows to remove.
+
+    Returns:
+        int: The number of removed vectors.
+
+    Raises:
+        RuntimeError: If the index type does not support removals, e.g. HNSW.
+            The index is left unchanged.
+    """
+    rows = np.unique(np.asarray(list(rows), dtype=np.int64))
+    if len(rows) == 0:
+        return 0
+
+    n_rows = index.ntotal
+    n_removed = index.remove_ids(rows)
+    ivf = _extract_ivf(index)
+    if ivf is not None:
+        _renumber_inverted_lists(ivf, _row_lookup(n_rows, rows))
+    return n_removed
@@ -0,0 +1,81 @@
+"""
+Inverted index of the chunk metadata, used to restrict a search to the chunks
+of a plugin, a data source or any other metadata value before scoring them.
+
+For every metadata field it is asked about, the index maps each normalized
+value of the field to the sorted rows of the chunk store holding it. The rows
+are the vector IDs of the FAISS index, so they can be handed to an ID selector,
+and their chunk ids give the documents a keyword search may return.
+
+A field is indexed the first time it is filtered on, with one pass over the
+metadata column of the store; the index then lives as long as the store.
+"""
+
+from threading import Lock
+import numpy as np
+
+
+def normalize_value(value):
+    """
+    Return the comparison key of a metadata value: lowercased, without spaces
+    and hyphens, the way plugin names are matched.
+    """
+    return str(value).replace("-", "").replace(" ", "").lower()
+
+
+# pylint: disable=too-few-public-methods
+class MetadataIndex:
+    """
+    Lazily built field -> value -> rows index over the metadata of a chunk store.
+
+    Args:
+        metadata_column (Callable[[str], list]): Returns the value of a field for
+            every row of the store, None where the field is missing.
+    """
+    def __init__(self, metadata_column):
+        self._metadata_column = metadata_column
+        self._fields = {}
+        self._lock = Lock()
+
+    def rows(self, filters):
+        """
+        Return the rows whose metadata match all the filters.
+
+        Args:
+            filters (dict): Field -> value pairs. The values are compared after
+                normalize_value.
+
+        Returns:
+            np.ndarray: The sorted matching rows, as int64.
+        """
+        rows = None
+        for field, value in filters.items():
+            field_rows = self._field(field).get(normalize_value(value), np.zeros(0, np.int64))
+            rows = field_rows if rows is None else np.intersect1d(rows, field_rows,
+                                                                  assume_unique=True)
+            if len(rows) == 0:
+                break
+        return np.zeros(0, dtype=np.int64) if rows is None else rows
+
+    def _field(self, field):
+        """Return the value -> rows mapping of a field, building it on first use."""
+        with self._lock:
+            if field not in self._fields:
+                self._fields[field] = _invert(self._metadata_column(field))
+            return self._fields[field]
+
+
+def _invert(values):
+    """Map every normalized value of a column to the sorted rows holding it."""
+    keys, rows = [], []
+    for row, value in enumerate(values):
+        if value is not None:
+            keys.append(normalize_value(value))
+            rows.append(row)
+    if not keys:
+        return {}
+    unique_keys, inverse = np.unique(np.array(keys), return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    groups = np.split(np.array(rows, dtype=np.int64)[order],
+                      np.cumsum(np.bincount(inverse))[:-1])
+    return {str(key): group for key, group in zip(unique_keys, groups)}
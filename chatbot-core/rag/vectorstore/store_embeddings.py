@@ -1,21 +1,280 @@
 """
-Embeds document chunks, builds a FAISS IVF index,
-and stores both the index and associated metadata to disk.
+Embeds document chunks, builds a FAISS index sized for the corpus,
+and stores the index, its manifest and the associated chunk store to disk.
+
+With --stream, the chunks are read from their JSONL files and embedded batch by
+batch into a memory-mapped vector file, so the memory used by the build does
+not grow with the corpus beyond the index itself.
+With --sources, the index of each listed source is built by a single command,
+embedding with one process per CPU core and building the indexes in parallel.
+With --unified, the chunks of all the sources are stored in a single index,
+each source owning a contiguous range of vector IDs recorded in the manifest.
 """
 
+import argparse
+import math
 import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import faiss
 from rag.embedding import embed_chunks
-from rag.vectorstore.vectorstore_utils import save_faiss_index, save_metadata
+from rag.embedding.embed_chunks import (
+    MODEL_NAME,
+    SOURCE_CHUNK_FILES,
+    STREAM_BATCH_SIZE,
+    collect_all_chunks,
+    embed_texts,
+    iter_chunks,
+    iter_embedded_batches,
+    prepare_chunks
+)
+from rag.embedding.embedding_cache import EmbeddingCache
+from rag.embedding.embedding_utils import load_embedding_model
+from rag.vectorstore.binary_index import binarize, build_binary_index
+from rag.vectorstore.chunk_store import ChunkStoreWriter
+from rag.vectorstore.index_evaluation import evaluate_index, sample_queries
+from rag.vectorstore.index_update import remove_index_rows
+from rag.vectorstore.vectorstore_utils import (
+    UNIFIED_SOURCE_NAME,
+    save_faiss_index,
+    save_chunk_store,
+    replace_index_and_chunk_store,
+    staging_chunk_store_path,
+    save_manifest,
+    apply_search_params,
+    load_faiss_index,
+    load_chunk_store,
+    load_manifest,
+    save_binary_index,
+    load_binary_index,
+    save_vectors,
+    load_vectors
+)
 from utils import LoggerFactory
 
 VECTOR_STORE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "embeddings")
 INDEX_PATH = os.path.join(VECTOR_STORE_DIR, "plugins_index.idx")
-METADATA_PATH = os.path.join(VECTOR_STORE_DIR, "plugins_metadata.pkl")
+CHUNK_STORE_PATH = os.path.join(VECTOR_STORE_DIR, "plugins_chunks")
+MANIFEST_PATH = os.path.join(VECTOR_STORE_DIR, "plugins_manifest.json")
+BINARY_INDEX_PATH = os.path.join(VECTOR_STORE_DIR, "plugins_binary.idx")
+VECTORS_PATH = os.path.join(VECTOR_STORE_DIR, "plugins_vectors.npy")
+TRAINED_INDEX_PATH = os.path.join(VECTOR_STORE_DIR, "plugins_trained.idx")
+UNIFIED_INDEX_PATH = os.path.join(VECTOR_STORE_DIR, f"{UNIFIED_SOURCE_NAME}_index.idx")
+UNIFIED_CHUNK_STORE_PATH = os.path.join(VECTOR_STORE_DIR, f"{UNIFIED_SOURCE_NAME}_chunks")
+UNIFIED_MANIFEST_PATH = os.path.join(VECTOR_STORE_DIR, f"{UNIFIED_SOURCE_NAME}_manifest.json")
+UNIFIED_TRAINED_INDEX_PATH = os.path.join(VECTOR_STORE_DIR, f"{UNIFIED_SOURCE_NAME}_trained.idx")
+
+# Single-threaded cost of scanning one million float32 vector components, measured
+# on a flat L2 index. Used to estimate the latency of the candidate index types.
+SCAN_MS_PER_MILLION_COMPONENTS = 0.32
+TARGET_LATENCY_MS = 2.0
+# IVF needs about 39 training points per centroid.
+IVF_MIN_POINTS_PER_LIST = 39
+IVF_NPROBE_FRACTION = 1 / 16
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+INDEX_TYPES = ["auto", "flat", "ivf", "hnsw"]
+# Vector encodings trading accuracy for memory. PQ and OPQ use one byte per
+# PQ_DIMS_PER_SUBQUANTIZER dimensions; PCA projects the vectors to PCA_DIM
+# dimensions before indexing them.
+COMPRESSIONS = ["none", "sqfp16", "sq8", "pq", "opq", "pca"]
+PQ_DIMS_PER_SUBQUANTIZER = 8
+PCA_DIM = 128
+EVALUATION_QUERIES = 200
+# A persisted trained index is reused while the corpus size stays within this
+# factor of the number of vectors it was trained on.
+TRAINED_INDEX_MAX_GROWTH = 2.0
+
+
+def _estimate_scan_ms(n_components):
+    """Estimate the time needed to scan the given number of vector components."""
+    return n_components / 1e6 * SCAN_MS_PER_MILLION_COMPONENTS
+
+
+def _ivf_nlist(n_vectors):
+    """Return about sqrt(N) lists, keeping enough training points per list."""
+    return min(round(math.sqrt(n_vectors)), n_vectors // IVF_MIN_POINTS_PER_LIST)
+
+
+def _flat_spec(n_vectors, dim):
+    """Spec of an exact flat index."""
+    return {"type": "flat", "factory": "Flat", "search_params": {},
+            "estimated_latency_ms": _estimate_scan_ms(n_vectors * dim)}
+
+
+def _ivf_spec(n_vectors, dim):
+    """Spec of an IVF index with about sqrt(N) lists, probing 1/16 of them."""
+    nlist = _ivf_nlist(n_vectors)
+    nprobe = max(1, round(nlist * IVF_NPROBE_FRACTION))
+    return {"type": "ivf", "factory": f"IVF{nlist},Flat", "search_params": {"nprobe": nprobe},
+            "estimated_latency_ms": _estimate_scan_ms(
+                nlist * dim + n_vectors * dim * nprobe / nlist
+            )}
+
+
+def _hnsw_spec():
+    """Spec of an HNSW graph index."""
+    return {"type": "hnsw", "factory": f"HNSW{HNSW_M}",
+            "build_params": {"efConstruction": HNSW_EF_CONSTRUCTION},
+            "search_params": {"efSearch": HNSW_EF_SEARCH}, "estimated_latency_ms": None}
+
+
+def select_index_spec(n_vectors, dim, target_latency_ms=TARGET_LATENCY_MS, index_type="auto"):
+    """
+    Choose the FAISS index type and parameters for a corpus.
+
+    With index_type "auto", a flat index, which is exact and needs no training,
+    is used as long as an exhaustive scan fits the latency target. Above that,
+    IVF is used with about sqrt(N) lists, probing 1/16 of them; when even the IVF
+    scan is too slow, HNSW is used instead. IVF falls back to flat when there are
+    too few vectors to train it.
+
+    Args:
+        n_vectors (int): Number of vectors to index.
+        dim (int): Dimension of the vectors.
+        target_latency_ms (float): Target single-query search latency, in milliseconds.
+        index_type (str): One of INDEX_TYPES, to force the index type. Defaults to "auto".
+
+    Returns:
+        dict: The index spec, with the index type, its FAISS factory string and the
+        search parameters to apply after loading it.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}.")
+    corpus = {"n_vectors": n_vectors, "dim": dim}
+
+    if index_type == "hnsw":
+        return {**corpus, **_hnsw_spec()}
+    flat_spec = {**corpus, **_flat_spec(n_vectors, dim)}
+    if index_type == "flat" or _ivf_nlist(n_vectors) < 2:
+        return flat_spec
+    ivf_spec = {**corpus, **_ivf_spec(n_vectors, dim)}
+    if index_type == "ivf":
+        return ivf_spec
+
+    if flat_spec["estimated_latency_ms"] <= target_latency_ms:
+        return flat_spec
+    if ivf_spec["estimated_latency_ms"] <= target_latency_ms:
+        return ivf_spec
+    return {**corpus, **_hnsw_spec()}
+
+
+def apply_compression(index_spec, compression):
+    """
+    Return a copy of an index spec whose factory string stores compressed vectors.
+
+    Scalar quantization keeps one fp16 value or one byte per dimension (2x or 4x
+    smaller than float32), product quantization one byte per 8 dimensions (32x),
+    optionally after an OPQ rotation, and PCA reduces the dimension before
+    indexing.
+
+    Args:
+        index_spec (dict): Spec returned by select_index_spec.
+        compression (str): One of COMPRESSIONS.
+
+    Returns:
+        dict: The spec of the compressed index.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}.")
+    if compression == "none":
+        return dict(index_spec)
+
+    dim = index_spec["dim"]
+    if compression == "pca":
+        if dim <= PCA_DIM:
+            raise ValueError(f"PCA to {PCA_DIM} dimensions needs vectors with more dimensions,"
+                             f" got {dim}.")
+        return {**index_spec, "compression": compression,
+                "factory": f"PCA{PCA_DIM},{index_spec['factory']}"}
+
+    if compression in ("pq", "opq") and dim % PQ_DIMS_PER_SUBQUANTIZER:
+        raise ValueError(f"PQ needs a dimension multiple of {PQ_DIMS_PER_SUBQUANTIZER}, got {dim}.")
+    n_subquantizers = dim // PQ_DIMS_PER_SUBQUANTIZER
+    code = {
+        "sqfp16": "SQfp16",
+        "sq8": "SQ8",
+        "pq": f"PQ{n_subquantizers}",
+        "opq": f"PQ{n_subquantizers}"
+    }[compression]
+
+    if index_spec["type"] == "flat":
+        factory = code
+    elif index_spec["type"] == "ivf":
+        factory = index_spec["factory"].replace(",Flat", f",{code}")
+    else:
+        factory = f"{index_spec['factory']},{code}"
+    if compression == "opq":
+        factory = f"OPQ{n_subquantizers},{factory}"
+
+    return {**index_spec, "compression": compression, "factory": factory}
 
-N_LIST = 256
-N_PROBE = 20
+
+def _validate_vectors(vectors):
+    """Check that the vectors are a 2D float32 numpy array."""
+    if not isinstance(vectors, np.ndarray):
+        raise TypeError("Vectors must be an instance of numpy.ndarray.")
+    if vectors.ndim != 2:
+        raise ValueError(f"Vectors must be 2D, got shape {vectors.shape}.")
+    if vectors.dtype != np.float32:
+        raise TypeError(f"Vectors must be float32, got dtype {vectors.dtype}.")
+
+
+def train_faiss_index(vectors, index_spec, logger):
+    """
+    Create the FAISS index described by an index spec and train it, if its type
+    needs training (IVF centroids, quantizer codebooks, PCA matrix).
+
+    Args:
+        vectors (np.ndarray): 2D array of shape (n_samples, dim) with float32 vectors.
+        index_spec (dict): Spec returned by select_index_spec.
+        logger (logging.Logger): Logger for status messages.
+
+    Returns:
+        faiss.Index: A trained, empty FAISS index.
+    """
+    _validate_vectors(vectors)
+
+    index = faiss.index_factory(vectors.shape[1], index_spec["factory"], faiss.METRIC_L2)
+    if not index.is_trained:
+        logger.info("FAISS index training started...")
+        index.train(vectors)  # pylint: disable=no-value-for-parameter
+        logger.info("FAISS index training completed.")
+    return index
+
+
+def build_faiss_index(vectors, index_spec, logger, trained_index=None):
+    """
+    Build and return a FAISS index described by an index spec.
+
+    Args:
+        vectors (np.ndarray): 2D array of shape (n_samples, dim) with float32 vectors.
+        index_spec (dict): Spec returned by select_index_spec.
+        logger (logging.Logger): Logger for status messages.
+        trained_index (faiss.Index, optional): An already trained, empty index of
+            the spec, used instead of training a new one.
+
+    Returns:
+        faiss.Index: A trained FAISS index with added vectors.
+    """
+    _validate_vectors(vectors)
+
+    if trained_index is not None:
+        index = trained_index
+    else:
+        index = train_faiss_index(vectors, index_spec, logger)
+    if "efConstruction" in index_spec.get("build_params", {}):
+        base_index = index
+        if isinstance(base_index, faiss.IndexPreTransform):
+            base_index = faiss.downcast_index(base_index.index)
+        base_index.hnsw.efConstruction = index_spec["build_params"]["efConstruction"]
+    apply_search_params(index, index_spec["search_params"], logger)
+    index.add(vectors)  # pylint: disable=no-value-for-parameter
+
+    return index
 
 
 def build_faiss_ivf_index(vectors, nlist, nprobe, logger):
@@ -31,12 +290,7 @@ def build_faiss_ivf_index(vectors, nlist, nprobe, logger):
     Returns:
         faiss.IndexIVFFlat: A trained FAISS IVF index with added vectors.
     """
-    if not isinstance(vectors, np.ndarray):
-        raise TypeError("Vectors must be an instance of numpy.ndarray.")
-    if vectors.ndim != 2:
-        raise ValueError(f"Vectors must be 2D, got shape {vectors.shape}.")
-    if vectors.dtype != np.float32:
-        raise TypeError(f"Vectors must be float32, got dtype {vectors.dtype}.")
+    _validate_vectors(vectors)
 
     d = vectors.shape[1]
     quantizer = faiss.IndexFlatL2(d)
@@ -51,32 +305,693 @@ def build_faiss_ivf_index(vectors, nlist, nprobe, logger):
     return index
 
 
-def run_indexing(nlist, nprobe, logger):
+def _training_record_path(trained_path):
+    """Path of the JSON record describing a persisted trained index."""
+    return f"{os.path.splitext(trained_path)[0]}.json"
+
+
+def _load_trained_index(trained_path, index_spec, n_vectors, logger):
+    """
+    Return the spec and the persisted trained index, if it was trained for the
+    same index type and a corpus of a similar size, otherwise None.
+    """
+    record = load_manifest(_training_record_path(trained_path), logger)
+    trained_spec = record.get("spec", {})
+    if any(trained_spec.get(key) != index_spec.get(key) for key in ("type", "compression", "dim")):
+        return None
+    n_trained = record.get("n_vectors", 0)
+    growth = n_vectors / max(n_trained, 1)
+    if not 1 / TRAINED_INDEX_MAX_GROWTH <= growth <= TRAINED_INDEX_MAX_GROWTH:
+        logger.info("The corpus went from %d to %d vectors since the index was trained. "
+                    "Training it again.", n_trained, n_vectors)
+        return None
+    trained_index = load_faiss_index(trained_path, logger)
+    if trained_index is None or trained_index.ntotal or trained_index.d != index_spec["dim"]:
+        return None
+
+    logger.info("Reusing the %s index trained on %d vectors.", trained_spec["factory"], n_trained)
+    return {**index_spec, "factory": trained_spec["factory"],
+            "search_params": trained_spec["search_params"], "trained_on": n_trained}, trained_index
+
+
+def _train_or_reuse(vectors_np, index_spec, trained_path, reuse_training, logger):
+    """
+    Return the spec and the trained, empty index to populate. A persisted trained
+    index is reused when it fits the corpus; otherwise the index is trained and,
+    if its type needs training, persisted for the next builds.
     """
-    Main pipeline: embed documents, build FAISS index, and save index + metadata.
+    if trained_path is None:
+        return index_spec, None
+    if reuse_training:
+        reused = _load_trained_index(trained_path, index_spec, len(vectors_np), logger)
+        if reused is not None:
+            return reused
+
+    trained_index = train_faiss_index(vectors_np, index_spec, logger)
+    if not faiss.index_factory(index_spec["dim"], index_spec["factory"]).is_trained:
+        save_faiss_index(trained_index, trained_path, logger)
+        save_manifest({"spec": index_spec, "n_vectors": len(vectors_np)},
+                      _training_record_path(trained_path), logger)
+    return index_spec, trained_index
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def _build_for_corpus(vectors_np, target_latency_ms, index_type, compression, evaluate, logger,
+                      trained_path=None, reuse_training=True):
+    """
+    Select the index spec for the vectors and build the index. When asked, the
+    recall and latency of the built index are measured and kept in the spec.
+    The trained index is persisted at trained_path and reused by the next builds.
+    """
+    index_spec = select_index_spec(vectors_np.shape[0], vectors_np.shape[1], target_latency_ms,
+                                   index_type)
+    index_spec = apply_compression(index_spec, compression)
+    index_spec, trained_index = _train_or_reuse(vectors_np, index_spec, trained_path,
+                                                reuse_training, logger)
+    logger.info("Selected %s index (%s) for %d vectors.",
+                index_spec["type"], index_spec["factory"], vectors_np.shape[0])
+    index = build_faiss_index(vectors_np, index_spec, logger, trained_index=trained_index)
+    if evaluate:
+        index_spec["evaluation"] = evaluate_index(
+            index, vectors_np, sample_queries(vectors_np, EVALUATION_QUERIES)
+        )
+        logger.info("Index evaluation: %s", index_spec["evaluation"])
+    return index, index_spec
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def run_indexing(logger, target_latency_ms=TARGET_LATENCY_MS, index_type="auto",
+                 compression="none", evaluate=False, binary=False, embedding_cache=None,
+                 reuse_training=True):
+    """
+    Main pipeline: embed documents, build FAISS index, and save index, manifest
+    and chunk store.
 
     Args:
-        nlist (int): Number of clusters for FAISS IVF index.
-        nprobe (int): Number of clusters to search during queries.
+        logger (logging.Logger): Logger for status messages.
+        target_latency_ms (float): Target single-query search latency, used to
+            choose the index type.
+        index_type (str): One of INDEX_TYPES, to force the index type. Defaults to "auto".
+        compression (str): One of COMPRESSIONS. Defaults to "none".
+        evaluate (bool): Whether to measure the recall and latency of the built index
+            and record them in the manifest.
+        binary (bool): Whether to also store a binary first-stage index and the float
+            vectors used to rescore its candidates.
+        embedding_cache (EmbeddingCache, optional): Cache of the embeddings of previous
+            builds, so that only new or changed chunks are embedded.
+        reuse_training (bool): Whether to reuse the index trained by a previous build,
+            if it fits the corpus. Defaults to True.
     """
     logger.info("Starting document embedding...")
-    vectors, metadata = embed_chunks(logger)
-    vectors_np = np.array(vectors).astype("float32")
+    vectors, metadata = embed_chunks(logger, cache=embedding_cache)
+    vectors_np = np.asarray(vectors, dtype="float32")
+
+    index, index_spec = _build_for_corpus(vectors_np, target_latency_ms, index_type,
+                                          compression, evaluate, logger,
+                                          trained_path=TRAINED_INDEX_PATH,
+                                          reuse_training=reuse_training)
+    _save_index_files(
+        index, index_spec, metadata, vectors_np if binary else None,
+        (INDEX_PATH, CHUNK_STORE_PATH, MANIFEST_PATH, BINARY_INDEX_PATH, VECTORS_PATH), logger
+    )
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def stream_chunks_to_disk(vectors_path, chunk_store_path, logger, chunk_files=None,
+                          embedding_cache=None, batch_size=STREAM_BATCH_SIZE):
+    """
+    Embed the chunks batch by batch, writing the vectors into a preallocated,
+    memory-mapped .npy file and the chunks into a chunk store as they come.
+
+    The chunks are read twice: once to count them and size the vector file, then
+    to embed them. Only one batch of chunks is held in memory at a time.
+
+    Args:
+        vectors_path (str): Path of the .npy file to write the vectors to.
+        chunk_store_path (str): Directory to write the chunk store to.
+        logger (logging.Logger): Logger for progress updates.
+        chunk_files (list[str], optional): Files to load. Defaults to CHUNK_FILES.
+        embedding_cache (EmbeddingCache, optional): Cache of the embeddings of previous
+            builds, so that only new or changed chunks are embedded.
+        batch_size (int): Number of chunks embedded together.
+
+    Returns:
+        np.memmap | None: The (n_chunks, dim) float32 vectors, mapped from
+        vectors_path, or None if there are no chunks.
+
+    Raises:
+        RuntimeError: If the chunk files changed between the two reads.
+    """
+    n_chunks = sum(1 for _ in iter_chunks(logger, chunk_files))
+    logger.info("Streaming %d chunks.", n_chunks)
+    if not n_chunks:
+        return None
+
+    vectors, row = None, 0
+    with ChunkStoreWriter(chunk_store_path) as chunk_store:
+        for batch_vectors, batch in iter_embedded_batches(logger, chunk_files,
+                                                          cache=embedding_cache,
+                                                          batch_size=batch_size):
+            if row + len(batch) > n_chunks:
+                raise RuntimeError("The chunk files changed while they were being embedded.")
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(vectors_path, mode="w+", dtype="float32",
+                                                    shape=(n_chunks, batch_vectors.shape[1]))
+            vectors[row:row + len(batch)] = batch_vectors
+            row += len(batch)
+            for chunk in batch:
+                chunk_store.add(chunk)
+            logger.info("Embedded %d of %d chunks.", row, n_chunks)
+        if row != n_chunks:
+            raise RuntimeError("The chunk files changed while they were being embedded.")
+
+    vectors.flush()
+    return vectors
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+# pylint: disable=too-many-locals
+def run_streaming_indexing(logger, target_latency_ms=TARGET_LATENCY_MS, index_type="auto",
+                           compression="none", evaluate=False, binary=False,
+                           embedding_cache=None, reuse_training=True,
+                           batch_size=STREAM_BATCH_SIZE):
+    """
+    Same pipeline as run_indexing, streaming the chunks from their JSONL files:
+    the vectors are written to a memory-mapped file as they are embedded and the
+    index is built from that file, so that the vectors and chunks of the whole
+    corpus are never held in memory.
+
+    The vector file is kept as the float vectors of the binary first stage when
+    binary is set, and removed otherwise. The other arguments are the ones of
+    run_indexing.
+
+    Args:
+        batch_size (int): Number of chunks embedded together.
+    """
+    logger.info("Starting streaming document embedding...")
+    streamed_path = f"{os.path.splitext(VECTORS_PATH)[0]}.streaming.npy"
+    # The chunks are streamed next to the live store, which a running API may be
+    # reading, and published with the index once it is built.
+    streamed_store_path = staging_chunk_store_path(CHUNK_STORE_PATH)
+    shutil.rmtree(streamed_store_path, ignore_errors=True)
+    try:
+        vectors = stream_chunks_to_disk(streamed_path, streamed_store_path, logger,
+                                        embedding_cache=embedding_cache, batch_size=batch_size)
+        if vectors is None:
+            logger.warning("No chunks to index.")
+            shutil.rmtree(streamed_store_path, ignore_errors=True)
+            return
+        index, index_spec = _build_for_corpus(vectors, target_latency_ms, index_type,
+                                              compression, evaluate, logger,
+                                              trained_path=TRAINED_INDEX_PATH,
+                                              reuse_training=reuse_training)
+    except Exception:
+        shutil.rmtree(streamed_store_path, ignore_errors=True)
+        raise
+    replace_index_and_chunk_store(index, None, INDEX_PATH, CHUNK_STORE_PATH, logger)
+    manifest = {"index": index_spec}
+    if binary:
+        binary_index, manifest["binary"] = build_binary_index(vectors, logger)
+        save_binary_index(binary_index, BINARY_INDEX_PATH, logger)
+    n_vectors = len(vectors)
+    # Unmap the file before moving or removing it, which Windows requires.
+    del vectors
+    if binary:
+        os.replace(streamed_path, VECTORS_PATH)
+        logger.info("Vectors saved to %s", VECTORS_PATH)
+    else:
+        os.remove(streamed_path)
+    save_manifest(manifest, MANIFEST_PATH, logger)
+
+    logger.info("Stored %d vectors to FAISS (%s) at %s",
+                n_vectors, index_spec["factory"], INDEX_PATH)
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def _save_index_files(index, index_spec, metadata, binary_vectors, paths, logger):
+    """
+    Save an index, its chunk store and manifest and, when binary_vectors are
+    given, its binary first stage.
+
+    Args:
+        paths (tuple[str]): Paths of the index, chunk store, manifest, binary index
+            and float vectors.
+    """
+    index_path, chunk_store_path, manifest_path, binary_path, vectors_path = paths
+    save_faiss_index(index, index_path, logger)
+    save_chunk_store(metadata, chunk_store_path, logger)
+    manifest = {"index": index_spec}
+    if binary_vectors is not None:
+        binary_index, manifest["binary"] = build_binary_index(binary_vectors, logger)
+        save_binary_index(binary_index, binary_path, logger)
+        save_vectors(binary_vectors, vectors_path, logger)
+    save_manifest(manifest, manifest_path, logger)
 
-    index = build_faiss_ivf_index(vectors_np, nlist=nlist, nprobe=nprobe, logger=logger)
+    logger.info("Stored %d vectors to FAISS (%s) at %s",
+                len(metadata), index_spec["factory"], index_path)
+
+
+def _stage_stats(n_chunks, start):
+    """Return the chunk count, duration and throughput of a build stage started at start."""
+    seconds = time.perf_counter() - start
+    return {"chunks": n_chunks, "seconds": round(seconds, 3),
+            "chunks_per_second": round(n_chunks / seconds, 1) if seconds else None}
+
+
+def _index_source(source_name, vectors_np, metadata, build_options, logger):
+    """Build and save the index of one source, in the files read by the retriever."""
+    # OpenMP counts the threads per calling thread: set them in the worker thread.
+    faiss.omp_set_num_threads(build_options["faiss_threads"])
+    index_path, chunk_store_path, manifest_path = _source_paths(source_name)
+    index, index_spec = _build_for_corpus(
+        vectors_np, build_options["target_latency_ms"], build_options["index_type"],
+        build_options["compression"], build_options["evaluate"], logger,
+        trained_path=os.path.join(VECTOR_STORE_DIR, f"{source_name}_trained.idx"),
+        reuse_training=build_options["reuse_training"]
+    )
+    _save_index_files(
+        index, index_spec, metadata, vectors_np if build_options["binary"] else None,
+        (index_path, chunk_store_path, manifest_path,
+         os.path.join(VECTOR_STORE_DIR, f"{source_name}_binary.idx"),
+         os.path.join(VECTOR_STORE_DIR, f"{source_name}_vectors.npy")),
+        logger
+    )
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+# pylint: disable=too-many-locals
+def run_multi_source_indexing(source_names, logger, target_latency_ms=TARGET_LATENCY_MS,
+                              index_type="auto", compression="none", evaluate=False,
+                              binary=False, embedding_cache=None, reuse_training=True,
+                              processes=None):
+    """
+    Build a separate index for every source with a single command. The chunks
+    of all the sources are embedded together by a pool of processes, one per CPU
+    core, then the indexes of the sources are trained and written in parallel.
+    The throughput of every stage is logged.
+
+    Args:
+        source_names (list[str]): Sources to index, keys of SOURCE_CHUNK_FILES.
+        logger (logging.Logger): Logger for status messages.
+        target_latency_ms (float): Target single-query search latency, used to
+            choose the index type.
+        index_type (str): One of INDEX_TYPES, to force the index type. Defaults to "auto".
+        compression (str): One of COMPRESSIONS. Defaults to "none".
+        evaluate (bool): Whether to measure the recall and latency of the built indexes.
+        binary (bool): Whether to also store the binary first stage of every source.
+        embedding_cache (EmbeddingCache, optional): Cache of the embeddings of previous
+            builds, so that only new or changed chunks are embedded.
+        reuse_training (bool): Whether to reuse the indexes trained by a previous build.
+        processes (int, optional): Number of embedding processes and of indexes built
+            at once. Defaults to the CPU count.
+
+    Returns:
+        dict: The chunks, seconds and chunks_per_second of the load, embed and index stages.
+    """
+    processes = processes or os.cpu_count() or 1
+    stats = {}
+
+    start = time.perf_counter()
+    source_chunks = {}
+    for source_name in source_names:
+        metadata = prepare_chunks(
+            collect_all_chunks(logger, SOURCE_CHUNK_FILES[source_name]), logger
+        )
+        if not metadata:
+            logger.warning("Source '%s' has no chunks. Skipping it.", source_name)
+            continue
+        source_chunks[source_name] = metadata
+    n_chunks = sum(len(metadata) for metadata in source_chunks.values())
+    stats["load"] = _stage_stats(n_chunks, start)
+    if not source_chunks:
+        logger.error("No chunks to index.")
+        return stats
+
+    start = time.perf_counter()
+    texts = [chunk["chunk_text"] for metadata in source_chunks.values() for chunk in metadata]
+    vectors_np = np.asarray(
+        embed_texts(texts, logger, cache=embedding_cache, processes=processes), dtype="float32"
+    )
+    stats["embed"] = _stage_stats(n_chunks, start)
+
+    start = time.perf_counter()
+    offsets = np.cumsum([0] + [len(metadata) for metadata in source_chunks.values()])
+    workers = min(len(source_chunks), processes)
+    # Share the cores between the indexes built at the same time.
+    build_options = {"target_latency_ms": target_latency_ms, "index_type": index_type,
+                     "compression": compression, "evaluate": evaluate, "binary": binary,
+                     "reuse_training": reuse_training,
+                     "faiss_threads": max(1, faiss.omp_get_max_threads() // workers)}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_index_source, source_name, vectors_np[start_row:end_row],
+                            metadata, build_options, logger)
+            for (source_name, metadata), start_row, end_row
+            in zip(source_chunks.items(), offsets[:-1], offsets[1:])
+        ]
+        for future in futures:
+            future.result()
+    stats["index"] = _stage_stats(n_chunks, start)
+
+    for stage, stage_stats in stats.items():
+        logger.info("%-5s %8d chunks in %8.2f s: %10.1f chunks/s", stage, stage_stats["chunks"],
+                    stage_stats["seconds"], stage_stats["chunks_per_second"] or 0)
+    return stats
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+# pylint: disable=too-many-locals
+def run_unified_indexing(source_names, logger, target_latency_ms=TARGET_LATENCY_MS,
+                         index_type="auto", compression="none", evaluate=False,
+                         embedding_cache=None, reuse_training=True):
+    """
+    Embed the chunks of several sources and store them in a single FAISS index.
+    The vectors of each source are added contiguously, and the [start, end) ID
+    range of every source is written to the manifest, so that a search can be
+    restricted to any subset of sources.
+
+    Args:
+        source_names (list[str]): Sources to index, keys of SOURCE_CHUNK_FILES.
+        logger (logging.Logger): Logger for status messages.
+        target_latency_ms (float): Target single-query search latency, used to
+            choose the index type.
+        index_type (str): One of INDEX_TYPES, to force the index type. Defaults to "auto".
+        compression (str): One of COMPRESSIONS. Defaults to "none".
+        evaluate (bool): Whether to measure the recall and latency of the built index
+            and record them in the manifest.
+        embedding_cache (EmbeddingCache, optional): Cache of the embeddings of previous
+            builds, so that only new or changed chunks are embedded.
+        reuse_training (bool): Whether to reuse the index trained by a previous build,
+            if it fits the corpus. Defaults to True.
+    """
+    model = load_embedding_model(MODEL_NAME, logger)
+    all_vectors, all_metadata, source_ranges = [], [], {}
 
-    save_faiss_index(index, INDEX_PATH, logger)
-    save_metadata(metadata, METADATA_PATH, logger)
+    for source_name in source_names:
+        logger.info("Embedding source '%s'...", source_name)
+        vectors, metadata = embed_chunks(logger, SOURCE_CHUNK_FILES[source_name], model=model,
+                                         cache=embedding_cache)
+        if not metadata:
+            logger.warning("Source '%s' has no chunks. Leaving it out of the index.", source_name)
+            continue
+        start = len(all_metadata)
+        source_ranges[source_name] = [start, start + len(metadata)]
+        all_vectors.append(np.asarray(vectors, dtype="float32"))
+        all_metadata.extend(metadata)
 
-    logger.info(f"Stored {len(vectors)} vectors to FAISS (IVFFlat) at {INDEX_PATH}")
+    if not all_metadata:
+        logger.error("No chunks to index.")
+        return
+
+    vectors_np = np.concatenate(all_vectors)
+    index, index_spec = _build_for_corpus(vectors_np, target_latency_ms, index_type,
+                                          compression, evaluate, logger,
+                                          trained_path=UNIFIED_TRAINED_INDEX_PATH,
+                                          reuse_training=reuse_training)
+
+    save_faiss_index(index, UNIFIED_INDEX_PATH, logger)
+    save_chunk_store(all_metadata, UNIFIED_CHUNK_STORE_PATH, logger)
+    save_manifest({"index": index_spec, "sources": source_ranges}, UNIFIED_MANIFEST_PATH, logger)
+
+    logger.info("Stored %d vectors of sources %s to FAISS (%s) at %s",
+                len(all_metadata), list(source_ranges), index_spec["factory"],
+                UNIFIED_INDEX_PATH)
+
+
+def add_chunks_to_index(source_name, chunk_files, logger, embedding_cache=None):
+    """
+    Embed new chunks and add them to the existing index of a source, without
+    rebuilding it. Chunks whose id is already stored are skipped. Flat and HNSW
+    indexes need no training, so their search quality is unaffected; an IVF index
+    keeps its original centroids.
+
+    The index and chunk store are written next to the previous files and moved
+    into place, so that running processes pick up the new version on their next
+    lookup.
+
+    Args:
+        source_name (str): The source whose index is extended.
+        chunk_files (list[str]): Processed chunk files holding the new chunks.
+        logger (logging.Logger): Logger for status messages.
+        embedding_cache (EmbeddingCache, optional): Cache of the embeddings of previous
+            builds, so that only new or changed chunks are embedded.
+
+    Returns:
+        int: The number of chunks added.
+    """
+    if source_name == UNIFIED_SOURCE_NAME:
+        logger.error("The unified index keeps each source in a contiguous ID range and "
+                     "cannot be extended. Rebuild it with --unified.")
+        return 0
+
+    index_path, chunk_store_path, manifest_path = _source_paths(source_name)
+    index = load_faiss_index(index_path, logger)
+    chunk_store = load_chunk_store(chunk_store_path, logger)
+    if index is None or chunk_store is None:
+        logger.error("Source '%s' has no index to extend. Run a full indexing first.",
+                     source_name)
+        return 0
+
+    vectors, metadata = embed_chunks(logger, chunk_files, cache=embedding_cache)
+    stored_rows = chunk_store.rows_of([str(chunk["id"]) for chunk in metadata])
+    new_rows = [row for row, stored_row in enumerate(stored_rows) if stored_row < 0]
+    if not new_rows:
+        logger.info("No new chunks to add to source '%s'.", source_name)
+        return 0
+
+    new_vectors = np.asarray(vectors, dtype="float32")[new_rows]
+    _validate_vectors(new_vectors)
+    index.add(new_vectors)  # pylint: disable=no-value-for-parameter
+    chunks = list(chunk_store) + [metadata[row] for row in new_rows]
+
+    replace_index_and_chunk_store(index, chunks, index_path, chunk_store_path, logger)
+    _extend_binary_stage(source_name, new_vectors, manifest_path, logger)
+    _update_manifest_size(source_name, index, manifest_path, logger)
+
+    logger.info("Added %d chunks to source '%s' (%d vectors).",
+                len(new_rows), source_name, index.ntotal)
+    return len(new_rows)
+
+
+# pylint: disable=too-many-locals
+def sync_source_index(source_name, chunk_files, logger, embedding_cache=None):
+    """
+    Bring the index of a source in line with its current chunk files, without
+    rebuilding it: the chunks that are no longer in the files are removed, the
+    new ones are embedded and added, and the unchanged ones are left in place.
+    Chunk ids are derived from the chunk content, so a changed chunk is removed
+    and added again. The cost is proportional to the number of changes, and an
+    IVF index keeps its trained centroids.
+
+    HNSW graphs do not support removals; when chunks were removed, such an index
+    is rebuilt from the embeddings, which the embedding cache makes cheap.
+
+    Args:
+        source_name (str): The source whose index is updated.
+        chunk_files (list[str]): Processed chunk files holding all the chunks of the source.
+        logger (logging.Logger): Logger for status messages.
+        embedding_cache (EmbeddingCache, optional): Cache of the embeddings of previous
+            builds, so that only new or changed chunks are embedded.
+
+    Returns:
+        tuple[int, int]: The number of chunks added and removed.
+    """
+    if source_name == UNIFIED_SOURCE_NAME:
+        logger.error("The unified index keeps each source in a contiguous ID range and "
+                     "cannot be updated. Rebuild it with --unified.")
+        return 0, 0
+
+    index_path, chunk_store_path, manifest_path = _source_paths(source_name)
+    index = load_faiss_index(index_path, logger)
+    chunk_store = load_chunk_store(chunk_store_path, logger)
+    if index is None or chunk_store is None:
+        logger.error("Source '%s' has no index to update. Run a full indexing first.",
+                     source_name)
+        return 0, 0
+
+    metadata = _unique_chunks(prepare_chunks(collect_all_chunks(logger, chunk_files), logger),
+                              logger)
+    current_ids = {str(chunk["id"]) for chunk in metadata}
+    removed_rows = [row for row in range(len(chunk_store))
+                    if chunk_store.get_id(row) not in current_ids]
+    stored_rows = chunk_store.rows_of([str(chunk["id"]) for chunk in metadata])
+    added = [chunk for chunk, stored_row in zip(metadata, stored_rows) if stored_row < 0]
+    if not removed_rows and not added:
+        logger.info("Source '%s' is up to date.", source_name)
+        return 0, 0
+
+    removed = set(removed_rows)
+    chunks = [chunk for row, chunk in enumerate(chunk_store) if row not in removed] + added
+    new_vectors = np.asarray(
+        embed_texts([chunk["chunk_text"] for chunk in added], logger, cache=embedding_cache),
+        dtype="float32"
+    ).reshape(len(added), index.d)
+
+    try:
+        remove_index_rows(index, removed_rows)
+        if added:
+            index.add(new_vectors)  # pylint: disable=no-value-for-parameter
+    except RuntimeError as e:
+        logger.warning("Index of source '%s' cannot remove vectors (%s). Rebuilding it "
+                       "from the embeddings.", source_name, e)
+        all_vectors = np.asarray(
+            embed_texts([chunk["chunk_text"] for chunk in chunks], logger,
+                        cache=embedding_cache),
+            dtype="float32"
+        )
+        index_spec = (load_manifest(manifest_path, logger).get("index")
+                      or select_index_spec(len(all_vectors), index.d))
+        index = build_faiss_index(all_vectors, index_spec, logger)
+
+    replace_index_and_chunk_store(index, chunks, index_path, chunk_store_path, logger)
+    _extend_binary_stage(source_name, new_vectors, manifest_path, logger, removed_rows)
+    _update_manifest_size(source_name, index, manifest_path, logger)
+
+    logger.info("Updated source '%s': %d chunks added, %d removed (%d vectors).",
+                source_name, len(added), len(removed_rows), index.ntotal)
+    return len(added), len(removed_rows)
+
+
+def _source_paths(source_name):
+    """Return the index, chunk store and manifest paths of a source."""
+    return (
+        os.path.join(VECTOR_STORE_DIR, f"{source_name}_index.idx"),
+        os.path.join(VECTOR_STORE_DIR, f"{source_name}_chunks"),
+        os.path.join(VECTOR_STORE_DIR, f"{source_name}_manifest.json")
+    )
+
+
+def _unique_chunks(metadata, logger):
+    """Keep the first chunk of every id. Identical chunks of a document share their id."""
+    unique = {}
+    for chunk in metadata:
+        unique.setdefault(str(chunk["id"]), chunk)
+    if len(unique) < len(metadata):
+        logger.info("Skipped %d duplicate chunks.", len(metadata) - len(unique))
+    return list(unique.values())
+
+
+def _extend_binary_stage(source_name, new_vectors, manifest_path, logger, removed_rows=()):
+    """
+    Remove rows from and add new vectors to the binary first stage of a source,
+    if it has one.
+    """
+    binary_path = os.path.join(VECTOR_STORE_DIR, f"{source_name}_binary.idx")
+    vectors_path = os.path.join(VECTOR_STORE_DIR, f"{source_name}_vectors.npy")
+    if not os.path.exists(binary_path):
+        return
+
+    binary_index = load_binary_index(binary_path, logger)
+    vectors = load_vectors(vectors_path, logger)
+    thresholds = load_manifest(manifest_path, logger).get("binary", {}).get("thresholds")
+    if binary_index is None or vectors is None or thresholds is None:
+        logger.warning("Binary stage of source '%s' is incomplete and was not extended. "
+                       "Run a full indexing with --binary.", source_name)
+        return
+
+    remove_index_rows(binary_index, removed_rows)
+    codes = binarize(new_vectors, np.asarray(thresholds))
+    binary_index.add(codes)  # pylint: disable=no-value-for-parameter
+    tmp_binary_path = f"{binary_path}.tmp"
+    save_binary_index(binary_index, tmp_binary_path, logger)
+    os.replace(tmp_binary_path, binary_path)
+    # np.save appends .npy to paths not ending with it.
+    tmp_vectors_path = f"{vectors_path[:-len('.npy')]}.tmp.npy"
+    save_vectors(np.concatenate([np.delete(vectors, list(removed_rows), axis=0), new_vectors]),
+                 tmp_vectors_path, logger)
+    os.replace(tmp_vectors_path, vectors_path)
+
+
+def _update_manifest_size(source_name, index, manifest_path, logger):
+    """Record the new vector count of an extended index in its manifest."""
+    manifest = load_manifest(manifest_path, logger)
+    index_spec = manifest.get("index", {})
+    if not index_spec:
+        return
+    index_spec["n_vectors"] = index.ntotal
+    if select_index_spec(index.ntotal, index.d)["type"] != index_spec.get("type"):
+        logger.warning("Source '%s' now holds %d vectors, a full rebuild would choose "
+                       "a different index type.", source_name, index.ntotal)
+    save_manifest(manifest, manifest_path, logger)
 
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--unified", action="store_true",
+                        help="Store all the sources in a single index.")
+    parser.add_argument("--sources", nargs="+", choices=list(SOURCE_CHUNK_FILES),
+                        help="Build the index of each of these sources, or with --unified "
+                             "the sources to store in the unified index (default: all).")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Embedding processes and parallel index builds used with "
+                             "--sources. Defaults to the CPU count.")
+    parser.add_argument("--target-latency-ms", type=float, default=TARGET_LATENCY_MS,
+                        help="Target search latency used to choose the index type.")
+    parser.add_argument("--index-type", default="auto", choices=INDEX_TYPES,
+                        help="Force the index type instead of choosing it from the corpus.")
+    parser.add_argument("--compression", default="none", choices=COMPRESSIONS,
+                        help="Store compressed vectors to reduce the index memory.")
+    parser.add_argument("--evaluate", action="store_true",
+                        help="Report recall@k, bytes per vector and latency of the built index.")
+    parser.add_argument("--binary", action="store_true",
+                        help="Also store a binary first-stage index for two-stage search.")
+    parser.add_argument("--add-chunks", nargs="+", metavar="CHUNK_FILE",
+                        help="Add the chunks of these processed files to an existing index.")
+    parser.add_argument("--sync", action="store_true",
+                        help="Update the index of --source to its current chunk files, adding "
+                             "new chunks and removing deleted ones.")
+    parser.add_argument("--source", default="plugins",
+                        help="Source whose index is extended with --add-chunks or --sync.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Embed the chunks batch by batch from their JSONL files into a "
+                             "memory-mapped vector file, keeping the memory flat.")
+    parser.add_argument("--retrain", action="store_true",
+                        help="Train the index again instead of reusing the previous training.")
+    parser.add_argument("--no-embedding-cache", action="store_true",
+                        help="Embed every chunk instead of reusing the cached embeddings.")
+    args = parser.parse_args()
+
     logger_factory = LoggerFactory.instance()
     logger = logger_factory.get_logger("embedding-storage")
+    embedding_cache = None if args.no_embedding_cache else EmbeddingCache(MODEL_NAME, logger)
 
-    run_indexing(nlist=N_LIST, nprobe=N_PROBE, logger=logger)
+    if args.add_chunks:
+        add_chunks_to_index(args.source, args.add_chunks, logger,
+                            embedding_cache=embedding_cache)
+    elif args.sync:
+        sync_source_index(args.source, SOURCE_CHUNK_FILES.get(args.source, []), logger,
+                          embedding_cache=embedding_cache)
+    elif args.unified:
+        run_unified_indexing(args.sources or list(SOURCE_CHUNK_FILES), logger,
+                             target_latency_ms=args.target_latency_ms,
+                             index_type=args.index_type, compression=args.compression,
+                             evaluate=args.evaluate, embedding_cache=embedding_cache,
+                             reuse_training=not args.retrain)
+    elif args.sources:
+        run_multi_source_indexing(args.sources, logger, target_latency_ms=args.target_latency_ms,
+                                  index_type=args.index_type, compression=args.compression,
+                                  evaluate=args.evaluate, binary=args.binary,
+                                  embedding_cache=embedding_cache,
+                                  reuse_training=not args.retrain, processes=args.processes)
+    elif args.stream:
+        run_streaming_indexing(logger, target_latency_ms=args.target_latency_ms,
+                               index_type=args.index_type, compression=args.compression,
+                               evaluate=args.evaluate, binary=args.binary,
+                               embedding_cache=embedding_cache,
+                               reuse_training=not args.retrain)
+    else:
+        run_indexing(logger, target_latency_ms=args.target_latency_ms,
+                     index_type=args.index_type, compression=args.compression,
+                     evaluate=args.evaluate, binary=args.binary,
+                     embedding_cache=embedding_cache, reuse_training=not args.retrain)
 
 if __name__ == "__main__":
     main()
@@ -4,12 +4,18 @@ Handles persistence and logging for vector search storage.
 """
 
 import os
+import json
 import pickle
+import shutil
 import faiss
+import numpy as np
+from rag.vectorstore.chunk_store import ChunkStore, write_chunk_store
 
 VECTOR_STORE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "embeddings")
 os.makedirs(VECTOR_STORE_DIR, exist_ok=True)
 
+UNIFIED_SOURCE_NAME = "unified"
+
 def save_faiss_index(index, path, logger):
     """
     Save a FAISS index to the specified path.
@@ -25,26 +31,133 @@ def save_faiss_index(index, path, logger):
     except (OSError) as e:
         logger.error("Failed to save FAISS index to %s: %s", path, e)
 
-def load_faiss_index(path, logger):
+def load_faiss_index(path, logger, mmap=False):
     """
     Load a FAISS index from a specified path.
 
     Args:
         path (str): File path to load the index from.
         logger (logging.Logger): Logger for status or error messages.
+        mmap (bool, optional): Whether to memory-map the index file read-only instead
+            of copying it into the process heap. Defaults to False.
 
     Returns:
         faiss.Index | None: The loaded FAISS index, or None if loading fails.
     """
     try:
         logger.info("Loading FAISS index from %s...", path)
-        index = faiss.read_index(path)
+        index = read_faiss_index_mmap(path) if mmap else faiss.read_index(path)
         logger.info("FAISS index loaded successfully.")
         return index
-    except (OSError, FileNotFoundError) as e:
+    except (OSError, FileNotFoundError, RuntimeError) as e:
+        # FAISS reports unreadable files as RuntimeError.
         logger.error("File error while loading FAISS index from %s: %s", path, e)
     return None
 
+def read_faiss_index_mmap(path):
+    """
+    Read a FAISS index memory-mapping its vector data, so that processes loading
+    the same file share a single copy of it in the OS page cache.
+
+    Flat-code indexes (Flat, HNSW, SQ, PQ) are mapped with IO_FLAG_MMAP_IFC, while
+    IVF indexes only support IO_FLAG_MMAP on their inverted lists: the combined
+    flags are tried first, falling back to IO_FLAG_MMAP when FAISS rejects them.
+
+    Args:
+        path (str): File path to load the index from.
+
+    Returns:
+        faiss.Index: The memory-mapped, read-only FAISS index.
+    """
+    try:
+        return faiss.read_index(
+            path,
+            faiss.IO_FLAG_MMAP | faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+        )
+    except RuntimeError:
+        return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+
+def apply_search_params(index, search_params, logger):
+    """
+    Apply search-time parameters (e.g. nprobe for IVF, efSearch for HNSW) to an index.
+
+    Args:
+        index (faiss.Index): The FAISS index to configure.
+        search_params (dict): Parameter name -> value, as understood by faiss.ParameterSpace.
+        logger (logging.Logger): Logger for status or error messages.
+    """
+    parameter_space = faiss.ParameterSpace()
+    for name, value in search_params.items():
+        try:
+            parameter_space.set_index_parameter(index, name, value)
+        except RuntimeError as e:
+            logger.error("Cannot set search parameter %s=%s on the index: %s", name, value, e)
+
+def save_binary_index(index, path, logger):
+    """
+    Save a FAISS binary index to the specified path.
+
+    Args:
+        index (faiss.IndexBinary): The binary index to save.
+        path (str): File path to save the index.
+        logger (logging.Logger): Logger for status or error messages.
+    """
+    try:
+        faiss.write_index_binary(index, path)
+        logger.info("FAISS binary index saved to %s", path)
+    except (OSError, RuntimeError) as e:
+        logger.error("Failed to save FAISS binary index to %s: %s", path, e)
+
+def load_binary_index(path, logger):
+    """
+    Load a FAISS binary index from a specified path.
+
+    Args:
+        path (str): File path to load the index from.
+        logger (logging.Logger): Logger for status or error messages.
+
+    Returns:
+        faiss.IndexBinary | None: The loaded binary index, or None if loading fails.
+    """
+    try:
+        logger.info("Loading FAISS binary index from %s...", path)
+        return faiss.read_index_binary(path)
+    except (OSError, RuntimeError) as e:
+        logger.error("File error while loading FAISS binary index from %s: %s", path, e)
+    return None
+
+def save_vectors(vectors, path, logger):
+    """
+    Save the float vectors of an index, for rescoring, as a .npy file.
+
+    Args:
+        vectors (np.ndarray): 2D float32 array of the indexed vectors.
+        path (str): File path to save the vectors.
+        logger (logging.Logger): Logger for status or error messages.
+    """
+    try:
+        np.save(path, vectors)
+        logger.info("Vectors saved to %s", path)
+    except OSError as e:
+        logger.error("Failed to save vectors to %s: %s", path, e)
+
+def load_vectors(path, logger):
+    """
+    Memory-map the float vectors saved with save_vectors.
+
+    Args:
+        path (str): File path to load the vectors from.
+        logger (logging.Logger): Logger for status or error messages.
+
+    Returns:
+        np.ndarray | None: The read-only, memory-mapped vectors, or None if loading fails.
+    """
+    try:
+        return np.load(path, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        logger.error("Failed to load vectors from %s - %s", path, e)
+    return None
+
 def save_metadata(metadata, path, logger):
     """
     Save metadata to a pickle file.
@@ -83,3 +196,116 @@ def load_metadata(path, logger):
     except (OSError, pickle.UnpicklingError) as e:
         logger.error("Failed to load metadata from %s - %s", path, e)
     return None
+
+def save_chunk_store(metadata, path, logger):
+    """
+    Save the chunk metadata list as a columnar chunk store.
+
+    Args:
+        metadata (list[dict]): Chunks with id, chunk_text, metadata and code_blocks.
+        path (str): Directory to write the chunk store to.
+        logger (logging.Logger): Logger for status or error messages.
+    """
+    try:
+        write_chunk_store(metadata, path)
+        logger.info("Chunk store with %d chunks saved to %s", len(metadata), path)
+    except (OSError, TypeError, KeyError) as e:
+        logger.error("Failed to save chunk store to %s: %s", path, e)
+
+def staging_chunk_store_path(chunk_store_path):
+    """Return the directory a chunk store is written to before it replaces chunk_store_path."""
+    return f"{chunk_store_path}.tmp"
+
+
+def replace_index_and_chunk_store(index, chunks, index_path, chunk_store_path, logger):
+    """
+    Replace the FAISS index and the chunk store of a source. Both are written next
+    to the current files and only moved into place once both are written, so that
+    a failure leaves the previous index and chunk store, whose rows still match.
+    The error of a failed write is raised once the partial files are removed.
+
+    Args:
+        index (faiss.Index): The FAISS index to save.
+        chunks (list[dict] | None): Chunks with id, chunk_text, metadata and
+            code_blocks, or None when the chunk store was already written to
+            staging_chunk_store_path(chunk_store_path), e.g. streamed by a
+            ChunkStoreWriter.
+        index_path (str): File path of the index.
+        chunk_store_path (str): Directory of the chunk store.
+        logger (logging.Logger): Logger for status messages.
+    """
+    tmp_index_path = f"{index_path}.tmp"
+    tmp_store_path = staging_chunk_store_path(chunk_store_path)
+    try:
+        faiss.write_index(index, tmp_index_path)
+        if chunks is not None:
+            write_chunk_store(chunks, tmp_store_path)
+    except (OSError, RuntimeError, TypeError, KeyError):
+        if os.path.exists(tmp_index_path):
+            os.remove(tmp_index_path)
+        shutil.rmtree(tmp_store_path, ignore_errors=True)
+        raise
+
+    os.makedirs(chunk_store_path, exist_ok=True)
+    for name in os.listdir(tmp_store_path):
+        os.replace(os.path.join(tmp_store_path, name), os.path.join(chunk_store_path, name))
+    os.rmdir(tmp_store_path)
+    os.replace(tmp_index_path, index_path)
+    logger.info("Index and chunk store with %d chunks saved to %s and %s",
+                index.ntotal, index_path, chunk_store_path)
+
+def load_chunk_store(path, logger):
+    """
+    Open a memory-mapped chunk store.
+
+    Args:
+        path (str): Directory of the chunk store.
+        logger (logging.Logger): Logger for status or error messages.
+
+    Returns:
+        ChunkStore | None: The opened chunk store, or None if opening fails.
+    """
+    try:
+        logger.info("Opening chunk store %s...", path)
+        store = ChunkStore.open(path)
+        logger.info("Chunk store opened with %d chunks.", len(store))
+        return store
+    except (OSError, ValueError) as e:
+        logger.error("Failed to open chunk store %s - %s", path, e)
+    return None
+
+def save_manifest(manifest, path, logger):
+    """
+    Save the manifest describing an index (e.g. the ID ranges of its sources) as JSON.
+
+    Args:
+        manifest (dict): JSON-serializable description of the index.
+        path (str): File path to save the manifest.
+        logger (logging.Logger): Logger for status or error messages.
+    """
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info("Index manifest saved to %s", path)
+    except (OSError, TypeError) as e:
+        logger.error("Failed to save index manifest to %s: %s", path, e)
+
+def load_manifest(path, logger):
+    """
+    Load the manifest of an index. Indexes built without a manifest get an empty one.
+
+    Args:
+        path (str): File path to load the manifest from.
+        logger (logging.Logger): Logger for status or error messages.
+
+    Returns:
+        dict: The manifest, empty if the file is missing or invalid.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error("Failed to load index manifest from %s - %s", path, e)
+    return {}
@@ -2,13 +2,14 @@
 
 import pytest
 from fastapi import FastAPI
-from api.routes.chatbot import router
+from api.routes.chatbot import require_ready, router
 
 @pytest.fixture
 def fastapi_app() -> FastAPI:
     """Fixture to create FastAPI app instance with routes."""
     app = FastAPI()
     app.include_router(router)
+    app.dependency_overrides[require_ready] = lambda: None
     return app
 
 @pytest.fixture
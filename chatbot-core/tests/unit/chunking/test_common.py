@@ -7,6 +7,7 @@ from data.chunking.chunking_utils import (
     save_chunks,
     read_json_file,
     build_chunk_dict,
+    make_chunk_id,
     get_text_splitter
 )
 
@@ -94,6 +95,19 @@ def test_build_chunk_dict_generates_correct_structure():
     assert chunk["code_blocks"] == code_blocks
 
 
+def test_build_chunk_dict_ids_are_deterministic():
+    """Test that the same chunk always gets the same id, and a changed one a new id."""
+    metadata = {"data_source": "jenkins_documentation", "title": "Pipeline"}
+
+    chunk = build_chunk_dict("some text", metadata, ["code1"])
+
+    assert chunk["id"] == build_chunk_dict("some text", dict(metadata), ["code1"])["id"]
+    assert chunk["id"] == make_chunk_id("some text", metadata, ["code1"])
+    assert chunk["id"] != make_chunk_id("other text", metadata, ["code1"])
+    assert chunk["id"] != make_chunk_id("some text", {**metadata, "title": "Other"}, ["code1"])
+    assert chunk["id"] != make_chunk_id("some text", metadata, ["code2"])
+
+
 # pylint: disable=protected-access
 def test_get_text_splitter_returns_splitter():
     """Test get_text_splitter returns configured splitter."""
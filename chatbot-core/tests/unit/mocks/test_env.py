@@ -1,15 +1,19 @@
 """Fixtures for unit tests."""
 
+import json
+import os
 import pytest
 from fastapi import FastAPI
 from sentence_transformers import SentenceTransformer
-from api.routes.chatbot import router
+from api.routes.chatbot import require_ready, router
+from rag.retriever import index_registry as registry_module
 
 @pytest.fixture
 def fastapi_app() -> FastAPI:
-    """Fixture to create FastAPI app instance with routes."""
+    """Fixture to create FastAPI app instance with routes, as a ready worker."""
     app = FastAPI()
     app.include_router(router)
+    app.dependency_overrides[require_ready] = lambda: None
     return app
 
 @pytest.fixture
@@ -60,7 +64,7 @@ def mock_get_chatbot_reply(mocker):
 @pytest.fixture
 def mock_sentence_transformer(mocker):
     """Mock the SentenceTransformer class constructor."""
-    return mocker.patch("rag.embedding.embedding_utils.SentenceTransformer")
+    return mocker.patch("sentence_transformers.SentenceTransformer")
 
 @pytest.fixture
 def mock_model_encode(mocker):
@@ -79,9 +83,9 @@ def mock_load_embedding_model(mocker):
     return mocker.patch("rag.embedding.embed_chunks.load_embedding_model")
 
 @pytest.fixture
-def mock_embed_documents(mocker):
-    """Mock embed_documents function."""
-    return mocker.patch("rag.embedding.embed_chunks.embed_documents")
+def mock_embed_documents_bucketed(mocker):
+    """Mock embed_documents_bucketed function."""
+    return mocker.patch("rag.embedding.embed_chunks.embed_documents_bucketed")
 
 @pytest.fixture
 def patched_chunk_files(mocker):
@@ -102,6 +106,59 @@ def mock_save_faiss_index(mocker):
     return mocker.patch("rag.vectorstore.store_embeddings.save_faiss_index")
 
 @pytest.fixture
-def mock_save_metadata(mocker):
-    """Mock save_metadata function."""
-    return mocker.patch("rag.vectorstore.store_embeddings.save_metadata")
+def mock_save_chunk_store(mocker):
+    """Mock save_chunk_store function."""
+    return mocker.patch("rag.vectorstore.store_embeddings.save_chunk_store")
+
+@pytest.fixture
+def source_files(mocker, tmp_path):
+    """Point the index registry to a temporary vector store with one source."""
+    mocker.patch.object(registry_module, "VECTOR_STORE_DIR", str(tmp_path))
+    index_path = os.path.join(str(tmp_path), "plugins_index.idx")
+    metadata_path = os.path.join(str(tmp_path), "plugins_metadata.pkl")
+    with open(index_path, "wb") as f:
+        f.write(b"index")
+    with open(metadata_path, "wb") as f:
+        f.write(b"metadata")
+    return index_path, metadata_path
+
+@pytest.fixture
+def mock_loaders(mocker):
+    """Mock the FAISS index and metadata loaders."""
+    mock_load_index = mocker.patch(
+        "rag.retriever.index_registry.load_faiss_index",
+        side_effect=lambda path, logger, mmap=False: mocker.Mock(name="index")
+    )
+    mock_load_metadata = mocker.patch(
+        "rag.retriever.index_registry.load_metadata",
+        side_effect=lambda path, logger: [{"id": "doc1"}]
+    )
+    return mock_load_index, mock_load_metadata
+
+@pytest.fixture
+def chunk_file(tmp_path, monkeypatch):
+    """A JSONL chunk file, with the retriv indexes saved under tmp_path."""
+    monkeypatch.setenv("RETRIV_BASE_PATH", str(tmp_path / "retriv"))
+    path = tmp_path / "chunks.jsonl"
+    path.write_text("\n".join(json.dumps(chunk) for chunk in [
+        {"id": "a", "chunk_text": "Install the plugin from the update center"},
+        {"id": "b", "chunk_text": "Configure the pipeline agent"}
+    ]) + "\n", encoding="utf-8")
+    return path
+
+@pytest.fixture
+def mock_sparse_retriever(mocker):
+    """Mock the SparseRetriever class, which the BM25 indexer imports on use."""
+    return mocker.patch("retriv.SparseRetriever")
+
+CHUNK_SEMANTIC = {"id": "s1", "chunk_text": "semantic"}
+CHUNK_KEYWORD = {"id": "k1", "chunk_text": "keyword"}
+
+@pytest.fixture
+def mock_searches(mocker):
+    """Mock the semantic and keyword searches of a source, for retrieve_documents."""
+    semantic = mocker.patch("api.tools.utils.get_relevant_documents",
+                            return_value=([CHUNK_SEMANTIC], [0.4]))
+    keyword = mocker.patch("api.tools.utils.perform_keyword_search_from_source",
+                           return_value=[{"chunk": CHUNK_KEYWORD, "score": 3.2}])
+    return semantic, keyword
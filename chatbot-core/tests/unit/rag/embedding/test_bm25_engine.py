@@ -0,0 +1,140 @@
+"""Unit tests for the in-tree BM25 engine."""
+
+import math
+import pytest
+from rag.embedding.bm25_engine import Analyzer, BM25Engine
+
+SETTINGS = {"stemmer": None, "stopwords": ["the", "a"]}
+DOCS = [
+    {"id": "a", "text": "Install the plugin"},
+    {"id": "b", "text": "plugin plugin pipeline"},
+    {"id": "c", "text": "Configure a pipeline agent"},
+    {"id": "d", "text": "Restart the controller"}
+]
+
+
+# pylint: disable=too-many-arguments
+# pylint: disable=too-many-positional-arguments
+def bm25(tf, df, doc_len, n_docs=4, avg_len=2.5, k1=1.2, b=0.75):
+    """The retriv BM25 score of a term in a document."""
+    idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+    return idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len / avg_len))
+
+
+def make_engine(tmp_path, prune=True, docs=None):
+    """An engine indexing docs, saved under tmp_path."""
+    engine = BM25Engine(index_name="test", prune=prune, index_dir=str(tmp_path), **SETTINGS)
+    return engine.index(docs or DOCS)
+
+
+def test_analyzer_normalizes_and_removes_stopwords():
+    """Texts are lowercased, stripped of punctuation and of stopwords."""
+    analyzer = Analyzer(**SETTINGS)
+
+    assert analyzer("The Plugin's R&D (U.S.A.) setup!") == [
+        "plugin", "s", "r", "and", "d", "usa", "setup"
+    ]
+
+
+def test_analyzer_stems_with_snowball():
+    """The english stemmer reduces the inflected forms to the same term."""
+    analyzer = Analyzer(stemmer="english", stopwords=None)
+
+    assert analyzer("installing installed") == ["instal", "instal"]
+
+
+def test_analyzer_downloads_missing_nltk_stopwords(mocker):
+    """A language name loads the NLTK stopwords, downloading the corpus when missing."""
+    nltk_stopwords = mocker.patch("rag.embedding.bm25_engine.nltk_stopwords")
+    nltk_stopwords.words.side_effect = [LookupError("Resource stopwords not found."),
+                                        ["the", "a"]]
+    download = mocker.patch("rag.embedding.bm25_engine.nltk.download")
+
+    analyzer = Analyzer(stemmer=None, stopwords="english")
+
+    download.assert_called_once_with("stopwords", quiet=True)
+    nltk_stopwords.words.assert_called_with("english")
+    assert analyzer("The plugin") == ["plugin"]
+
+
+def test_search_returns_bm25_scores(tmp_path):
+    """The scores are the retriv BM25 scores, best first."""
+    results = make_engine(tmp_path).search("plugin pipeline", cutoff=10)
+
+    assert list(results) == ["b", "a", "c"]
+    assert results["b"] == pytest.approx(bm25(2, 2, 3) + bm25(1, 2, 3))
+    assert results["a"] == pytest.approx(bm25(1, 2, 2))
+    assert results["c"] == pytest.approx(bm25(1, 2, 3))
+
+
+def test_search_applies_cutoff_and_ignores_unknown_terms(tmp_path):
+    """Only the cutoff best documents are returned; unknown terms score nothing."""
+    engine = make_engine(tmp_path)
+
+    assert list(engine.search("plugin jenkins", cutoff=1)) == ["b"]
+    assert not engine.search("jenkins", cutoff=5)
+    assert engine.search("plugin", return_docs=True, cutoff=1) == [
+        {"id": "b", "score": pytest.approx(bm25(2, 2, 3))}
+    ]
+
+
+def test_maxscore_pruning_matches_exhaustive_search(tmp_path):
+    """Pruned searches return the same documents and scores."""
+    docs = [{"id": str(i), "text": " ".join(f"w{(i * j) % 23}" for j in range(1, 4 + i % 7))}
+            for i in range(200)]
+    pruned = make_engine(tmp_path / "pruned", prune=True, docs=docs)
+    exhaustive = make_engine(tmp_path / "exhaustive", prune=False, docs=docs)
+
+    for query in ["w1 w2 w3", "w0 w5 w5 w17", "w22", "w4 w8 w15 w16 w23"]:
+        expected = exhaustive.search(query, cutoff=5)
+        results = pruned.search(query, cutoff=5)
+        assert list(results.values()) == pytest.approx(list(expected.values()))
+
+
+def test_msearch_matches_search(tmp_path):
+    """A batch of queries gives the results of the single searches."""
+    engine = make_engine(tmp_path)
+    queries = [{"id": "q1", "text": "plugin"}, {"id": "q2", "text": "pipeline agent"},
+               {"id": "q3", "text": "jenkins"}]
+
+    results = engine.msearch(queries, cutoff=2)
+
+    assert list(results) == ["q1", "q2", "q3"]
+    for query in queries:
+        expected = engine.search(query["text"], cutoff=2)
+        assert list(results[query["id"]]) == list(expected)
+        assert list(results[query["id"]].values()) == pytest.approx(list(expected.values()))
+
+
+def test_load_memory_maps_saved_index(tmp_path):
+    """A loaded index memory-maps its postings and returns the same results."""
+    expected = make_engine(tmp_path).search("plugin pipeline", cutoff=10)
+
+    loaded = BM25Engine.load("test", index_dir=str(tmp_path))
+
+    assert loaded.search("plugin pipeline", cutoff=10) == pytest.approx(expected)
+    assert loaded._impacts.base is not None  # pylint: disable=protected-access
+
+
+def test_index_file_uses_callback(tmp_path):
+    """index_file maps every JSONL line to a document with the callback."""
+    path = tmp_path / "chunks.jsonl"
+    path.write_text('{"id": "x", "chunk_text": "pipeline"}\n\n', encoding="utf-8")
+    engine = BM25Engine(index_name="file", index_dir=str(tmp_path), **SETTINGS)
+
+    engine.index_file(str(path), callback=lambda doc: {"id": doc["id"],
+                                                       "text": doc["chunk_text"]})
+
+    assert list(engine.search("pipeline")) == ["x"]
+    assert (tmp_path / "file" / "meta.json").exists()
+
+
+@pytest.mark.parametrize("prune", [True, False])
+def test_search_with_doc_mask_scores_only_selected_documents(tmp_path, prune):
+    """A masked search returns the best selected documents, whatever the cutoff."""
+    engine = make_engine(tmp_path, prune=prune)
+
+    results = engine.search("plugin pipeline", cutoff=1, doc_mask=engine.doc_mask(["c", "x"]))
+
+    assert results == {"c": pytest.approx(bm25(1, 2, 3))}
+    assert not engine.search("plugin", doc_mask=engine.doc_mask(["d"]))
@@ -0,0 +1,112 @@
+"""Unit tests for the BM25 indexer and its saved fingerprints."""
+
+import json
+from rag.embedding import bm25_indexer
+from rag.embedding.bm25_indexer import BM25Indexer, compute_fingerprint
+
+
+def make_indexer(path, mocker):
+    """An indexer of a single index built from path."""
+    return BM25Indexer([{"index_name": "test", "file_path": str(path)}], mocker.Mock())
+
+
+def test_compute_fingerprint_changes_with_content_and_settings(chunk_file, mocker):
+    """The fingerprint depends on the file content and the retriever settings."""
+    logger = mocker.Mock()
+    fingerprint = compute_fingerprint(str(chunk_file), logger)
+
+    assert compute_fingerprint(str(chunk_file), logger) == fingerprint
+    mocker.patch.dict(bm25_indexer.RETRIEVER_SETTINGS, {"stemmer": "porter"})
+    assert compute_fingerprint(str(chunk_file), logger) != fingerprint
+
+
+def test_compute_fingerprint_missing_file(tmp_path, mocker):
+    """A missing file has no fingerprint."""
+    logger = mocker.Mock()
+
+    assert compute_fingerprint(str(tmp_path / "missing.jsonl"), logger) is None
+    logger.error.assert_called_once()
+
+
+def test_build_loads_saved_index_when_unchanged(chunk_file, mock_sparse_retriever, mocker):
+    """The first build indexes the file, the next one loads the saved index."""
+    first = make_indexer(chunk_file, mocker)
+    assert first.build()["built"] == 1
+    mock_sparse_retriever.return_value.index_file.assert_called_once()
+    mock_sparse_retriever.load.assert_not_called()
+
+    second = make_indexer(chunk_file, mocker)
+    stats = second.build()
+
+    assert stats["loaded"] == 1
+    assert stats["built"] == 0
+    mock_sparse_retriever.return_value.index_file.assert_called_once()
+    mock_sparse_retriever.load.assert_called_once_with("test")
+    assert second.get("test") is mock_sparse_retriever.load.return_value
+
+
+def test_build_rebuilds_when_file_changes(chunk_file, mock_sparse_retriever, mocker):
+    """A changed input file is indexed again."""
+    make_indexer(chunk_file, mocker).build()
+    with open(chunk_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "c", "chunk_text": "Restart the controller"}) + "\n")
+
+    stats = make_indexer(chunk_file, mocker).build()
+
+    assert stats["built"] == 1
+    assert mock_sparse_retriever.return_value.index_file.call_count == 2
+    mock_sparse_retriever.load.assert_not_called()
+
+
+def test_build_rebuilds_when_saved_index_is_unreadable(chunk_file, mock_sparse_retriever,
+                                                       mocker):
+    """An index that matches its fingerprint but fails to load is indexed again."""
+    make_indexer(chunk_file, mocker).build()
+    mock_sparse_retriever.load.side_effect = FileNotFoundError("sr_state.npz")
+
+    indexer = make_indexer(chunk_file, mocker)
+    stats = indexer.build()
+
+    assert stats["built"] == 1
+    assert indexer.retrievers["test"] is mock_sparse_retriever.return_value.index_file.return_value
+
+
+def test_build_does_not_save_fingerprint_of_failed_index(chunk_file, mock_sparse_retriever,
+                                                         mocker):
+    """A failed indexing leaves no fingerprint, so the next build tries again."""
+    mock_sparse_retriever.return_value.index_file.side_effect = ValueError("bad chunk")
+    make_indexer(chunk_file, mocker).build()
+    mock_sparse_retriever.return_value.index_file.side_effect = None
+
+    stats = make_indexer(chunk_file, mocker).build()
+
+    assert stats["built"] == 1
+    mock_sparse_retriever.load.assert_not_called()
+
+
+def test_build_serves_saved_index_when_file_is_missing(chunk_file, mock_sparse_retriever,
+                                                       mocker):
+    """Without its input file, the saved index is still loaded and nothing is indexed."""
+    make_indexer(chunk_file, mocker).build()
+    chunk_file.unlink()
+
+    indexer = make_indexer(chunk_file, mocker)
+    stats = indexer.build()
+
+    assert (stats["loaded"], stats["built"]) == (1, 0)
+    assert mock_sparse_retriever.return_value.index_file.call_count == 1
+    assert "test" in indexer.retrievers
+
+
+def test_build_native_engine_saves_and_loads_index(chunk_file, tmp_path, mocker):
+    """The native engine indexes the file once, then loads the saved index."""
+    mocker.patch("rag.embedding.bm25_engine.BM25_INDEX_DIR", str(tmp_path / "bm25"))
+    mocker.patch.dict(bm25_indexer.RETRIEVER_SETTINGS, {"stopwords": ["the"]})
+    configs = [{"index_name": "test", "file_path": str(chunk_file)}]
+
+    first = BM25Indexer(configs, mocker.Mock(), engine="native")
+    assert first.build()["built"] == 1
+    second = BM25Indexer(configs, mocker.Mock(), engine="native")
+    assert second.build()["loaded"] == 1
+
+    assert list(second.get("test").search("plugin")) == ["a"]
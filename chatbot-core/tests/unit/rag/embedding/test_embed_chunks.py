@@ -1,19 +1,27 @@
 """Unit Tests for embed_chunks module."""
 
 import json
-from rag.embedding.embed_chunks import embed_chunks, collect_all_chunks, load_chunks_from_file
+import numpy as np
+from rag.embedding.embed_chunks import (
+    embed_chunks,
+    collect_all_chunks,
+    iter_chunks,
+    iter_chunks_from_file,
+    iter_embedded_batches,
+    load_chunks_from_file
+)
 
 def test_embed_chunks_valid_chunks(
     mock_collect_all_chunks,
     mock_load_embedding_model,
-    mock_embed_documents,
+    mock_embed_documents_bucketed,
     mocker
 ):
     """Testing that embed_chunks processes valid chunks correctly."""
     mock_collect_all_chunks.return_value = get_mock_chunks("valid")
     mock_model = mocker.Mock()
     mock_load_embedding_model.return_value = mock_model
-    mock_embed_documents.return_value = ["vec1", "vec2"]
+    mock_embed_documents_bucketed.return_value = ["vec1", "vec2"]
 
     mock_logger = mocker.Mock()
 
@@ -25,7 +33,7 @@ def test_embed_chunks_valid_chunks(
     assert metadata[1]["code_blocks"] == ["some code"]
 
     mock_load_embedding_model.assert_called_once()
-    mock_embed_documents.assert_called_once_with(
+    mock_embed_documents_bucketed.assert_called_once_with(
         ["Chunk text 1", "Chunk text 2"],
         mock_model,
         mock_logger
@@ -35,14 +43,14 @@ def test_embed_chunks_valid_chunks(
 def test_embed_chunks_skips_invalid_chunks(
     mock_collect_all_chunks,
     mock_load_embedding_model,
-    mock_embed_documents,
+    mock_embed_documents_bucketed,
     mocker
 ):
     """Testing that embed_chunks skips invalid chunks and logs warnings."""
     mock_collect_all_chunks.return_value = get_mock_chunks("invalid")
     mock_model = mocker.Mock()
     mock_load_embedding_model.return_value = mock_model
-    mock_embed_documents.return_value = ["vec3"]
+    mock_embed_documents_bucketed.return_value = ["vec3"]
 
     mock_logger = mocker.Mock()
 
@@ -52,7 +60,7 @@ def test_embed_chunks_skips_invalid_chunks(
     assert len(metadata) == 1
     assert metadata[0]["id"] == "3"
 
-    mock_embed_documents.assert_called_once_with(
+    mock_embed_documents_bucketed.assert_called_once_with(
         ["Good text"],
         mock_model,
         mock_logger
@@ -128,7 +136,7 @@ def test_load_chunks_from_file_json_decode_error(mocker):
 def test_embed_chunks_with_all_invalid_chunks(
     mock_collect_all_chunks,
     mock_load_embedding_model,
-    mock_embed_documents,
+    mock_embed_documents_bucketed,
     mocker
 ):
     """Test embed_chunks returns empty lists if all chunks are invalid."""
@@ -138,7 +146,7 @@ def test_embed_chunks_with_all_invalid_chunks(
 
     _, _ = embed_chunks(mock_logger)
 
-    mock_embed_documents.assert_called_once_with(
+    mock_embed_documents_bucketed.assert_called_once_with(
         [],
         mock_load_embedding_model.return_value,
         mock_logger
@@ -149,7 +157,7 @@ def test_embed_chunks_with_all_invalid_chunks(
 def test_embed_chunks_with_no_chunks(
     mock_collect_all_chunks,
     mock_load_embedding_model,
-    mock_embed_documents,
+    mock_embed_documents_bucketed,
     mocker
 ):
     """Test embed_chunks returns empty lists if no chunks are loaded."""
@@ -159,7 +167,7 @@ def test_embed_chunks_with_no_chunks(
 
     _, _ = embed_chunks(mock_logger)
 
-    mock_embed_documents.assert_called_once_with(
+    mock_embed_documents_bucketed.assert_called_once_with(
         [],
         mock_load_embedding_model.return_value,
         mock_logger
@@ -209,3 +217,95 @@ def get_mock_chunks(chunk_type: str):
             {"id": "2", "chunk_text": "", "metadata": {}}
         ]
     return []
+
+
+def test_embed_chunks_with_cache_skips_model_when_all_cached(
+    mock_collect_all_chunks,
+    mock_load_embedding_model,
+    mock_embed_documents_bucketed,
+    mocker
+):
+    """Test that the model is not loaded when the cache holds every chunk."""
+    mock_collect_all_chunks.return_value = get_mock_chunks("valid")
+    mock_cache = mocker.Mock()
+    mock_cache.embed.return_value = "cached vectors"
+
+    vectors, metadata = embed_chunks(mocker.Mock(), cache=mock_cache)
+
+    assert vectors == "cached vectors"
+    assert len(metadata) == 2
+    assert mock_cache.embed.call_args[0][0] == ["Chunk text 1", "Chunk text 2"]
+    mock_load_embedding_model.assert_not_called()
+    mock_embed_documents_bucketed.assert_not_called()
+
+
+def test_embed_chunks_with_cache_encodes_missing_chunks(
+    mock_collect_all_chunks,
+    mock_load_embedding_model,
+    mock_embed_documents_bucketed,
+    mocker
+):
+    """Test that the chunks missing from the cache are embedded by the model."""
+    mock_collect_all_chunks.return_value = get_mock_chunks("valid")
+    mock_model = mocker.Mock()
+    mock_load_embedding_model.return_value = mock_model
+    mock_embed_documents_bucketed.return_value = ["vec2"]
+    mock_cache = mocker.Mock()
+    mock_cache.embed.side_effect = lambda texts, encode: encode(texts[1:])
+    mock_logger = mocker.Mock()
+
+    vectors, _ = embed_chunks(mock_logger, cache=mock_cache)
+
+    assert vectors == ["vec2"]
+    mock_embed_documents_bucketed.assert_called_once_with(
+        ["Chunk text 2"], mock_model, mock_logger
+    )
+
+
+def _write_jsonl(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_iter_chunks_from_file_skips_malformed_lines(tmp_path, mocker):
+    """Test that a JSONL file is read line by line, skipping the lines that are not JSON."""
+    path = tmp_path / "chunks.jsonl"
+    _write_jsonl(path, [json.dumps({"id": "1"}), "{not json", "", json.dumps({"id": "2"})])
+    mock_logger = mocker.Mock()
+
+    chunks = list(iter_chunks_from_file(str(path), mock_logger))
+
+    assert chunks == [{"id": "1"}, {"id": "2"}]
+    mock_logger.warning.assert_called_once()
+
+
+def test_iter_chunks_prefers_jsonl_files(tmp_path, mocker):
+    """Test that the JSONL version of a file is streamed when it exists."""
+    mocker.patch("rag.embedding.embed_chunks.PROCESSED_DIR", str(tmp_path))
+    valid, invalid = get_mock_chunks("invalid")[2], get_mock_chunks("invalid")[0]
+    (tmp_path / "chunks_a.json").write_text(json.dumps([invalid]), encoding="utf-8")
+    _write_jsonl(tmp_path / "chunks_a.jsonl", [json.dumps(invalid), json.dumps(valid)])
+    (tmp_path / "chunks_b.json").write_text(json.dumps([valid]), encoding="utf-8")
+
+    chunks = list(iter_chunks(mocker.Mock(), ["chunks_a.json", "chunks_b.json"]))
+
+    assert [chunk["id"] for chunk in chunks] == ["3", "3"]
+    assert chunks[0] == {"id": "3", "chunk_text": "Good text",
+                         "metadata": valid["metadata"], "code_blocks": []}
+
+
+def test_iter_embedded_batches_loads_model_once(tmp_path, mocker, mock_load_embedding_model,
+                                                mock_embed_documents_bucketed):
+    """Test that the chunks are embedded in batches of the requested size."""
+    mocker.patch("rag.embedding.embed_chunks.PROCESSED_DIR", str(tmp_path))
+    _write_jsonl(tmp_path / "chunks.jsonl", [
+        json.dumps({"id": str(i), "chunk_text": f"text {i}", "metadata": {"title": "t"}})
+        for i in range(5)
+    ])
+    mock_embed_documents_bucketed.side_effect = lambda texts, *_: np.ones((len(texts), 4))
+
+    batches = list(iter_embedded_batches(mocker.Mock(), ["chunks.json"], batch_size=2))
+
+    assert [len(chunks) for _, chunks in batches] == [2, 2, 1]
+    assert all(vectors.dtype == np.float32 for vectors, _ in batches)
+    assert batches[2][1][0]["id"] == "4"
+    mock_load_embedding_model.assert_called_once()
@@ -0,0 +1,93 @@
+"""Unit Tests for embedding_cache module."""
+
+import numpy as np
+import pytest
+from rag.embedding.embedding_cache import EmbeddingCache, embedding_key
+
+MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def _fake_encode(texts):
+    """Return one deterministic 2-dimensional vector per text."""
+    return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_embedding_key_depends_on_model_and_text():
+    """Test that the key changes with the model and with the text."""
+    assert embedding_key(MODEL, "text") == embedding_key(MODEL, "text")
+    assert embedding_key(MODEL, "text") != embedding_key("other-model", "text")
+    assert embedding_key(MODEL, "text") != embedding_key(MODEL, "text ")
+    assert len(embedding_key(MODEL, "text")) == 32
+
+
+def test_embed_encodes_only_missing_texts(tmp_path, mocker):
+    """Test that cached texts are reused and duplicates encoded once."""
+    encode = mocker.Mock(side_effect=_fake_encode)
+    cache = EmbeddingCache(MODEL, mocker.Mock(), cache_dir=str(tmp_path))
+
+    cache.embed(["a", "bb"], encode)
+    vectors = cache.embed(["bb", "ccc", "a", "ccc"], encode)
+
+    assert encode.call_args_list[-1].args == (["ccc"],)
+    np.testing.assert_array_equal(vectors, [[2, 1], [3, 1], [1, 1], [3, 1]])
+    assert cache.stats == {"reused": 3, "encoded": 3}
+
+
+def test_embed_logs_reuse(tmp_path, mocker):
+    """Test that every call reports how many embeddings were reused."""
+    logger = mocker.Mock()
+    cache = EmbeddingCache(MODEL, logger, cache_dir=str(tmp_path))
+    cache.embed(["a", "b", "c"], _fake_encode)
+
+    cache.embed(["a", "b", "c", "d"], _fake_encode)
+
+    logger.info.assert_called_with(
+        "Embedding cache: reused %d of %d embeddings (%.1f%%), encoded %d.", 3, 4, 75.0, 1
+    )
+
+
+def test_cache_persists_across_builds(tmp_path, mocker):
+    """Test that a new cache instance reads the vectors written by a previous one."""
+    EmbeddingCache(MODEL, mocker.Mock(), cache_dir=str(tmp_path)).embed(["a", "bb"], _fake_encode)
+    encode = mocker.Mock(side_effect=_fake_encode)
+
+    cache = EmbeddingCache(MODEL, mocker.Mock(), cache_dir=str(tmp_path))
+    vectors = cache.embed(["bb", "a"], encode)
+
+    encode.assert_not_called()
+    assert len(cache) == 2
+    np.testing.assert_array_equal(vectors, [[2, 1], [1, 1]])
+
+
+def test_cache_ignores_rows_without_key(tmp_path, mocker):
+    """Test that vectors of an interrupted append are dropped on the next load."""
+    cache = EmbeddingCache(MODEL, mocker.Mock(), cache_dir=str(tmp_path))
+    cache.embed(["a"], _fake_encode)
+    with open(cache.vectors_path, "ab") as f:
+        f.write(np.ones(2, dtype=np.float32).tobytes())
+
+    cache = EmbeddingCache(MODEL, mocker.Mock(), cache_dir=str(tmp_path))
+    vectors = cache.embed(["a", "bb"], _fake_encode)
+
+    assert len(cache) == 2
+    np.testing.assert_array_equal(vectors, [[1, 1], [2, 1]])
+
+
+def test_embed_rejects_other_dimension(tmp_path, mocker):
+    """Test that vectors of another dimension are not mixed into the cache."""
+    cache = EmbeddingCache(MODEL, mocker.Mock(), cache_dir=str(tmp_path))
+    cache.embed(["a"], _fake_encode)
+
+    with pytest.raises(ValueError):
+        cache.embed(["b"], lambda texts: np.ones((len(texts), 3), dtype=np.float32))
+
+
+def test_embed_empty_texts(tmp_path, mocker):
+    """Test that embedding no text does not call the model."""
+    encode = mocker.Mock()
+    cache = EmbeddingCache(MODEL, mocker.Mock(), cache_dir=str(tmp_path))
+
+    vectors = cache.embed([], encode)
+
+    encode.assert_not_called()
+    assert vectors.shape == (0, 0)
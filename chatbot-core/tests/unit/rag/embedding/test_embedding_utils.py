@@ -1,7 +1,15 @@
 """Unit Tests for Embedding Utils."""
 
+import os
+import numpy as np
 import pytest
-from rag.embedding.embedding_utils import load_embedding_model, embed_documents
+from rag.embedding.embedding_utils import (
+    load_embedding_model,
+    embed_documents,
+    embed_documents_bucketed,
+    embed_documents_multi_process,
+    plan_length_batches
+)
 
 def test_load_embedding_model_logs_loading_message(mock_sentence_transformer, mocker):
     """Testing that load_embedding_model logs when loading model."""
@@ -38,3 +46,64 @@ def test_embed_documents_raises_typeerror_on_invalid_model(mocker):
 
     with pytest.raises(TypeError, match="Model must be a SentenceTransformer instance."):
         embed_documents(["chunk1"], model=invalid_model, logger=mocker.Mock())
+
+def test_load_embedding_model_rejects_unknown_backend(mocker):
+    """Testing that an unknown backend in the config fails with a clear error."""
+    with pytest.raises(ValueError, match="Unknown embedding backend 'tensorflow'"):
+        load_embedding_model("embedding-model-name", mocker.Mock(), backend="tensorflow")
+
+def test_embed_documents_multi_process_uses_a_pool(mock_model_encode, mocker):
+    """Testing that a pool of single-threaded workers embeds the documents."""
+    texts = [f"chunk {i}" for i in range(2000)]
+    omp_threads = []
+    mock_model_encode.start_multi_process_pool.side_effect = (
+        lambda devices: omp_threads.append(os.environ.get("OMP_NUM_THREADS")) or "pool"
+    )
+    mock_model_encode.encode_multi_process.return_value = "embeddings"
+
+    result = embed_documents_multi_process(texts, mock_model_encode, mocker.Mock(), processes=4)
+
+    assert result == "embeddings"
+    mock_model_encode.start_multi_process_pool.assert_called_once_with(["cpu"] * 4)
+    assert omp_threads == ["1"]
+    mock_model_encode.encode_multi_process.assert_called_once_with(texts, "pool", batch_size=32)
+    mock_model_encode.stop_multi_process_pool.assert_called_once_with("pool")
+
+def test_embed_documents_multi_process_small_input_stays_in_process(mock_model_encode, mocker):
+    """Testing that a few documents are embedded without starting worker processes."""
+    mock_model_encode.encode.return_value = ["embedding1"]
+
+    result = embed_documents_multi_process(["chunk1"], mock_model_encode, mocker.Mock(),
+                                           processes=4)
+
+    assert result == ["embedding1"]
+    mock_model_encode.start_multi_process_pool.assert_not_called()
+
+def test_plan_length_batches_fits_token_budget():
+    """Testing that batches group similar lengths and stay within the padded token budget."""
+    lengths = [300, 10, 12, 250, 11, 40, 10]
+
+    batches = plan_length_batches(lengths, max_batch_tokens=512, max_batch_size=3)
+
+    assert sorted(np.concatenate(batches).tolist()) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= 3
+        assert len(batch) == 1 or len(batch) * max(lengths[i] for i in batch) <= 512
+    assert [sorted(batch.tolist()) for batch in batches] == [[1, 4, 6], [2, 5], [3], [0]]
+
+def test_embed_documents_bucketed_deduplicates_and_keeps_order(mock_model_encode, mocker):
+    """Testing that identical texts are embedded once and the input order is restored."""
+    texts = ["a long text here", "short", "a long text here", "mid text"]
+    mock_model_encode.max_seq_length = 256
+    mock_model_encode.tokenizer = lambda batch, **_: {"input_ids": [t.split() for t in batch]}
+    mock_model_encode.encode.side_effect = lambda batch, **_: np.array(
+        [[len(text), 0] for text in batch], dtype="float32"
+    )
+
+    result = embed_documents_bucketed(texts, mock_model_encode, mocker.Mock(),
+                                      max_batch_tokens=4)
+
+    np.testing.assert_array_equal(result[:, 0], [len(text) for text in texts])
+    encoded = [text for call in mock_model_encode.encode.call_args_list for text in call[0][0]]
+    assert sorted(encoded) == ["a long text here", "mid text", "short"]
+    assert mock_model_encode.encode.call_args_list[0][0][0] == ["short", "mid text"]
@@ -0,0 +1,76 @@
+"""Unit Tests for the ONNX embedding backend."""
+
+import logging
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+
+# pylint: disable=wrong-import-position
+from sentence_transformers import SentenceTransformer, models
+from transformers import BertConfig, BertModel, BertTokenizerFast
+from rag.embedding.embedding_utils import embed_documents, load_embedding_model
+from rag.embedding.onnx_embedding import OnnxEmbeddingModel, export_onnx_model
+
+VOCAB = [f"w{i}" for i in range(100)]
+LOGGER = logging.getLogger("onnx-embedding-test")
+
+
+@pytest.fixture(name="torch_model", scope="module")
+def fixture_torch_model(tmp_path_factory):
+    """A small, randomly initialized model with the architecture of all-MiniLM-L6-v2."""
+    model_dir = tmp_path_factory.mktemp("bert")
+    vocab_path = model_dir / "vocab.txt"
+    vocab_path.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + VOCAB),
+                          encoding="utf-8")
+    BertTokenizerFast(vocab_file=str(vocab_path)).save_pretrained(str(model_dir))
+    BertModel(BertConfig(vocab_size=len(VOCAB) + 5, hidden_size=64, num_hidden_layers=2,
+                         num_attention_heads=4, intermediate_size=128)).save_pretrained(
+        str(model_dir))
+    transformer = models.Transformer(str(model_dir), max_seq_length=32)
+    return SentenceTransformer(modules=[
+        transformer, models.Pooling(transformer.get_word_embedding_dimension()), models.Normalize()
+    ])
+
+
+@pytest.fixture(name="onnx_dir", scope="module")
+def fixture_onnx_dir(torch_model, tmp_path_factory):
+    """The torch model exported to ONNX, with its int8 quantized graph."""
+    output_dir = tmp_path_factory.mktemp("onnx")
+    export_onnx_model(torch_model, "tiny-bert", str(output_dir), LOGGER)
+    return str(output_dir)
+
+
+def _texts(n_texts, seed=0):
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(VOCAB, size=length)) for length in rng.integers(1, 40, n_texts)]
+
+
+@pytest.mark.parametrize("quantized, min_cosine", [(False, 0.9999), (True, 0.99)])
+def test_onnx_model_matches_torch_model(torch_model, onnx_dir, quantized, min_cosine):
+    """Test that the ONNX embeddings agree with the torch embeddings, in the input order."""
+    texts = _texts(50)
+    expected = torch_model.encode(texts)
+
+    embeddings = OnnxEmbeddingModel(onnx_dir, LOGGER, quantized=quantized).encode(
+        texts, batch_size=8
+    )
+
+    assert embeddings.shape == expected.shape
+    assert embeddings.dtype == np.float32
+    assert np.min(np.sum(embeddings * expected, axis=1)) >= min_cosine
+
+
+def test_onnx_model_through_load_embedding_model(onnx_dir, mocker):
+    """Test that the ONNX backend is loaded from the config and serves embed_documents."""
+    mock_logger = mocker.Mock()
+    model = load_embedding_model("other-model", mock_logger, backend="onnx",
+                                 onnx_model_dir=onnx_dir)
+
+    vectors = embed_documents(["w1 w2", "w3"], model, mock_logger)
+
+    assert model.get_sentence_embedding_dimension() == 64
+    assert vectors.shape == (2, 64)
+    assert model.encode("w1 w2").shape == (64,)
+    mock_logger.warning.assert_called_once()
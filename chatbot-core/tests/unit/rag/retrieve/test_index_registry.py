@@ -0,0 +1,140 @@
+"""Unit Tests for index_registry module."""
+
+import os
+import faiss
+import numpy as np
+from api.config.loader import CONFIG
+from rag.retriever import index_registry as registry_module
+from rag.retriever.index_registry import VectorIndexRegistry
+
+
+def test_get_loads_source_once(source_files, mock_loaders, mocker):
+    """Test that repeated lookups of an unchanged source hit the cache."""
+    mock_load_index, mock_load_metadata = mock_loaders
+    registry = VectorIndexRegistry()
+    logger = mocker.Mock()
+
+    first = registry.get("plugins", logger)
+    second = registry.get("plugins", logger)
+
+    index_path, metadata_path = source_files
+    mock_load_index.assert_called_once_with(index_path, logger, mmap=True)
+    mock_load_metadata.assert_called_once_with(metadata_path, logger)
+    assert first[0] is second[0]
+    assert first[1] is second[1]
+    stats = registry.get_stats()["plugins"]
+    assert stats["load_count"] == 1
+    assert stats["hits"] == 1
+    assert stats["total_load_seconds"] >= stats["last_load_seconds"] >= 0
+
+
+def test_get_reloads_when_files_change(source_files, mock_loaders, mocker):
+    """Test that a change of the files on disk triggers a reload."""
+    mock_load_index, _ = mock_loaders
+    registry = VectorIndexRegistry()
+    logger = mocker.Mock()
+
+    first_index, _ = registry.get("plugins", logger)
+    index_path, _ = source_files
+    with open(index_path, "ab") as f:
+        f.write(b"-rebuilt")
+    second_index, _ = registry.get("plugins", logger)
+
+    assert mock_load_index.call_count == 2
+    assert first_index is not second_index
+    assert registry.get_stats()["plugins"]["load_count"] == 2
+
+
+def test_get_does_not_cache_missing_files(mocker, tmp_path, mock_loaders):
+    """Test that sources whose files are missing are retried on every call."""
+    mocker.patch.object(registry_module, "VECTOR_STORE_DIR", str(tmp_path))
+    mock_load_index, _ = mock_loaders
+    mock_load_index.side_effect = lambda path, logger, mmap=False: None
+    registry = VectorIndexRegistry()
+    logger = mocker.Mock()
+
+    index, _ = registry.get("docs", logger)
+    registry.get("docs", logger)
+
+    assert index is None
+    assert mock_load_index.call_count == 2
+
+
+def test_clear_drops_cached_entries(source_files, mock_loaders, mocker):
+    """Test that clear forces the next lookup to hit the disk."""
+    mock_load_index, _ = mock_loaders
+    registry = VectorIndexRegistry()
+    logger = mocker.Mock()
+
+    registry.get("plugins", logger)
+    registry.clear()
+    registry.get("plugins", logger)
+
+    assert mock_load_index.call_count == 2
+    assert os.path.exists(source_files[0])
+
+
+def test_get_manifest_is_loaded_with_the_source(source_files, mock_loaders, mocker):
+    """Test that the manifest is cached with the source and optional."""
+    _ = mock_loaders
+    registry = VectorIndexRegistry()
+    logger = mocker.Mock()
+
+    assert not registry.get_manifest("plugins", logger)
+
+    manifest_path = os.path.join(os.path.dirname(source_files[0]), "plugins_manifest.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        f.write('{"sources": {"plugins": [0, 1]}}')
+
+    assert registry.get_manifest("plugins", logger) == {"sources": {"plugins": [0, 1]}}
+    assert registry.get_stats()["plugins"]["load_count"] == 2
+
+
+def test_get_applies_manifest_search_params(source_files, mock_loaders, mocker):
+    """Test that the search parameters recorded in the manifest are applied on load."""
+    _ = mock_loaders
+    mock_apply = mocker.patch("rag.retriever.index_registry.apply_search_params")
+    manifest_path = os.path.join(os.path.dirname(source_files[0]), "plugins_manifest.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        f.write('{"index": {"type": "ivf", "search_params": {"nprobe": 12}}}')
+    logger = mocker.Mock()
+
+    index, _ = VectorIndexRegistry().get("plugins", logger)
+
+    mock_apply.assert_called_once_with(index, {"nprobe": 12}, logger)
+
+
+def test_get_overrides_hnsw_ef_search_from_config(source_files, mock_loaders, mocker):
+    """Test that the efSearch configured for the source wins over the manifest."""
+    _ = mock_loaders
+    mocker.patch.dict(CONFIG["retrieval"], {"hnsw_ef_search": {"plugins": 128}})
+    mock_apply = mocker.patch("rag.retriever.index_registry.apply_search_params")
+    manifest_path = os.path.join(os.path.dirname(source_files[0]), "plugins_manifest.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        f.write('{"index": {"type": "hnsw", "search_params": {"efSearch": 64}}}')
+    logger = mocker.Mock()
+
+    index, _ = VectorIndexRegistry().get("plugins", logger)
+
+    mock_apply.assert_called_once_with(index, {"efSearch": 128}, logger)
+
+
+def test_get_binary_stage_loaded_only_when_enabled(source_files, mock_loaders, mocker):
+    """Test that the binary stage is loaded with its vectors when the switch is on."""
+    _ = mock_loaders
+    store_dir = os.path.dirname(source_files[0])
+    binary_path = os.path.join(store_dir, "plugins_binary.idx")
+    faiss.write_index_binary(faiss.IndexBinaryFlat(8), binary_path)
+    np.save(os.path.join(store_dir, "plugins_vectors.npy"), np.zeros((1, 8), dtype=np.float32))
+    with open(os.path.join(store_dir, "plugins_manifest.json"), "w", encoding="utf-8") as f:
+        f.write('{"binary": {"type": "flat", "thresholds": [0, 0, 0, 0, 0, 0, 0, 0]}}')
+    logger = mocker.Mock()
+
+    mocker.patch.dict(CONFIG["retrieval"], {"binary_first_stage": False})
+    assert VectorIndexRegistry().get_binary_stage("plugins", logger) is None
+
+    mocker.patch.dict(CONFIG["retrieval"], {"binary_first_stage": True})
+    binary_stage = VectorIndexRegistry().get_binary_stage("plugins", logger)
+    assert binary_stage["index"].d == 8
+    assert binary_stage["vectors"].shape == (1, 8)
+    assert binary_stage["thresholds"].tolist() == [0.0] * 8
@@ -0,0 +1,119 @@
+"""Unit Tests for query_cache module."""
+
+import numpy as np
+from rag.retriever.query_cache import QueryEmbeddingCache, normalize_query
+from rag.retriever.retrieval_context import RetrievalContext
+
+
+def _fake_encode(texts):
+    """Return one deterministic 2-dimensional vector per text."""
+    return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_normalize_query():
+    """Test that whitespace is collapsed and the case folded."""
+    assert normalize_query("  How to   INSTALL\ta plugin \n") == "how to install a plugin"
+    assert normalize_query(" Jenkins  CLI ", lowercase=False) == "Jenkins CLI"
+
+
+def test_get_or_encode_shares_entries_between_variants(mocker):
+    """Test that normalized variants of a query hit the same entry."""
+    encode = mocker.Mock(side_effect=_fake_encode)
+    cache = QueryEmbeddingCache()
+
+    first = cache.get_or_encode(["How to install", "how  to install "], encode)
+    second = cache.get_or_encode(["HOW TO INSTALL"], encode)
+
+    encode.assert_called_once_with(["how to install"])
+    np.testing.assert_array_equal(first, [[14.0, 1.0], [14.0, 1.0]])
+    np.testing.assert_array_equal(second, [[14.0, 1.0]])
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_get_or_encode_encodes_only_missing_queries(mocker):
+    """Test that a batch only encodes the queries that are not cached."""
+    encode = mocker.Mock(side_effect=_fake_encode)
+    cache = QueryEmbeddingCache()
+    cache.get_or_encode(["cached"], encode)
+
+    vectors = cache.get_or_encode(["new query", "cached"], encode)
+
+    assert encode.call_args_list[-1].args == (["new query"],)
+    np.testing.assert_array_equal(vectors, [[9.0, 1.0], [6.0, 1.0]])
+
+
+def test_evicts_least_recently_used_entries(mocker):
+    """Test that the oldest unused entry is evicted past max_entries."""
+    encode = mocker.Mock(side_effect=_fake_encode)
+    cache = QueryEmbeddingCache(max_entries=2)
+
+    cache.get_or_encode(["a"], encode)
+    cache.get_or_encode(["b"], encode)
+    cache.get_or_encode(["a"], encode)
+    cache.get_or_encode(["c"], encode)
+    cache.get_or_encode(["a"], encode)
+    cache.get_or_encode(["b"], encode)
+
+    assert [call.args[0] for call in encode.call_args_list] == [["a"], ["b"], ["c"], ["b"]]
+    assert cache.get_stats()["evictions"] == 2
+
+
+def test_evicts_entries_past_max_bytes(mocker):
+    """Test that the memory bound is respected."""
+    encode = mocker.Mock(side_effect=_fake_encode)
+    # Each entry holds 8 bytes of vector and a 1-byte key.
+    cache = QueryEmbeddingCache(max_bytes=20)
+
+    cache.get_or_encode(["a", "b", "c"], encode)
+
+    stats = cache.get_stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 18, 1)
+
+
+def test_expired_entries_are_encoded_again(mocker):
+    """Test that an entry older than the TTL is dropped."""
+    mock_time = mocker.patch("rag.retriever.query_cache.time.monotonic", return_value=0.0)
+    encode = mocker.Mock(side_effect=_fake_encode)
+    cache = QueryEmbeddingCache(ttl_seconds=10)
+
+    cache.get_or_encode(["query"], encode)
+    mock_time.return_value = 5.0
+    cache.get_or_encode(["query"], encode)
+    mock_time.return_value = 20.0
+    cache.get_or_encode(["query"], encode)
+
+    assert encode.call_count == 2
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_disabled_cache_passes_queries_through(mocker):
+    """Test that a disabled cache encodes the raw queries every time."""
+    encode = mocker.Mock(return_value=[[0.1, 0.2]])
+    cache = QueryEmbeddingCache(enabled=False)
+
+    cache.get_or_encode(["  Raw Query "], encode)
+    result = cache.get_or_encode(["  Raw Query "], encode)
+
+    assert encode.call_count == 2
+    encode.assert_called_with(["  Raw Query "])
+    assert result == [[0.1, 0.2]]
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_retrieval_contexts_share_the_cache(mocker):
+    """Test that a query encoded by one request is reused by the next."""
+    mock_embed = mocker.patch(
+        "rag.retriever.retrieval_context.embed_documents",
+        side_effect=lambda texts, *_: _fake_encode(texts)
+    )
+    cache = QueryEmbeddingCache()
+
+    first = RetrievalContext(mocker.Mock(), mocker.Mock(), cache=cache)
+    first.get_query_vectors(["How to install a plugin"])
+    second = RetrievalContext(mocker.Mock(), mocker.Mock(), cache=cache)
+    vectors = second.get_query_vectors(["how to install a plugin"])
+
+    mock_embed.assert_called_once()
+    np.testing.assert_array_equal(vectors, [[23.0, 1.0]])
+    assert second.get_stats() == {"lookups": 1, "encoded_queries": 0, "encode_calls": 0}
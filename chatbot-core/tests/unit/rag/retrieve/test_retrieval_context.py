@@ -0,0 +1,42 @@
+"""Unit Tests for retrieval_context module."""
+
+import numpy as np
+from rag.retriever.retrieval_context import RetrievalContext
+
+
+def _fake_embed(texts, *_):
+    """Return one deterministic vector per text."""
+    return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_get_query_vectors_encodes_each_query_once(mocker):
+    """Test that repeated lookups of the same query do not re-encode it."""
+    mock_embed = mocker.patch(
+        "rag.retriever.retrieval_context.embed_documents",
+        side_effect=_fake_embed
+    )
+    context = RetrievalContext(mocker.Mock(), mocker.Mock())
+
+    for _ in range(3):
+        vectors = context.get_query_vectors(["how to install a plugin"])
+
+    mock_embed.assert_called_once()
+    np.testing.assert_array_equal(vectors, [[23.0, 1.0]])
+    assert context.get_stats() == {"lookups": 3, "encoded_queries": 1, "encode_calls": 1}
+
+
+def test_prime_encodes_distinct_queries_in_one_call(mocker):
+    """Test that priming deduplicates the queries and encodes them together."""
+    mock_embed = mocker.patch(
+        "rag.retriever.retrieval_context.embed_documents",
+        side_effect=_fake_embed
+    )
+    model, logger = mocker.Mock(), mocker.Mock()
+    context = RetrievalContext(model, logger)
+
+    context.prime(["first", "second", "first"])
+    vectors = context.get_query_vectors(["second", "first"])
+
+    mock_embed.assert_called_once_with(["first", "second"], model, logger)
+    np.testing.assert_array_equal(vectors[:, 0], [6.0, 5.0])
+    assert context.get_stats() == {"lookups": 2, "encoded_queries": 2, "encode_calls": 1}
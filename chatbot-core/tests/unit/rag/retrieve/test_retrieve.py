@@ -1,6 +1,8 @@
 """Unit Tests for retrieve module."""
 
+from api.config.loader import CONFIG
 from rag.retriever import retrieve
+from rag.vectorstore.chunk_store import ChunkStore
 
 def test_get_relevant_documents_empty_query(mocker):
     """Test that empty query returns empty results."""
@@ -81,9 +83,9 @@ def test_get_relevant_documents_success(mocker):
         return_value=[[0.1, 0.2]]
     )
 
-    mock_search_index = mocker.patch(
-        "rag.retriever.retrieve.search_index",
-        return_value=([{"id": "doc1"}], [0.99])
+    mock_search_index_batch = mocker.patch(
+        "rag.retriever.retrieve.search_index_batch",
+        return_value=[([{"id": "doc1"}], [0.99])]
     )
 
     query = "some valid query"
@@ -97,8 +99,8 @@ def test_get_relevant_documents_success(mocker):
     )
 
     mock_embed_documents.assert_called_once_with([query], model, mock_logger)
-    mock_search_index.assert_called_once_with(
-        [0.1, 0.2],
+    mock_search_index_batch.assert_called_once_with(
+        [[0.1, 0.2]],
         mock_index,
         mock_metadata,
         mock_logger,
@@ -107,3 +109,203 @@ def test_get_relevant_documents_success(mocker):
 
     assert data == [{"id": "doc1"}]
     assert scores == [0.99]
+
+
+def test_get_relevant_documents_batch_encodes_once(mocker):
+    """Test that the batch API embeds all queries at once and searches each source once."""
+    mock_logger = mocker.Mock()
+    model = mocker.Mock()
+    indexes = {"plugins": mocker.Mock(), "docs": mocker.Mock()}
+    mocker.patch(
+        "rag.retriever.retrieve.load_vector_index",
+        side_effect=lambda logger, source_name: (indexes[source_name], [{"id": source_name}])
+    )
+    mock_embed_documents = mocker.patch(
+        "rag.retriever.retrieve.embed_documents",
+        return_value=[[0.1], [0.2]]
+    )
+    mock_search_index_batch = mocker.patch(
+        "rag.retriever.retrieve.search_index_batch",
+        side_effect=lambda vectors, index, metadata, logger, top_k: [
+            ([{"id": f"{metadata[0]['id']}-q{i}"}], [0.1 * i]) for i in range(len(vectors))
+        ]
+    )
+
+    results = retrieve.get_relevant_documents_batch(
+        queries=["first query", "second query"],
+        model=model,
+        logger=mock_logger,
+        source_names=["plugins", "docs"],
+        top_k=1
+    )
+
+    mock_embed_documents.assert_called_once_with(
+        ["first query", "second query"], model, mock_logger
+    )
+    assert mock_search_index_batch.call_count == 2
+    assert results[0]["plugins"] == ([{"id": "plugins-q0"}], [0.0])
+    assert results[1]["docs"] == ([{"id": "docs-q1"}], [0.1])
+
+
+def test_get_relevant_documents_batch_skips_empty_queries(mocker):
+    """Test that empty queries get empty results without being embedded."""
+    mock_logger = mocker.Mock()
+    mocker.patch(
+        "rag.retriever.retrieve.load_vector_index",
+        return_value=(mocker.Mock(), [{"id": "doc1"}])
+    )
+    mock_embed_documents = mocker.patch(
+        "rag.retriever.retrieve.embed_documents",
+        return_value=[[0.1]]
+    )
+    mocker.patch(
+        "rag.retriever.retrieve.search_index_batch",
+        return_value=[([{"id": "doc1"}], [2.0])]
+    )
+
+    results = retrieve.get_relevant_documents_batch(
+        queries=["  ", "valid query"],
+        model=mocker.Mock(),
+        logger=mock_logger,
+        source_names=["plugins"],
+        top_k=1
+    )
+
+    assert mock_embed_documents.call_args[0][0] == ["valid query"]
+    mock_logger.warning.assert_called_once_with("Empty query received.")
+    assert results[0]["plugins"] == ([], [])
+    assert results[1]["plugins"] == ([], [])
+
+
+def test_get_relevant_documents_uses_retrieval_context(mocker):
+    """Test that the query vector is taken from the retrieval context when provided."""
+    mocker.patch(
+        "rag.retriever.retrieve.load_vector_index",
+        return_value=(mocker.Mock(), [{"id": "doc1"}])
+    )
+    mock_embed_documents = mocker.patch("rag.retriever.retrieve.embed_documents")
+    mocker.patch(
+        "rag.retriever.retrieve.search_index_batch",
+        return_value=[([{"id": "doc1"}], [0.5])]
+    )
+    retrieval_context = mocker.Mock()
+    retrieval_context.get_query_vectors.return_value = [[0.1, 0.2]]
+
+    data, _ = retrieve.get_relevant_documents(
+        query="some valid query",
+        model=mocker.Mock(),
+        logger=mocker.Mock(),
+        source_name="plugins",
+        top_k=1,
+        retrieval_context=retrieval_context
+    )
+
+    retrieval_context.get_query_vectors.assert_called_once_with(["some valid query"])
+    mock_embed_documents.assert_not_called()
+    assert data == [{"id": "doc1"}]
+
+
+def test_get_relevant_documents_batch_uses_unified_index(mocker):
+    """Test that the unified layout searches all the sources in one pass."""
+    mocker.patch.dict(CONFIG["retrieval"], {"unified_index": True})
+    mock_load_vector_index = mocker.patch("rag.retriever.retrieve.load_vector_index")
+    mocker.patch(
+        "rag.retriever.retrieve.load_unified_index",
+        return_value=(mocker.Mock(), [{"id": "doc1"}], {"plugins": [0, 1]})
+    )
+    mocker.patch("rag.retriever.retrieve.embed_documents", return_value=[[0.1, 0.2]])
+    mock_search = mocker.patch(
+        "rag.retriever.retrieve.search_unified_index_batch",
+        return_value=[{"plugins": ([{"id": "doc1"}], [0.5]), "docs": ([], [])}]
+    )
+
+    results = retrieve.get_relevant_documents_batch(
+        queries=["query"],
+        model=mocker.Mock(),
+        logger=mocker.Mock(),
+        source_names=["plugins", "docs"],
+        top_k=1
+    )
+
+    mock_search.assert_called_once()
+    mock_load_vector_index.assert_not_called()
+    assert results == [{"plugins": ([{"id": "doc1"}], [0.5]), "docs": ([], [])}]
+
+
+def test_get_relevant_documents_batch_falls_back_without_unified_index(mocker):
+    """Test that the per-source indexes are used when the unified index is missing."""
+    mocker.patch.dict(CONFIG["retrieval"], {"unified_index": True})
+    mocker.patch("rag.retriever.retrieve.load_unified_index", return_value=(None, None, {}))
+    mock_load_vector_index = mocker.patch(
+        "rag.retriever.retrieve.load_vector_index",
+        return_value=(None, None)
+    )
+    logger = mocker.Mock()
+
+    retrieve.get_relevant_documents_batch(
+        queries=["query"],
+        model=mocker.Mock(),
+        logger=logger,
+        source_names=["plugins"],
+        top_k=1
+    )
+
+    mock_load_vector_index.assert_called_once_with(logger, "plugins")
+    logger.warning.assert_called_once_with(
+        "Unified index not available. Searching the per-source indexes."
+    )
+
+
+def test_get_relevant_documents_uses_binary_first_stage(mocker):
+    """Test that sources with a binary stage are searched with it when enabled."""
+    mocker.patch.dict(CONFIG["retrieval"], {"binary_first_stage": True, "binary_candidates": 50})
+    metadata = [{"id": "doc1"}]
+    mocker.patch(
+        "rag.retriever.retrieve.load_vector_index",
+        return_value=(mocker.Mock(), metadata)
+    )
+    binary_stage = {"index": mocker.Mock()}
+    mocker.patch("rag.retriever.retrieve.load_binary_stage", return_value=binary_stage)
+    mocker.patch("rag.retriever.retrieve.embed_documents", return_value=[[0.1, 0.2]])
+    mock_search_index = mocker.patch("rag.retriever.retrieve.search_index_batch")
+    mock_search_binary = mocker.patch(
+        "rag.retriever.retrieve.search_binary_index_batch",
+        return_value=[(metadata, [0.5])]
+    )
+    logger = mocker.Mock()
+
+    data, _ = retrieve.get_relevant_documents("query", mocker.Mock(), logger, "plugins", top_k=1)
+
+    mock_search_index.assert_not_called()
+    assert mock_search_binary.call_args[0][1] is binary_stage
+    assert mock_search_binary.call_args[0][-1] == 50
+    assert data == metadata
+
+
+def test_get_relevant_documents_with_filters_searches_matching_rows(mocker):
+    """Test that a filtered search only looks at the rows matching the filters."""
+    mocker.patch.dict(CONFIG["retrieval"], {"binary_first_stage": True,
+                                            "filter_exact_max_rows": 100})
+    metadata = ChunkStore.from_chunks([
+        {"id": f"doc{i}", "chunk_text": "", "metadata": {"title": title}}
+        for i, title in enumerate(["git", "pipeline", "Git"])
+    ])
+    index = mocker.Mock()
+    mocker.patch("rag.retriever.retrieve.load_vector_index", return_value=(index, metadata))
+    mock_load_binary_stage = mocker.patch("rag.retriever.retrieve.load_binary_stage")
+    mocker.patch("rag.retriever.retrieve.embed_documents", return_value=[[0.1, 0.2]])
+    mock_search = mocker.patch(
+        "rag.retriever.retrieve.search_filtered_index_batch",
+        return_value=[([metadata[2]], [0.5])]
+    )
+
+    data, scores = retrieve.get_relevant_documents(
+        "filtered query", mocker.Mock(), mocker.Mock(), "plugins", top_k=1,
+        filters={"title": "GIT"}
+    )
+
+    mock_load_binary_stage.assert_not_called()
+    assert mock_search.call_args[0][1] is index
+    assert mock_search.call_args[0][5].tolist() == [0, 2]
+    assert mock_search.call_args[0][6] == 100
+    assert (data, scores) == ([metadata[2]], [0.5])
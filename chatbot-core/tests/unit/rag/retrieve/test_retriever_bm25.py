@@ -0,0 +1,76 @@
+"""Unit Tests for retriever_bm25 module."""
+
+from rag.embedding.bm25_engine import BM25Engine
+from rag.retriever.retriever_bm25 import perform_keyword_search, search_bm25_index
+from rag.vectorstore.chunk_store import ChunkStore
+
+CHUNKS = [
+    {"id": "doc1", "chunk_text": "install plugin", "metadata": {}, "code_blocks": []},
+    {"id": "doc2", "chunk_text": "pipeline syntax", "metadata": {}, "code_blocks": []}
+]
+
+
+def test_search_bm25_index_hydrates_hits_from_chunk_store(mocker):
+    """Test that the retriever hits are looked up by id in the chunk store."""
+    index = mocker.Mock()
+    index.search.return_value = {"doc2": 3.5, "doc1": 1.2}
+
+    data, scores = search_bm25_index("pipeline", index, ChunkStore.from_chunks(CHUNKS),
+                                     mocker.Mock(), top_k=2)
+
+    index.search.assert_called_once_with(query="pipeline", return_docs=False, cutoff=2)
+    assert data == [CHUNKS[1], CHUNKS[0]]
+    assert scores == [3.5, 1.2]
+
+
+def test_search_bm25_index_skips_unknown_ids(mocker):
+    """Test that ids missing from the chunk store are logged and skipped."""
+    index = mocker.Mock()
+    index.search.return_value = {"unknown": 5.0, "doc1": 1.2}
+    logger = mocker.Mock()
+
+    data, scores = search_bm25_index("plugin", index, ChunkStore.from_chunks(CHUNKS),
+                                     logger, top_k=2)
+
+    logger.warning.assert_called_once_with("No metadata found for chunk ID: %s", "unknown")
+    assert data == [CHUNKS[0]]
+    assert scores == [1.2]
+
+
+def test_perform_keyword_search_applies_threshold(mocker):
+    """Test that results below the keyword threshold are dropped."""
+    index = mocker.Mock()
+    index.search.return_value = {"doc2": 3.5, "doc1": 1.2}
+
+    results = perform_keyword_search("pipeline", mocker.Mock(), index,
+                                     ChunkStore.from_chunks(CHUNKS), keyword_threshold=2)
+
+    assert results == [{"chunk": CHUNKS[1], "score": 3.5}]
+
+
+def test_search_bm25_index_filters_retriv_hits(mocker):
+    """Test that retriv over-fetches and keeps the first top_k allowed hits."""
+    mocker.patch.dict("rag.retriever.retriever_bm25.CONFIG",
+                      {"retrieval": {"filter_keyword_oversampling": 3}})
+    index = mocker.Mock()
+    index.search.return_value = {"doc2": 3.5, "other": 2.0, "doc1": 1.2}
+
+    data, scores = search_bm25_index("plugin", index, ChunkStore.from_chunks(CHUNKS),
+                                     mocker.Mock(), top_k=1, doc_ids=["doc1", "doc2"])
+
+    index.search.assert_called_once_with(query="plugin", return_docs=False, cutoff=3)
+    assert data == [CHUNKS[1]]
+    assert scores == [3.5]
+
+
+def test_search_bm25_index_masks_native_engine(tmp_path, mocker):
+    """Test that the in-tree engine only scores the allowed documents."""
+    index = BM25Engine(index_name="test", index_dir=str(tmp_path), stemmer=None,
+                       stopwords=None).index([{"id": "doc1", "text": "install plugin"},
+                                              {"id": "doc2", "text": "plugin plugin"}])
+
+    data, scores = search_bm25_index("plugin", index, ChunkStore.from_chunks(CHUNKS),
+                                     mocker.Mock(), top_k=1, doc_ids=["doc1"])
+
+    assert data == [CHUNKS[0]]
+    assert len(scores) == 1
@@ -1,36 +1,51 @@
 """Unit Tests for retrieve_utils module."""
 
-import os
+import faiss
 import numpy as np
 import pytest
-from rag.retriever.retriever_utils import load_vector_index, search_index, VECTOR_STORE_DIR
+from rag.retriever.retriever_utils import (
+    load_vector_index,
+    search_index,
+    search_index_batch,
+    build_source_selector,
+    search_unified_index_batch,
+    search_binary_index_batch,
+    search_filtered_index_batch
+)
+from rag.vectorstore.binary_index import build_binary_index
 
 def test_load_vector_index_returns_index_and_metadata(mocker):
-    """Test load_vector_index loads index and metadata correctly."""
+    """Test load_vector_index returns the index and metadata from the registry."""
     mock_logger = mocker.Mock()
     mock_index = mocker.Mock()
     mock_metadata = [{"id": 1}]
-    mock_load_index = mocker.patch(
-        "rag.retriever.retriever_utils.load_faiss_index",
-        return_value=mock_index
+    mock_registry_get = mocker.patch(
+        "rag.retriever.retriever_utils.index_registry.get",
+        return_value=(mock_index, mock_metadata)
     )
-    mock_load_metadata = mocker.patch(
-        "rag.retriever.retriever_utils.load_metadata",
-        return_value=mock_metadata
-    )
-    source_name = "plugins"
-
-    index, metadata = load_vector_index(mock_logger, source_name)
 
-    expected_index_path = os.path.join(VECTOR_STORE_DIR, f"{source_name}_index.idx")
-    expected_metadata_path = os.path.join(VECTOR_STORE_DIR, f"{source_name}_metadata.pkl")
+    index, metadata = load_vector_index(mock_logger, "plugins")
 
-    mock_load_index.assert_called_once_with(expected_index_path, mock_logger)
-    mock_load_metadata.assert_called_once_with(expected_metadata_path, mock_logger)
+    mock_registry_get.assert_called_once_with("plugins", mock_logger)
     assert index == mock_index
     assert metadata == mock_metadata
 
 
+def test_load_vector_index_empty_source_name(mocker):
+    """Test load_vector_index returns empty results without a source name."""
+    mock_logger = mocker.Mock()
+    mock_registry_get = mocker.patch("rag.retriever.retriever_utils.index_registry.get")
+
+    index, metadata = load_vector_index(mock_logger, "  ")
+
+    mock_registry_get.assert_not_called()
+    mock_logger.warning.assert_called_once_with(
+        "No source name provided. Returning empty results."
+    )
+    assert not index
+    assert not metadata
+
+
 def test_search_index_invalid_query_vector(mocker):
     """Test search_index returns empty if query vector is invalid."""
     mock_logger = mocker.Mock()
@@ -150,3 +165,151 @@ def test_search_index_warns_when_metadata_longer_than_index(mocker):
     mock_logger.error.assert_not_called()
     assert data == [{"id": "doc1"}]
     assert scores == pytest.approx([0.1])
+
+
+def test_search_index_skips_missing_results(mocker):
+    """Test search_index ignores the -1 labels FAISS returns when fewer than k hits exist."""
+    mock_logger = mocker.Mock()
+    index = mocker.Mock()
+    index.ntotal = 1
+    index.search.return_value = (
+        np.array([[0.1, 3.4e38]], dtype=np.float32),
+        np.array([[0, -1]])
+    )
+    metadata = [{"id": "doc1"}]
+
+    data, scores = search_index(
+        query_vector=np.array([0.1, 0.2], dtype=np.float32),
+        index=index,
+        metadata=metadata,
+        logger=mock_logger,
+        top_k=2
+    )
+
+    mock_logger.error.assert_not_called()
+    assert data == [{"id": "doc1"}]
+    assert scores == pytest.approx([0.1])
+
+
+def test_search_index_batch_returns_results_per_query(mocker):
+    """Test search_index_batch runs one search for all the queries."""
+    mock_logger = mocker.Mock()
+    index = mocker.Mock()
+    index.ntotal = 2
+    index.search.return_value = (
+        np.array([[0.1, 0.2], [0.3, 0.4]], dtype=np.float32),
+        np.array([[0, 1], [1, 0]])
+    )
+    metadata = [{"id": "doc1"}, {"id": "doc2"}]
+    query_vectors = np.array([[0.1, 0.2], [0.3, 0.4]], dtype=np.float32)
+
+    results = search_index_batch(query_vectors, index, metadata, mock_logger, top_k=2)
+
+    index.search.assert_called_once()
+    assert results[0][0] == [{"id": "doc1"}, {"id": "doc2"}]
+    assert results[1][0] == [{"id": "doc2"}, {"id": "doc1"}]
+    assert results[1][1] == pytest.approx([0.3, 0.4])
+
+
+def _unified_flat_index():
+    """Build a flat index of 6 vectors: rows 0-2 from 'plugins', rows 3-5 from 'docs'."""
+    vectors = np.arange(6, dtype=np.float32).reshape(6, 1)
+    index = faiss.IndexFlatL2(1)
+    index.add(vectors)  # pylint: disable=no-value-for-parameter
+    metadata = [{"id": f"doc{i}"} for i in range(6)]
+    return index, metadata, {"plugins": [0, 3], "docs": [3, 6]}
+
+
+def test_search_index_batch_restricts_to_selector(mocker):
+    """Test that an ID selector limits the search to the selected vectors."""
+    index, metadata, source_ranges = _unified_flat_index()
+    selector = build_source_selector(source_ranges, ["docs"])
+
+    results = search_index_batch(
+        np.array([[0.0]], dtype=np.float32), index, metadata, mocker.Mock(), top_k=2,
+        id_selector=selector
+    )
+
+    assert results[0][0] == [{"id": "doc3"}, {"id": "doc4"}]
+
+
+def test_build_source_selector_merges_and_skips_unknown_sources():
+    """Test that the selector accepts exactly the IDs of the known requested sources."""
+    source_ranges = {"plugins": [0, 3], "docs": [3, 6], "discourse": [6, 9]}
+
+    selector = build_source_selector(source_ranges, ["discourse", "plugins", "unknown"])
+
+    assert [i for i in range(10) if selector.is_member(i)] == [0, 1, 2, 6, 7, 8]
+    assert build_source_selector(source_ranges, ["unknown"]) is None
+
+
+def test_search_unified_index_batch_splits_results_by_source(mocker):
+    """Test that a single search returns the top-k results of every requested source."""
+    index, metadata, source_ranges = _unified_flat_index()
+    mock_logger = mocker.Mock()
+    mock_search = mocker.spy(index, "search")
+
+    results = search_unified_index_batch(
+        np.array([[0.0], [5.0]], dtype=np.float32), index, metadata, source_ranges,
+        ["plugins", "docs", "discourse"], mock_logger, top_k=2
+    )
+
+    assert mock_search.call_count == 1
+    assert results[0]["plugins"][0] == [{"id": "doc0"}, {"id": "doc1"}]
+    assert results[0]["docs"][0] == [{"id": "doc3"}]
+    assert results[1]["docs"][0] == [{"id": "doc5"}, {"id": "doc4"}]
+    assert results[1]["docs"][1] == pytest.approx([0.0, 1.0])
+    assert results[0]["discourse"] == ([], [])
+    mock_logger.warning.assert_called_once()
+
+
+def test_search_binary_index_batch_rescores_candidates(mocker):
+    """Test that the two-stage search returns the exact neighbors among its candidates."""
+    vectors = np.random.default_rng(0).standard_normal((300, 32)).astype(np.float32)
+    binary_index, spec = build_binary_index(vectors, mocker.Mock())
+    binary_stage = {
+        "index": binary_index,
+        "vectors": vectors,
+        "thresholds": np.asarray(spec["thresholds"], dtype=np.float32)
+    }
+    metadata = [{"id": f"doc{i}"} for i in range(300)]
+    exact_index = faiss.IndexFlatL2(32)
+    exact_index.add(vectors)  # pylint: disable=no-value-for-parameter
+
+    results = search_binary_index_batch(
+        vectors[:2], binary_stage, metadata, mocker.Mock(), top_k=3, n_candidates=300
+    )
+
+    expected_distances, expected_rows = exact_index.search(  # pylint: disable=no-value-for-parameter
+        vectors[:2], 3
+    )
+    for (data, scores), rows, distances in zip(results, expected_rows, expected_distances):
+        assert data == [metadata[row] for row in rows]
+        assert scores == pytest.approx(distances.tolist(), abs=1e-4)
+
+
+@pytest.mark.parametrize("exact_max_rows", [0, 10])
+def test_search_filtered_index_batch_searches_only_given_rows(mocker, exact_max_rows):
+    """Test that only the given rows are ranked, exactly or through an ID selector."""
+    index, metadata, _ = _unified_flat_index()
+    rows = np.array([1, 4, 5])
+
+    results = search_filtered_index_batch(
+        np.array([[0.0], [5.0]], dtype=np.float32), index, metadata, mocker.Mock(), top_k=2,
+        rows=rows, exact_max_rows=exact_max_rows
+    )
+
+    assert results[0][0] == [{"id": "doc1"}, {"id": "doc4"}]
+    assert results[0][1] == pytest.approx([1.0, 16.0])
+    assert results[1][0] == [{"id": "doc5"}, {"id": "doc4"}]
+
+
+def test_search_filtered_index_batch_without_rows(mocker):
+    """Test that an empty selection returns empty results without searching."""
+    index = mocker.Mock()
+
+    results = search_filtered_index_batch(np.zeros((2, 1), dtype=np.float32), index, [],
+                                          mocker.Mock(), top_k=2, rows=np.zeros(0, np.int64))
+
+    assert results == [([], []), ([], [])]
+    index.search.assert_not_called()
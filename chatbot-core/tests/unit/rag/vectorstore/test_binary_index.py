@@ -0,0 +1,46 @@
+"""Unit Tests for binary_index module."""
+
+import numpy as np
+import pytest
+from rag.vectorstore.binary_index import binarize, build_binary_index, rescore_candidates
+
+
+def test_binarize_packs_one_bit_per_dimension():
+    """Test that every dimension above its threshold sets one bit."""
+    vectors = np.array([[1.0, -1.0, 0.5, 0.0, 2.0, -2.0, 0.1, 3.0]], dtype=np.float32)
+
+    codes = binarize(vectors, np.zeros(8, dtype=np.float32))
+
+    assert codes.dtype == np.uint8
+    assert codes.tolist() == [[0b10101011]]
+
+
+def test_build_binary_index_flat(mocker):
+    """Test that a small corpus gets an exhaustive binary index and its thresholds."""
+    vectors = np.random.rand(100, 16).astype(np.float32)
+
+    index, spec = build_binary_index(vectors, mocker.Mock())
+
+    assert index.ntotal == 100
+    assert spec["type"] == "flat"
+    np.testing.assert_allclose(spec["thresholds"], vectors.mean(axis=0), rtol=1e-6)
+
+
+def test_build_binary_index_rejects_odd_dimension(mocker):
+    """Test that the dimension must fill whole bytes."""
+    with pytest.raises(ValueError):
+        build_binary_index(np.random.rand(10, 12).astype(np.float32), mocker.Mock())
+
+
+def test_rescore_candidates_orders_by_exact_distance():
+    """Test that candidates are ranked by squared L2 distance and missing ones are padded."""
+    vectors = np.array([[0.0], [3.0], [1.0], [10.0]], dtype=np.float32)
+    queries = np.array([[0.9], [5.0]], dtype=np.float32)
+    candidates = np.array([[1, 2, 0], [3, -1, -1]])
+
+    distances, labels = rescore_candidates(queries, candidates, vectors, top_k=2)
+
+    assert labels.tolist() == [[2, 0], [3, -1]]
+    assert distances[0] == pytest.approx([0.01, 0.81])
+    assert distances[1][0] == pytest.approx(25.0)
+    assert np.isinf(distances[1][1])
@@ -0,0 +1,145 @@
+"""Unit Tests for chunk_store module."""
+
+import os
+import pytest
+from rag.vectorstore.chunk_store import ChunkStore, ChunkStoreWriter, write_chunk_store
+
+CHUNKS = [
+    {
+        "id": "chunk-1",
+        "chunk_text": "Install the plugin with [[CODE_BLOCK_0]]",
+        "metadata": {"title": "Git Plugin", "data_source": "jenkins_plugins_docs"},
+        "code_blocks": ["jenkins-plugin-cli --plugins git"]
+    },
+    {
+        "id": "chunk-2",
+        "chunk_text": "Pipelines supports parallel stages – ünïcode included.",
+        "metadata": {"title": "Pipeline"},
+        "code_blocks": []
+    }
+]
+
+
+def test_write_and_open_chunk_store_round_trip(tmp_path):
+    """Test that a written chunk store returns the original chunks."""
+    path = str(tmp_path / "plugins_chunks")
+    write_chunk_store(CHUNKS, path)
+
+    store = ChunkStore.open(path)
+
+    assert len(store) == 2
+    assert store[0] == CHUNKS[0]
+    assert store[1] == CHUNKS[1]
+    assert list(store) == CHUNKS
+
+
+def test_chunk_store_column_access(tmp_path):
+    """Test that single columns can be read without materializing the chunk."""
+    path = str(tmp_path / "plugins_chunks")
+    write_chunk_store(CHUNKS, path)
+
+    store = ChunkStore.open(path)
+
+    assert store.get_id(1) == "chunk-2"
+    assert store.get_text(1) == CHUNKS[1]["chunk_text"]
+
+
+def test_chunk_store_lookup_by_id():
+    """Test that chunks are found by id and unknown ids return None."""
+    store = ChunkStore.from_chunks(CHUNKS)
+
+    assert store.row_of("chunk-2") == 1
+    assert store.get_by_id("chunk-1") == CHUNKS[0]
+    assert store.get_by_id("missing") is None
+
+
+def test_chunk_store_rows_of_uses_persisted_id_index(tmp_path):
+    """Test that ids are looked up in batch through the saved id index."""
+    path = str(tmp_path / "plugins_chunks")
+    chunks = [{**CHUNKS[0], "id": f"chunk-{i}"} for i in (5, 3, 9, 1)]
+    write_chunk_store(chunks, path)
+
+    store = ChunkStore.open(path)
+
+    assert os.path.exists(os.path.join(path, "ids_order.npy"))
+    assert store.rows_of(["chunk-9", "missing", "chunk-5", "chunk-1-longer-than-any-id"]
+                         ).tolist() == [2, -1, 0, -1]
+    assert store.row_of("chunk-1") == 3
+
+
+def test_chunk_store_without_id_index(tmp_path):
+    """Test that a store written before the id index existed is still searchable."""
+    path = str(tmp_path / "plugins_chunks")
+    write_chunk_store(CHUNKS, path)
+    os.remove(os.path.join(path, "ids_order.npy"))
+
+    store = ChunkStore.open(path)
+
+    assert store.rows_of(["chunk-2", "chunk-1"]).tolist() == [1, 0]
+
+
+def test_chunk_store_out_of_range_row():
+    """Test that an out of range row raises IndexError."""
+    store = ChunkStore.from_chunks(CHUNKS)
+
+    with pytest.raises(IndexError):
+        _ = store[2]
+
+
+def test_empty_chunk_store(tmp_path):
+    """Test that an empty chunk store can be written and opened."""
+    path = str(tmp_path / "empty_chunks")
+    write_chunk_store([], path)
+
+    store = ChunkStore.open(path)
+
+    assert len(store) == 0
+    assert not list(store)
+
+
+def test_chunk_store_writer_matches_write_chunk_store(tmp_path):
+    """Test that a store written chunk by chunk holds the same files as a store written at once."""
+    streamed_path, written_path = str(tmp_path / "streamed"), str(tmp_path / "written")
+    write_chunk_store(CHUNKS, written_path)
+
+    with ChunkStoreWriter(streamed_path) as writer:
+        for chunk in CHUNKS:
+            writer.add(chunk)
+        assert len(writer) == 2
+
+    assert list(ChunkStore.open(streamed_path)) == CHUNKS
+    assert sorted(os.listdir(streamed_path)) == sorted(os.listdir(written_path))
+    for name in os.listdir(written_path):
+        with open(os.path.join(streamed_path, name), "rb") as streamed, \
+                open(os.path.join(written_path, name), "rb") as written:
+            assert streamed.read() == written.read()
+
+
+def test_chunk_store_writer_keeps_previous_store_on_error(tmp_path):
+    """Test that a failed write leaves the previous store in place."""
+    path = str(tmp_path / "plugins_chunks")
+    write_chunk_store(CHUNKS, path)
+
+    with pytest.raises(RuntimeError):
+        with ChunkStoreWriter(path) as writer:
+            writer.add(CHUNKS[1])
+            raise RuntimeError("embedding failed")
+
+    assert list(ChunkStore.open(path)) == CHUNKS
+    assert not [name for name in os.listdir(path) if name.endswith(".tmp")]
+
+
+def test_chunk_store_rows_matching_filters_by_metadata():
+    """Test that rows are filtered by normalized metadata values, all filters applying."""
+    chunks = [
+        {**CHUNKS[0], "id": "a"},
+        {**CHUNKS[1], "id": "b"},
+        {**CHUNKS[0], "id": "c", "metadata": {"title": "git-plugin", "data_source": "other"}}
+    ]
+    store = ChunkStore.from_chunks(chunks)
+
+    assert store.rows_matching({"title": "GIT plugin"}).tolist() == [0, 2]
+    assert store.rows_matching({"title": "gitplugin",
+                                "data_source": "jenkins_plugins_docs"}).tolist() == [0]
+    assert store.rows_matching({"title": "pipeline", "data_source": "other"}).tolist() == []
+    assert store.rows_matching({"author": "anyone"}).tolist() == []
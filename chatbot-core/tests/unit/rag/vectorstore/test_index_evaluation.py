@@ -0,0 +1,49 @@
+"""Unit Tests for index_evaluation module."""
+
+import faiss
+import numpy as np
+import pytest
+from rag.vectorstore.index_evaluation import (
+    evaluate_index,
+    index_bytes_per_vector,
+    sample_queries
+)
+
+
+def test_sample_queries_is_deterministic():
+    """Test that the sampled queries are distinct corpus rows, stable across runs."""
+    vectors = np.random.rand(50, 4).astype("float32")
+
+    queries = sample_queries(vectors, 10)
+
+    assert queries.shape == (10, 4)
+    np.testing.assert_array_equal(queries, sample_queries(vectors, 10))
+    assert len(sample_queries(vectors, 500)) == 50
+
+
+def test_evaluate_index_exact_index_has_full_recall():
+    """Test that a flat index is reported with a recall of 1."""
+    vectors = np.random.rand(200, 8).astype("float32")
+    index = faiss.IndexFlatL2(8)
+    index.add(vectors)  # pylint: disable=no-value-for-parameter
+
+    result = evaluate_index(index, vectors, sample_queries(vectors, 20), top_k=5)
+
+    assert result["recall_at_k"] == pytest.approx(1.0)
+    assert result["top_k"] == 5
+    assert result["bytes_per_vector"] >= 8 * 4
+    assert 0 <= result["p50_ms"] <= result["p99_ms"]
+
+
+def test_index_bytes_per_vector_reflects_compression():
+    """Test that a scalar-quantized index takes about a quarter of the flat size."""
+    vectors = np.random.rand(1000, 64).astype("float32")
+    flat_index = faiss.IndexFlatL2(64)
+    flat_index.add(vectors)  # pylint: disable=no-value-for-parameter
+    sq_index = faiss.index_factory(64, "SQ8")
+    sq_index.train(vectors)  # pylint: disable=no-value-for-parameter
+    sq_index.add(vectors)  # pylint: disable=no-value-for-parameter
+
+    ratio = index_bytes_per_vector(flat_index) / index_bytes_per_vector(sq_index)
+
+    assert 3.5 < ratio <= 4.0
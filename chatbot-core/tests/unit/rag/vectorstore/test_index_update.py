@@ -0,0 +1,60 @@
+"""Unit Tests for index_update module."""
+
+import faiss
+import numpy as np
+import pytest
+from rag.vectorstore.index_update import remove_index_rows
+
+
+@pytest.mark.parametrize("factory", ["Flat", "SQ8", "IVF8,Flat", "PCA8,IVF8,Flat"])
+def test_remove_index_rows_renumbers_remaining_vectors(factory):
+    """Test that the remaining vectors are labelled with their compacted rows."""
+    vectors = np.random.default_rng(0).random((400, 16)).astype("float32")
+    index = faiss.index_factory(16, factory)
+    index.train(vectors)  # pylint: disable=no-value-for-parameter
+    if "IVF" in factory:
+        faiss.ParameterSpace().set_index_parameter(index, "nprobe", 8)
+    index.add(vectors)  # pylint: disable=no-value-for-parameter
+
+    removed = remove_index_rows(index, [0, 7, 7, 399])
+
+    kept = np.delete(vectors, [0, 7, 399], axis=0)
+    assert removed == 3
+    assert index.ntotal == 397
+    _, labels = index.search(kept[:50], 1)  # pylint: disable=no-value-for-parameter
+    assert (labels[:, 0] == np.arange(50)).mean() > 0.9
+    index.add(vectors[:1])  # pylint: disable=no-value-for-parameter
+    assert index.search(vectors[:1], 1)[1][0][0] == 397  # pylint: disable=no-value-for-parameter
+
+
+def test_remove_index_rows_binary_ivf():
+    """Test that a binary IVF index is renumbered as well."""
+    codes = np.random.default_rng(0).integers(0, 256, (300, 4)).astype("uint8")
+    index = faiss.IndexBinaryIVF(faiss.IndexBinaryFlat(32), 32, 4)
+    index.train(codes)  # pylint: disable=no-value-for-parameter
+    index.nprobe = 4
+    index.add(codes)  # pylint: disable=no-value-for-parameter
+
+    remove_index_rows(index, [1, 2])
+
+    _, labels = index.search(codes[3:5], 1)  # pylint: disable=no-value-for-parameter
+    assert labels[:, 0].tolist() == [1, 2]
+
+
+def test_remove_index_rows_without_rows():
+    """Test that nothing is removed when no row is given."""
+    index = faiss.IndexFlatL2(4)
+    index.add(np.ones((2, 4), dtype="float32"))  # pylint: disable=no-value-for-parameter
+
+    assert remove_index_rows(index, []) == 0
+    assert index.ntotal == 2
+
+
+def test_remove_index_rows_hnsw_raises():
+    """Test that an HNSW index rejects removals and is left unchanged."""
+    index = faiss.IndexHNSWFlat(4, 8)
+    index.add(np.random.rand(10, 4).astype("float32"))  # pylint: disable=no-value-for-parameter
+
+    with pytest.raises(RuntimeError):
+        remove_index_rows(index, [1])
+    assert index.ntotal == 10
@@ -1,9 +1,13 @@
 """Unit Tests for store_embeddings module."""
 
+import os
 import numpy as np
 import faiss
 import pytest
 from rag.vectorstore import store_embeddings
+from rag.vectorstore.binary_index import build_binary_index
+from rag.vectorstore.chunk_store import ChunkStore, write_chunk_store
+from rag.vectorstore.vectorstore_utils import save_manifest, load_manifest
 
 def test_build_faiss_ivf_index_trains_and_adds_vectors(mocker):
     """Test that build_faiss_ivf_index trains and adds vectors correctly."""
@@ -85,7 +89,7 @@ def test_build_faiss_ivf_index_raises_on_not_np_array(mocker):
 def test_run_indexing_successful(
         mocker,
         mock_save_faiss_index,
-        mock_save_metadata
+        mock_save_chunk_store
     ):
     """Test that run_indexing runs the indexing pipeline correctly."""
     mock_logger = mocker.Mock()
@@ -98,34 +102,550 @@ def test_run_indexing_successful(
     )
     mock_index = mocker.Mock()
     mock_build_index =  mocker.patch(
-        "rag.vectorstore.store_embeddings.build_faiss_ivf_index",
+        "rag.vectorstore.store_embeddings.build_faiss_index",
         return_value=mock_index
     )
+    mock_save_manifest = mocker.patch("rag.vectorstore.store_embeddings.save_manifest")
 
-    store_embeddings.run_indexing(
-        nlist=4,
-        nprobe=2,
-        logger=mock_logger
-    )
+    store_embeddings.run_indexing(mock_logger)
 
-    mock_embed_chunks.assert_called_once_with(mock_logger)
+    mock_embed_chunks.assert_called_once_with(mock_logger, cache=None)
     expected_vectors_np = np.array(vectors).astype("float32")
     mock_build_index.assert_called_once()
     np.testing.assert_array_equal(
         mock_build_index.call_args[0][0],
         expected_vectors_np
     )
-    assert mock_build_index.call_args[1]["nlist"] == 4
-    assert mock_build_index.call_args[1]["nprobe"] == 2
-    assert mock_build_index.call_args[1]["logger"] == mock_logger
+    index_spec = mock_build_index.call_args[0][1]
+    assert index_spec["type"] == "flat"
     mock_save_faiss_index.assert_called_once_with(
         mock_index,
         store_embeddings.INDEX_PATH,
         mock_logger
     )
-    mock_save_metadata.assert_called_once_with(
+    mock_save_chunk_store.assert_called_once_with(
         metadata,
-        store_embeddings.METADATA_PATH,
+        store_embeddings.CHUNK_STORE_PATH,
+        mock_logger
+    )
+    mock_save_manifest.assert_called_once_with(
+        {"index": index_spec},
+        store_embeddings.MANIFEST_PATH,
         mock_logger
     )
     assert mock_logger.info.call_count >= 1
+
+
+@pytest.mark.parametrize("n_vectors, expected_type, expected_factory, expected_params", [
+    (5000, "flat", "Flat", {}),
+    (100_000, "ivf", "IVF316,Flat", {"nprobe": 20}),
+    (2_000_000, "hnsw", "HNSW32", {"efSearch": 64}),
+])
+def test_select_index_spec_by_corpus_size(n_vectors, expected_type, expected_factory,
+                                          expected_params):
+    """Test that the index type grows from flat to IVF to HNSW with the corpus size."""
+    index_spec = store_embeddings.select_index_spec(n_vectors, 384, target_latency_ms=2.0)
+
+    assert index_spec["type"] == expected_type
+    assert index_spec["factory"] == expected_factory
+    assert index_spec["search_params"] == expected_params
+    assert index_spec["n_vectors"] == n_vectors
+
+
+def test_select_index_spec_keeps_flat_for_tiny_corpus():
+    """Test that IVF is never chosen without enough training points."""
+    index_spec = store_embeddings.select_index_spec(50, 384, target_latency_ms=0.0)
+
+    assert index_spec["type"] == "flat"
+
+
+def test_select_index_spec_forced_type():
+    """Test that the index type can be forced, IVF falling back to flat on tiny corpora."""
+    hnsw_spec = store_embeddings.select_index_spec(100, 384, index_type="hnsw")
+    assert hnsw_spec["type"] == "hnsw"
+    assert hnsw_spec["build_params"] == {"efConstruction": 80}
+    assert store_embeddings.select_index_spec(100_000, 384, index_type="flat")["type"] == "flat"
+    assert store_embeddings.select_index_spec(50, 384, index_type="ivf")["type"] == "flat"
+    with pytest.raises(ValueError):
+        store_embeddings.select_index_spec(100, 384, index_type="lsh")
+
+
+def test_build_faiss_index_hnsw(mocker):
+    """Test that an HNSW index is built with its construction and search parameters."""
+    vectors = np.random.rand(200, 8).astype("float32")
+    index_spec = store_embeddings.select_index_spec(200, 8, index_type="hnsw")
+
+    index = store_embeddings.build_faiss_index(vectors, index_spec, mocker.Mock())
+
+    assert index.ntotal == 200
+    assert index.hnsw.efConstruction == 80
+    assert index.hnsw.efSearch == 64
+
+
+def test_add_chunks_to_index_appends_new_chunks(mocker, tmp_path):
+    """Test that new chunks are added to the stored index, skipping known ids."""
+    mocker.patch.object(store_embeddings, "VECTOR_STORE_DIR", str(tmp_path))
+    mock_logger = mocker.Mock()
+    vectors = np.random.rand(3, 8).astype("float32")
+    chunks = [{"id": f"c{i}", "chunk_text": f"text {i}"} for i in range(3)]
+    index_spec = store_embeddings.select_index_spec(2, 8, index_type="hnsw")
+    faiss.write_index(
+        store_embeddings.build_faiss_index(vectors[:2], index_spec, mock_logger),
+        str(tmp_path / "plugins_index.idx")
+    )
+    write_chunk_store(chunks[:2], str(tmp_path / "plugins_chunks"))
+    save_manifest({"index": index_spec}, str(tmp_path / "plugins_manifest.json"), mock_logger)
+    mocker.patch(
+        "rag.vectorstore.store_embeddings.embed_chunks",
+        return_value=(vectors[1:], chunks[1:])
+    )
+
+    added = store_embeddings.add_chunks_to_index("plugins", ["new.json"], mock_logger)
+
+    assert added == 1
+    index = faiss.read_index(str(tmp_path / "plugins_index.idx"))
+    store = ChunkStore.open(str(tmp_path / "plugins_chunks"))
+    assert index.ntotal == 3
+    assert [store.get_id(row) for row in range(len(store))] == ["c0", "c1", "c2"]
+    assert index.search(vectors[2:], 1)[1][0][0] == 2  # pylint: disable=no-value-for-parameter
+    manifest = load_manifest(str(tmp_path / "plugins_manifest.json"), mock_logger)
+    assert manifest["index"]["n_vectors"] == 3
+
+
+def test_add_chunks_to_index_without_index(mocker, tmp_path):
+    """Test that nothing is added when the source was never indexed."""
+    mocker.patch.object(store_embeddings, "VECTOR_STORE_DIR", str(tmp_path))
+    mock_embed_chunks = mocker.patch("rag.vectorstore.store_embeddings.embed_chunks")
+
+    added = store_embeddings.add_chunks_to_index("docs", ["new.json"], mocker.Mock())
+
+    assert added == 0
+    mock_embed_chunks.assert_not_called()
+
+
+@pytest.mark.parametrize("index_type, compression, expected_factory", [
+    ("flat", "sqfp16", "SQfp16"),
+    ("flat", "sq8", "SQ8"),
+    ("flat", "pq", "PQ48"),
+    ("ivf", "pq", "IVF316,PQ48"),
+    ("ivf", "opq", "OPQ48,IVF316,PQ48"),
+    ("hnsw", "sq8", "HNSW32,SQ8"),
+    ("ivf", "pca", "PCA128,IVF316,Flat"),
+    ("flat", "none", "Flat"),
+])
+def test_apply_compression_factory(index_type, compression, expected_factory):
+    """Test that every compression mode rewrites the factory string of the index type."""
+    index_spec = store_embeddings.select_index_spec(100_000, 384, index_type=index_type)
+
+    compressed = store_embeddings.apply_compression(index_spec, compression)
+
+    assert compressed["factory"] == expected_factory
+    assert compressed["search_params"] == index_spec["search_params"]
+
+
+def test_apply_compression_rejects_incompatible_dimension():
+    """Test that PCA and PQ refuse dimensions they cannot handle."""
+    index_spec = store_embeddings.select_index_spec(1000, 100, index_type="flat")
+
+    with pytest.raises(ValueError):
+        store_embeddings.apply_compression(index_spec, "pca")
+    with pytest.raises(ValueError):
+        store_embeddings.apply_compression(index_spec, "pq")
+
+
+def test_build_faiss_index_compressed_hnsw(mocker):
+    """Test that a PCA-wrapped HNSW index gets its construction parameter."""
+    vectors = np.random.rand(300, 256).astype("float32")
+    index_spec = store_embeddings.apply_compression(
+        store_embeddings.select_index_spec(300, 256, index_type="hnsw"), "pca"
+    )
+
+    index = store_embeddings.build_faiss_index(vectors, index_spec, mocker.Mock())
+
+    assert index.ntotal == 300
+    assert faiss.downcast_index(index.index).hnsw.efConstruction == 80
+
+
+def test_build_faiss_index_from_spec(mocker):
+    """Test that build_faiss_index trains the index and applies the search parameters."""
+    vectors = np.random.rand(400, 8).astype("float32")
+    index_spec = {"factory": "IVF4,Flat", "search_params": {"nprobe": 3}}
+
+    index = store_embeddings.build_faiss_index(vectors, index_spec, mocker.Mock())
+
+    assert index.ntotal == 400
+    assert faiss.extract_index_ivf(index).nprobe == 3
+
+
+def test_run_unified_indexing_records_source_ranges(
+        mocker,
+        mock_save_faiss_index,
+        mock_save_chunk_store
+    ):
+    """Test that every source gets a contiguous ID range in the unified index."""
+    mock_logger = mocker.Mock()
+    mock_model = mocker.Mock()
+    mocker.patch(
+        "rag.vectorstore.store_embeddings.load_embedding_model",
+        return_value=mock_model
+    )
+    chunks_by_source = {
+        "plugins": ([[0.1, 0.2], [0.3, 0.4]], [{"id": "p1"}, {"id": "p2"}]),
+        "docs": ([], []),
+        "discourse": ([[0.5, 0.6]], [{"id": "d1"}])
+    }
+    mock_embed_chunks = mocker.patch(
+        "rag.vectorstore.store_embeddings.embed_chunks",
+        side_effect=[chunks_by_source[name] for name in ["plugins", "docs", "discourse"]]
+    )
+    mock_build_index = mocker.patch("rag.vectorstore.store_embeddings.build_faiss_index")
+    mock_save_manifest = mocker.patch("rag.vectorstore.store_embeddings.save_manifest")
+
+    store_embeddings.run_unified_indexing(["plugins", "docs", "discourse"], mock_logger)
+
+    assert mock_embed_chunks.call_args_list[0][1]["model"] is mock_model
+    assert mock_build_index.call_args[0][0].shape == (3, 2)
+    mock_save_faiss_index.assert_called_once_with(
+        mock_build_index.return_value,
+        store_embeddings.UNIFIED_INDEX_PATH,
+        mock_logger
+    )
+    mock_save_chunk_store.assert_called_once_with(
+        [{"id": "p1"}, {"id": "p2"}, {"id": "d1"}],
+        store_embeddings.UNIFIED_CHUNK_STORE_PATH,
+        mock_logger
+    )
+    mock_save_manifest.assert_called_once_with(
+        {
+            "index": mock_build_index.call_args[0][1],
+            "sources": {"plugins": [0, 2], "discourse": [2, 3]}
+        },
+        store_embeddings.UNIFIED_MANIFEST_PATH,
+        mock_logger
+    )
+
+
+def test_run_indexing_with_binary_stage(
+        mocker,
+        mock_save_faiss_index,
+        mock_save_chunk_store
+    ):
+    """Test that the binary index and the float vectors are stored on demand."""
+    _ = mock_save_faiss_index, mock_save_chunk_store
+    mock_logger = mocker.Mock()
+    vectors = np.random.rand(20, 16).astype("float32")
+    mocker.patch(
+        "rag.vectorstore.store_embeddings.embed_chunks",
+        return_value=(vectors, [{"id": str(i)} for i in range(20)])
+    )
+    mock_save_binary = mocker.patch("rag.vectorstore.store_embeddings.save_binary_index")
+    mock_save_vectors = mocker.patch("rag.vectorstore.store_embeddings.save_vectors")
+    mock_save_manifest = mocker.patch("rag.vectorstore.store_embeddings.save_manifest")
+
+    store_embeddings.run_indexing(mock_logger, binary=True)
+
+    assert mock_save_binary.call_args[0][0].ntotal == 20
+    assert mock_save_binary.call_args[0][1] == store_embeddings.BINARY_INDEX_PATH
+    np.testing.assert_array_equal(mock_save_vectors.call_args[0][0], vectors)
+    manifest = mock_save_manifest.call_args[0][0]
+    assert manifest["binary"]["type"] == "flat"
+    assert len(manifest["binary"]["thresholds"]) == 16
+
+
+def test_add_chunks_to_index_extends_binary_stage(mocker, tmp_path):
+    """Test that the binary index and the stored vectors follow incremental adds."""
+    mocker.patch.object(store_embeddings, "VECTOR_STORE_DIR", str(tmp_path))
+    mock_logger = mocker.Mock()
+    vectors = np.random.rand(3, 8).astype("float32")
+    chunks = [{"id": f"c{i}", "chunk_text": f"text {i}"} for i in range(3)]
+    index = faiss.IndexFlatL2(8)
+    index.add(vectors[:2])  # pylint: disable=no-value-for-parameter
+    faiss.write_index(index, str(tmp_path / "plugins_index.idx"))
+    write_chunk_store(chunks[:2], str(tmp_path / "plugins_chunks"))
+    binary_index, binary_spec = build_binary_index(vectors[:2], mock_logger)
+    faiss.write_index_binary(binary_index, str(tmp_path / "plugins_binary.idx"))
+    np.save(str(tmp_path / "plugins_vectors.npy"), vectors[:2])
+    save_manifest({"binary": binary_spec}, str(tmp_path / "plugins_manifest.json"), mock_logger)
+    mocker.patch(
+        "rag.vectorstore.store_embeddings.embed_chunks",
+        return_value=(vectors[2:], chunks[2:])
+    )
+
+    store_embeddings.add_chunks_to_index("plugins", ["new.json"], mock_logger)
+
+    assert faiss.read_index_binary(str(tmp_path / "plugins_binary.idx")).ntotal == 3
+    np.testing.assert_array_equal(np.load(str(tmp_path / "plugins_vectors.npy")), vectors)
+    assert not list(tmp_path.glob("*.tmp*"))
+
+
+def _write_source(tmp_path, vectors, chunks, index_spec, logger):
+    """Build and store the index, chunk store and manifest of the plugins source."""
+    faiss.write_index(
+        store_embeddings.build_faiss_index(vectors, index_spec, logger),
+        str(tmp_path / "plugins_index.idx")
+    )
+    write_chunk_store(chunks, str(tmp_path / "plugins_chunks"))
+    save_manifest({"index": index_spec}, str(tmp_path / "plugins_manifest.json"), logger)
+
+
+# pylint: disable=too-many-locals
+@pytest.mark.parametrize("index_type", ["flat", "ivf", "hnsw"])
+def test_sync_source_index_adds_and_removes_chunks(mocker, tmp_path, index_type):
+    """Test that a sync removes deleted chunks and embeds only the new ones."""
+    mocker.patch.object(store_embeddings, "VECTOR_STORE_DIR", str(tmp_path))
+    mock_logger = mocker.Mock()
+    rng = np.random.default_rng(0)
+    vectors = rng.random((400, 8)).astype("float32")
+    chunks = [{"id": f"c{i}", "chunk_text": f"text {i}"} for i in range(400)]
+    index_spec = store_embeddings.select_index_spec(398, 8, index_type=index_type)
+    _write_source(tmp_path, vectors[:398], chunks[:398], index_spec, mock_logger)
+    text_vectors = {chunk["chunk_text"]: vector for chunk, vector in zip(chunks, vectors)}
+    mock_embed_texts = mocker.patch(
+        "rag.vectorstore.store_embeddings.embed_texts",
+        side_effect=lambda texts, *_, **__: np.array([text_vectors[text] for text in texts])
+    )
+    current_chunks = chunks[:5] + chunks[6:]
+    mocker.patch("rag.vectorstore.store_embeddings.collect_all_chunks")
+    mocker.patch("rag.vectorstore.store_embeddings.prepare_chunks", return_value=current_chunks)
+
+    added, removed = store_embeddings.sync_source_index("plugins", ["chunks.json"], mock_logger)
+
+    assert (added, removed) == (2, 1)
+    if index_type != "hnsw":
+        assert mock_embed_texts.call_args_list[0][0][0] == ["text 398", "text 399"]
+        mock_embed_texts.assert_called_once()
+    index = faiss.read_index(str(tmp_path / "plugins_index.idx"))
+    store = ChunkStore.open(str(tmp_path / "plugins_chunks"))
+    assert [store.get_id(row) for row in range(len(store))] == [c["id"] for c in current_chunks]
+    assert index.ntotal == 399
+    expected_vectors = np.array([text_vectors[c["chunk_text"]] for c in current_chunks])
+    if index_type == "ivf":
+        faiss.ParameterSpace().set_index_parameter(index, "nprobe", 64)
+    _, labels = index.search(expected_vectors, 1)  # pylint: disable=no-value-for-parameter
+    assert (labels[:, 0] == np.arange(399)).mean() > 0.95
+
+
+def test_sync_source_index_up_to_date(mocker, tmp_path):
+    """Test that nothing is written when the chunk files did not change."""
+    mocker.patch.object(store_embeddings, "VECTOR_STORE_DIR", str(tmp_path))
+    mock_logger = mocker.Mock()
+    chunks = [{"id": f"c{i}", "chunk_text": f"text {i}"} for i in range(3)]
+    index_spec = store_embeddings.select_index_spec(3, 8, index_type="flat")
+    _write_source(tmp_path, np.random.rand(3, 8).astype("float32"), chunks, index_spec,
+                  mock_logger)
+    mocker.patch("rag.vectorstore.store_embeddings.collect_all_chunks")
+    mocker.patch("rag.vectorstore.store_embeddings.prepare_chunks", return_value=chunks + chunks)
+    mock_embed_texts = mocker.patch("rag.vectorstore.store_embeddings.embed_texts")
+    mock_save = mocker.patch("rag.vectorstore.store_embeddings.replace_index_and_chunk_store")
+
+    assert store_embeddings.sync_source_index("plugins", ["c.json"], mock_logger) == (0, 0)
+    mock_embed_texts.assert_not_called()
+    mock_save.assert_not_called()
+
+
+def test_sync_source_index_rebuilds_hnsw_without_manifest(mocker, tmp_path):
+    """Test that an HNSW rebuild picks an index spec when the manifest is missing."""
+    mocker.patch.object(store_embeddings, "VECTOR_STORE_DIR", str(tmp_path))
+    mock_logger = mocker.Mock()
+    vectors = np.random.rand(4, 8).astype("float32")
+    chunks = [{"id": f"c{i}", "chunk_text": f"text {i}"} for i in range(4)]
+    _write_source(tmp_path, vectors, chunks,
+                  store_embeddings.select_index_spec(4, 8, index_type="hnsw"), mock_logger)
+    os.remove(tmp_path / "plugins_manifest.json")
+    text_vectors = {chunk["chunk_text"]: vector for chunk, vector in zip(chunks, vectors)}
+    mocker.patch(
+        "rag.vectorstore.store_embeddings.embed_texts",
+        side_effect=lambda texts, *_, **__: np.array([text_vectors[text] for text in texts])
+    )
+    mocker.patch("rag.vectorstore.store_embeddings.collect_all_chunks")
+    mocker.patch("rag.vectorstore.store_embeddings.prepare_chunks", return_value=chunks[1:])
+
+    assert store_embeddings.sync_source_index("plugins", ["c.json"], mock_logger) == (0, 1)
+    assert faiss.read_index(str(tmp_path / "plugins_index.idx")).ntotal == 3
+    assert len(ChunkStore.open(str(tmp_path / "plugins_chunks"))) == 3
+
+
+def test_sync_source_index_keeps_previous_files_on_write_error(mocker, tmp_path):
+    """Test that a failed chunk store write leaves the previous index and chunk store."""
+    mocker.patch.object(store_embeddings, "VECTOR_STORE_DIR", str(tmp_path))
+    mock_logger = mocker.Mock()
+    vectors = np.random.rand(4, 8).astype("float32")
+    chunks = [{"id": f"c{i}", "chunk_text": f"text {i}"} for i in range(4)]
+    _write_source(tmp_path, vectors[:3], chunks[:3],
+                  store_embeddings.select_index_spec(3, 8, index_type="flat"), mock_logger)
+    mocker.patch("rag.vectorstore.store_embeddings.collect_all_chunks")
+    mocker.patch("rag.vectorstore.store_embeddings.prepare_chunks", return_value=chunks)
+    mocker.patch("rag.vectorstore.store_embeddings.embed_texts", return_value=vectors[3:])
+    mocker.patch("rag.vectorstore.vectorstore_utils.write_chunk_store",
+                 side_effect=OSError("disk full"))
+
+    with pytest.raises(OSError, match="disk full"):
+        store_embeddings.sync_source_index("plugins", ["c.json"], mock_logger)
+
+    assert faiss.read_index(str(tmp_path / "plugins_index.idx")).ntotal == 3
+    assert len(ChunkStore.open(str(tmp_path / "plugins_chunks"))) == 3
+    assert sorted(os.listdir(tmp_path)) == ["plugins_chunks", "plugins_index.idx",
+                                            "plugins_manifest.json"]
+
+
+def test_sync_source_index_updates_binary_stage(mocker, tmp_path):
+    """Test that the binary stage and the stored vectors follow the sync."""
+    mocker.patch.object(store_embeddings, "VECTOR_STORE_DIR", str(tmp_path))
+    mock_logger = mocker.Mock()
+    vectors = np.random.rand(4, 8).astype("float32")
+    chunks = [{"id": f"c{i}", "chunk_text": f"text {i}"} for i in range(4)]
+    index_spec = store_embeddings.select_index_spec(3, 8, index_type="flat")
+    _write_source(tmp_path, vectors[:3], chunks[:3], index_spec, mock_logger)
+    binary_index, binary_spec = build_binary_index(vectors[:3], mock_logger)
+    faiss.write_index_binary(binary_index, str(tmp_path / "plugins_binary.idx"))
+    np.save(str(tmp_path / "plugins_vectors.npy"), vectors[:3])
+    save_manifest({"index": index_spec, "binary": binary_spec},
+                  str(tmp_path / "plugins_manifest.json"), mock_logger)
+    mocker.patch("rag.vectorstore.store_embeddings.collect_all_chunks")
+    mocker.patch("rag.vectorstore.store_embeddings.prepare_chunks",
+                 return_value=[chunks[0], chunks[2], chunks[3]])
+    mocker.patch("rag.vectorstore.store_embeddings.embed_texts", return_value=vectors[3:])
+
+    store_embeddings.sync_source_index("plugins", ["c.json"], mock_logger)
+
+    assert faiss.read_index_binary(str(tmp_path / "plugins_binary.idx")).ntotal == 3
+    np.testing.assert_array_equal(np.load(str(tmp_path / "plugins_vectors.npy")),
+                                  vectors[[0, 2, 3]])
+
+
+def test_build_for_corpus_reuses_persisted_training(mocker, tmp_path):
+    """Test that a trained IVF index is persisted and reused by the next build."""
+    mock_logger = mocker.Mock()
+    trained_path = str(tmp_path / "plugins_trained.idx")
+    vectors = np.random.default_rng(0).random((2000, 8)).astype("float32")
+    mock_train = mocker.patch("rag.vectorstore.store_embeddings.train_faiss_index",
+                              side_effect=store_embeddings.train_faiss_index)
+
+    _, first_spec = store_embeddings._build_for_corpus(  # pylint: disable=protected-access
+        vectors, 2.0, "ivf", "none", False, mock_logger, trained_path=trained_path
+    )
+    index, second_spec = store_embeddings._build_for_corpus(  # pylint: disable=protected-access
+        vectors[:1500], 2.0, "ivf", "none", False, mock_logger, trained_path=trained_path
+    )
+
+    mock_train.assert_called_once()
+    assert second_spec["factory"] == first_spec["factory"]
+    assert second_spec["trained_on"] == 2000
+    assert index.ntotal == 1500
+
+
+def test_build_for_corpus_retrains_after_large_growth(mocker, tmp_path):
+    """Test that the persisted training is not reused for a much larger corpus."""
+    mock_logger = mocker.Mock()
+    trained_path = str(tmp_path / "plugins_trained.idx")
+    vectors = np.random.default_rng(0).random((5000, 8)).astype("float32")
+    mock_train = mocker.patch("rag.vectorstore.store_embeddings.train_faiss_index",
+                              side_effect=store_embeddings.train_faiss_index)
+
+    store_embeddings._build_for_corpus(  # pylint: disable=protected-access
+        vectors[:2000], 2.0, "ivf", "none", False, mock_logger, trained_path=trained_path
+    )
+    _, spec = store_embeddings._build_for_corpus(  # pylint: disable=protected-access
+        vectors, 2.0, "ivf", "none", False, mock_logger, trained_path=trained_path
+    )
+
+    assert mock_train.call_count == 2
+    assert "trained_on" not in spec
+
+
+def test_run_multi_source_indexing_builds_every_source(mocker, tmp_path):
+    """Test that every source with chunks gets its own index and the stages are timed."""
+    mocker.patch.object(store_embeddings, "VECTOR_STORE_DIR", str(tmp_path))
+    mock_logger = mocker.Mock()
+    source_chunks = {
+        "plugins": [{"id": f"p{i}", "chunk_text": f"plugin {i}"} for i in range(3)],
+        "docs": [{"id": f"d{i}", "chunk_text": f"doc {i}"} for i in range(2)],
+        "discourse": []
+    }
+    mocker.patch("rag.vectorstore.store_embeddings.collect_all_chunks",
+                 side_effect=lambda logger, files: files)
+    mocker.patch.dict(store_embeddings.SOURCE_CHUNK_FILES, source_chunks)
+    mocker.patch("rag.vectorstore.store_embeddings.prepare_chunks",
+                 side_effect=lambda chunks, logger: chunks)
+    mock_embed_texts = mocker.patch(
+        "rag.vectorstore.store_embeddings.embed_texts",
+        side_effect=lambda texts, *_, **__: np.random.rand(len(texts), 8).astype("float32")
+    )
+
+    stats = store_embeddings.run_multi_source_indexing(
+        ["plugins", "docs", "discourse"], mock_logger, processes=2
+    )
+
+    mock_embed_texts.assert_called_once()
+    assert mock_embed_texts.call_args[1]["processes"] == 2
+    assert list(stats) == ["load", "embed", "index"]
+    assert all(stage["chunks"] == 5 for stage in stats.values())
+    for source_name, n_chunks in (("plugins", 3), ("docs", 2)):
+        assert faiss.read_index(str(tmp_path / f"{source_name}_index.idx")).ntotal == n_chunks
+        store = ChunkStore.open(str(tmp_path / f"{source_name}_chunks"))
+        assert store.get_id(0) == source_chunks[source_name][0]["id"]
+    assert not (tmp_path / "discourse_index.idx").exists()
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_run_streaming_indexing_writes_vectors_to_disk(mocker, tmp_path, binary):
+    """Test that the streamed build indexes every chunk and only keeps the vectors on demand."""
+    for name in ("INDEX_PATH", "MANIFEST_PATH", "BINARY_INDEX_PATH", "VECTORS_PATH",
+                 "TRAINED_INDEX_PATH"):
+        mocker.patch.object(store_embeddings, name, str(tmp_path / name.lower()))
+    mocker.patch.object(store_embeddings, "CHUNK_STORE_PATH", str(tmp_path / "chunks"))
+    chunks = [{"id": str(i), "chunk_text": f"text {i}", "metadata": {"title": "t"},
+               "code_blocks": []} for i in range(7)]
+    vectors = np.random.rand(7, 8).astype("float32")
+    mocker.patch("rag.vectorstore.store_embeddings.iter_chunks", return_value=iter(chunks))
+    mocker.patch("rag.vectorstore.store_embeddings.iter_embedded_batches", return_value=iter([
+        (vectors[:4], chunks[:4]), (vectors[4:], chunks[4:])
+    ]))
+
+    store_embeddings.run_streaming_indexing(mocker.Mock(), binary=binary, batch_size=4)
+
+    index = faiss.read_index(store_embeddings.INDEX_PATH)
+    assert index.ntotal == 7
+    np.testing.assert_allclose(index.reconstruct_n(0, 7), vectors)
+    assert list(ChunkStore.open(store_embeddings.CHUNK_STORE_PATH)) == chunks
+    assert ("binary" in load_manifest(store_embeddings.MANIFEST_PATH, mocker.Mock())) == binary
+    if binary:
+        np.testing.assert_array_equal(np.load(store_embeddings.VECTORS_PATH), vectors)
+    assert sorted(p.name for p in tmp_path.iterdir() if "vectors" in p.name) == (
+        ["vectors_path"] if binary else [])
+
+
+def test_run_streaming_indexing_keeps_live_chunk_store_on_build_error(mocker, tmp_path):
+    """Test that the streamed chunks only replace the live chunk store with the index."""
+    mocker.patch.object(store_embeddings, "VECTORS_PATH", str(tmp_path / "vectors.npy"))
+    mocker.patch.object(store_embeddings, "CHUNK_STORE_PATH", str(tmp_path / "chunks"))
+    previous = [{"id": "old", "chunk_text": "old", "metadata": {}, "code_blocks": []}]
+    write_chunk_store(previous, store_embeddings.CHUNK_STORE_PATH)
+    chunks = [{"id": str(i), "chunk_text": f"text {i}", "metadata": {"title": "t"},
+               "code_blocks": []} for i in range(3)]
+    mocker.patch("rag.vectorstore.store_embeddings.iter_chunks", return_value=iter(chunks))
+    mocker.patch("rag.vectorstore.store_embeddings.iter_embedded_batches", return_value=iter([
+        (np.random.rand(3, 8).astype("float32"), chunks)
+    ]))
+    mocker.patch("rag.vectorstore.store_embeddings._build_for_corpus",
+                 side_effect=RuntimeError("training failed"))
+
+    with pytest.raises(RuntimeError):
+        store_embeddings.run_streaming_indexing(mocker.Mock())
+
+    assert list(ChunkStore.open(store_embeddings.CHUNK_STORE_PATH)) == previous
+    assert not (tmp_path / "chunks.tmp").exists()
+
+
+def test_stream_chunks_to_disk_detects_changed_files(mocker, tmp_path):
+    """Test that chunks added between the count and the embedding fail the build."""
+    chunks = [{"id": str(i), "chunk_text": f"text {i}", "metadata": {"title": "t"},
+               "code_blocks": []} for i in range(3)]
+    mocker.patch("rag.vectorstore.store_embeddings.iter_chunks", return_value=iter(chunks[:2]))
+    mocker.patch("rag.vectorstore.store_embeddings.iter_embedded_batches", return_value=iter([
+        (np.zeros((3, 4), dtype="float32"), chunks)
+    ]))
+
+    with pytest.raises(RuntimeError):
+        store_embeddings.stream_chunks_to_disk(str(tmp_path / "vectors.npy"),
+                                               str(tmp_path / "chunks"), mocker.Mock())
@@ -1,11 +1,16 @@
 """Unit Tests for vectorstore_utils."""
 
 import pickle
+import faiss
+import numpy as np
 from rag.vectorstore.vectorstore_utils import (
     save_faiss_index,
     load_faiss_index,
     load_metadata,
-    save_metadata
+    save_metadata,
+    save_manifest,
+    load_manifest,
+    apply_search_params
 )
 
 def test_save_faiss_index_success(mocker, tmp_path):
@@ -74,6 +79,39 @@ def test_load_faiss_index_oserror(mocker, tmp_path):
     assert result is None
 
 
+def test_load_faiss_index_mmap_flat_index(mocker, tmp_path):
+    """Test that a memory-mapped flat index returns the same results as a heap load."""
+    vectors = np.random.rand(50, 8).astype("float32")
+    index = faiss.IndexFlatL2(8)
+    index.add(vectors)  # pylint: disable=no-value-for-parameter
+    path = str(tmp_path / "flat.idx")
+    faiss.write_index(index, path)
+
+    mmap_index = load_faiss_index(path, mocker.Mock(), mmap=True)
+
+    assert mmap_index.ntotal == 50
+    np.testing.assert_array_equal(
+        mmap_index.search(vectors[:3], 2)[1],  # pylint: disable=no-value-for-parameter
+        index.search(vectors[:3], 2)[1]  # pylint: disable=no-value-for-parameter
+    )
+
+
+def test_load_faiss_index_mmap_falls_back_for_ivf(mocker, tmp_path):
+    """Test that IVF indexes are memory-mapped with IO_FLAG_MMAP only."""
+    vectors = np.random.rand(200, 8).astype("float32")
+    index = faiss.IndexIVFFlat(faiss.IndexFlatL2(8), 8, 4)
+    index.train(vectors)  # pylint: disable=no-value-for-parameter
+    index.add(vectors)  # pylint: disable=no-value-for-parameter
+    path = str(tmp_path / "ivf.idx")
+    faiss.write_index(index, path)
+    read_index_spy = mocker.spy(faiss, "read_index")
+
+    mmap_index = load_faiss_index(path, mocker.Mock(), mmap=True)
+
+    assert mmap_index.ntotal == 200
+    assert read_index_spy.call_args[0][1] == faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+
 def test_save_metadata_success(mocker, tmp_path):
     """Test that metadata is pickled successfully."""
     metadata = [{"chunk_text": "Jenkins on the moon"}]
@@ -138,3 +176,39 @@ def test_load_metadata_deserializing_error(mocker, tmp_path):
     mock_logger.error.assert_called_once()
     assert "Failed to load metadata" in mock_logger.error.call_args[0][0]
     assert result is None
+
+
+def test_save_and_load_manifest(mocker, tmp_path):
+    """Test that a saved manifest is loaded back unchanged."""
+    mock_logger = mocker.Mock()
+    path = str(tmp_path / "unified_manifest.json")
+    manifest = {"sources": {"plugins": [0, 10], "docs": [10, 25]}}
+
+    save_manifest(manifest, path, mock_logger)
+
+    assert load_manifest(path, mock_logger) == manifest
+
+
+def test_load_manifest_missing_or_invalid(mocker, tmp_path):
+    """Test that a missing manifest is empty and an invalid one is logged."""
+    mock_logger = mocker.Mock()
+    path = tmp_path / "plugins_manifest.json"
+
+    assert not load_manifest(str(path), mock_logger)
+    mock_logger.error.assert_not_called()
+
+    path.write_text("{not json", encoding="utf-8")
+    assert not load_manifest(str(path), mock_logger)
+    mock_logger.error.assert_called_once()
+
+
+def test_apply_search_params(mocker):
+    """Test that search parameters are set on the index and invalid ones are logged."""
+    mock_logger = mocker.Mock()
+    index = faiss.index_factory(4, "HNSW8")
+
+    apply_search_params(index, {"efSearch": 40}, mock_logger)
+    apply_search_params(index, {"nprobe": 4}, mock_logger)
+
+    assert index.hnsw.efSearch == 40
+    mock_logger.error.assert_called_once()
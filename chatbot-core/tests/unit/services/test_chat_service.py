@@ -1,8 +1,10 @@
 """Unit tests for chat service logic."""
 
 import logging
+from threading import Barrier, Event, Thread
 import pytest
-from api.services.chat_service import get_chatbot_reply, retrieve_context
+from api.services import chat_service
+from api.services.chat_service import get_chatbot_reply, retrieve_context, _execute_search_tools
 from api.config.loader import CONFIG
 from api.models.schemas import ChatResponse
 
@@ -110,6 +112,171 @@ def test_retrieve_context_with_missing_code(mock_get_relevant_documents, caplog)
     assert "More placeholders than code blocks in chunk with ID doc-111" in caplog.text
 
 
+def test_execute_search_tools_shares_retrieval_context(mocker):
+    """Test that every tool receives the logger and the same retrieval context."""
+    mock_tool = mocker.Mock(return_value="Tool output")
+    mocker.patch(
+        "api.services.chat_service.TOOL_REGISTRY",
+        {"search_jenkins_docs": mock_tool, "search_community_threads": mock_tool}
+    )
+    retrieval_context = mocker.Mock()
+    tool_calls = [
+        {"tool": "search_jenkins_docs", "params": {"query": "q", "keywords": "k"}},
+        {"tool": "search_community_threads", "params": {"query": "q", "keywords": "k"}}
+    ]
+
+    result = _execute_search_tools(tool_calls, retrieval_context)
+
+    assert mock_tool.call_count == 2
+    for call in mock_tool.call_args_list:
+        assert call.kwargs["retrieval_context"] is retrieval_context
+        assert call.kwargs["query"] == "q"
+    assert "[Result of the search tool search_jenkins_docs]:\nTool output" in result
+
+
+def test_execute_search_tools_runs_tools_concurrently_in_order(mocker):
+    """Test that the tools run at the same time and their outputs keep the call order."""
+    barrier = Barrier(2, timeout=5)
+    mocker.patch(
+        "api.services.chat_service.TOOL_REGISTRY",
+        {"search_jenkins_docs": lambda **kwargs: (barrier.wait(), "Docs output")[1],
+         "search_community_threads": lambda **kwargs: (barrier.wait(), "Threads output")[1]}
+    )
+    tool_calls = [
+        {"tool": "search_jenkins_docs", "params": {"query": "q", "keywords": "k"}},
+        {"tool": "search_community_threads", "params": {"query": "q", "keywords": "k"}}
+    ]
+
+    result = _execute_search_tools(tool_calls, mocker.Mock())
+
+    assert result.index("Docs output") < result.index("Threads output")
+
+
+def test_run_search_tools_abandons_tools_past_their_timeout(mocker):
+    """Test that a tool exceeding its timeout is left out and traced as timed out."""
+    release = Event()
+    mocker.patch.dict(chat_service.retrieval_config, {"tool_timeout_seconds": 0.2})
+    mocker.patch(
+        "api.services.chat_service.TOOL_REGISTRY",
+        {"search_jenkins_docs": lambda **kwargs: "Docs output",
+         "search_plugin_docs": lambda **kwargs: (release.wait(5), "Late output")[1]}
+    )
+    tool_calls = [
+        {"tool": "search_plugin_docs", "params": {"query": "q", "keywords": "k"}},
+        {"tool": "search_jenkins_docs", "params": {"query": "q", "keywords": "k"}}
+    ]
+
+    try:
+        results, trace = chat_service._run_search_tools(  # pylint: disable=protected-access
+            tool_calls, mocker.Mock())
+    finally:
+        release.set()
+
+    assert results == [{"tool": "search_jenkins_docs", "output": "Docs output"}]
+    assert [entry["status"] for entry in trace["tools"]] == ["timed out", "done"]
+    assert trace["tools"][0]["ms"] >= 200
+    assert trace["wall_ms"] < 5000
+
+
+def test_run_search_tools_cancels_tools_queued_past_the_budget(mocker):
+    """Test that a tool still queued at the end of the budget is traced as cancelled."""
+    release = Event()
+    mocker.patch.dict(chat_service.retrieval_config,
+                      {"tool_workers": 1, "tools_budget_seconds": 0.2})
+    mocker.patch(
+        "api.services.chat_service.TOOL_REGISTRY",
+        {"search_jenkins_docs": lambda **kwargs: "Docs output",
+         "search_plugin_docs": lambda **kwargs: (release.wait(5), "Late output")[1]}
+    )
+    mock_logger = mocker.patch("api.services.chat_service.logger")
+    tool_calls = [
+        {"tool": "search_plugin_docs", "params": {"query": "q", "keywords": "k"}},
+        {"tool": "search_jenkins_docs", "params": {"query": "q", "keywords": "k"}}
+    ]
+
+    try:
+        results, trace = chat_service._run_search_tools(  # pylint: disable=protected-access
+            tool_calls, mocker.Mock())
+    finally:
+        release.set()
+
+    assert not results
+    assert [entry["status"] for entry in trace["tools"]] == ["timed out", "cancelled in queue"]
+    warnings = [call.args[0] for call in mock_logger.warning.call_args_list]
+    assert any("timed out" in message for message in warnings)
+    assert any("in the queue" in message for message in warnings)
+
+
+def test_run_search_tools_times_out_tools_started_from_the_queue(mocker):
+    """Test that a tool started after waiting in the queue is held to its own timeout."""
+    release = Event()
+    mocker.patch.dict(chat_service.retrieval_config,
+                      {"tool_workers": 1, "tool_timeout_seconds": 0.2,
+                       "tools_budget_seconds": 10})
+    mocker.patch(
+        "api.services.chat_service.TOOL_REGISTRY",
+        {"search_jenkins_docs": lambda **kwargs: (release.wait(0.1), "Docs output")[1],
+         "search_plugin_docs": lambda **kwargs: (release.wait(10), "Late output")[1]}
+    )
+    tool_calls = [
+        {"tool": "search_jenkins_docs", "params": {"query": "q", "keywords": "k"}},
+        {"tool": "search_plugin_docs", "params": {"query": "q", "keywords": "k"}}
+    ]
+
+    try:
+        results, trace = chat_service._run_search_tools(  # pylint: disable=protected-access
+            tool_calls, mocker.Mock())
+    finally:
+        release.set()
+
+    assert results == [{"tool": "search_jenkins_docs", "output": "Docs output"}]
+    assert [entry["status"] for entry in trace["tools"]] == ["done", "timed out"]
+    assert trace["wall_ms"] < 5000
+
+
+def test_run_search_tools_does_not_share_threads_between_requests(mocker):
+    """Test that the tools of a request run while another request occupies its pool."""
+    release = Event()
+    mocker.patch.dict(chat_service.retrieval_config, {"tool_workers": 1})
+    mocker.patch(
+        "api.services.chat_service.TOOL_REGISTRY",
+        {"search_jenkins_docs": lambda **kwargs: "Docs output",
+         "search_plugin_docs": lambda **kwargs: (release.wait(5), "Late output")[1]}
+    )
+    slow_request = Thread(target=chat_service._run_search_tools,  # pylint: disable=protected-access
+                          args=([{"tool": "search_plugin_docs", "params": {}}], mocker.Mock()))
+    slow_request.start()
+
+    try:
+        results, _ = chat_service._run_search_tools(  # pylint: disable=protected-access
+            [{"tool": "search_jenkins_docs", "params": {}}], mocker.Mock())
+    finally:
+        release.set()
+        slow_request.join()
+
+    assert results == [{"tool": "search_jenkins_docs", "output": "Docs output"}]
+
+
+def test_run_search_tools_skips_failing_tools(mocker):
+    """Test that a failing tool is logged and does not prevent the others."""
+    def failing_tool(**kwargs):
+        raise RuntimeError("index failure")
+    mocker.patch(
+        "api.services.chat_service.TOOL_REGISTRY",
+        {"search_jenkins_docs": lambda **kwargs: "Docs output",
+         "search_plugin_docs": failing_tool}
+    )
+    tool_calls = [
+        {"tool": "search_plugin_docs", "params": {"query": "q", "keywords": "k"}},
+        {"tool": "search_jenkins_docs", "params": {"query": "q", "keywords": "k"}}
+    ]
+
+    results, trace = chat_service._run_search_tools(  # pylint: disable=protected-access
+        tool_calls, mocker.Mock())
+
+    assert results == [{"tool": "search_jenkins_docs", "output": "Docs output"}]
+    assert [entry["status"] for entry in trace["tools"]] == ["failed", "done"]
+
 
 def get_mock_documents(doc_type: str):
     """Helper function to retrieve the mock documents."""
@@ -0,0 +1,166 @@
+"""Unit tests for the startup of the API."""
+
+import asyncio
+import subprocess
+import sys
+import time
+from threading import Barrier, Event
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from api.models.lazy_resource import LazyResource
+from api.services import startup
+
+
+@pytest.fixture(autouse=True)
+def reset_readiness():
+    """Start every test with an empty readiness."""
+    startup.readiness.reset()
+    yield
+    startup.readiness.reset()
+
+
+def test_lazy_resource_loads_once_on_first_use(mocker):
+    """Test that the factory runs on first attribute access only."""
+    factory = mocker.Mock(return_value=mocker.Mock(encode=mocker.Mock(return_value="vector")))
+    resource = LazyResource("model", factory)
+
+    assert not resource.loaded
+    assert resource.encode("query") == "vector"
+    assert resource.encode("query") == "vector"
+    assert resource.loaded
+    factory.assert_called_once()
+
+
+def test_load_components_runs_loaders_concurrently(mocker):
+    """Test that the loaders run at the same time and their state is recorded."""
+    barrier = Barrier(2, timeout=5)
+    components = [("first", barrier.wait), ("second", barrier.wait)]
+
+    asyncio.run(startup.load_components(mocker.Mock(), components))
+
+    state = startup.readiness.as_dict()
+    assert {name: c["state"] for name, c in state["components"].items()} == {
+        "first": "ready", "second": "ready"
+    }
+    assert not state["ready"]
+
+
+def test_load_components_records_failures(mocker):
+    """Test that a failing component does not prevent the others from loading."""
+    mock_logger = mocker.Mock()
+
+    def fail():
+        raise OSError("model file not found")
+
+    asyncio.run(startup.load_components(mock_logger, [("llm", fail), ("bm25", lambda: None)]))
+
+    components = startup.readiness.as_dict()["components"]
+    assert components["llm"] == {"state": "failed", "error": "model file not found"}
+    assert components["bm25"]["state"] == "ready"
+    mock_logger.error.assert_called_once()
+
+
+def test_run_startup_warms_up_every_source(mocker):
+    """Test that the warm-up query runs through the retrieval of every source."""
+    mocker.patch("api.services.startup.get_startup_components",
+                 return_value=[("embedding_model", lambda: None)])
+    mocker.patch.dict(startup.startup_config, {"warmup_enabled": True, "warmup_query": "q"})
+    mock_retrieve = mocker.patch("api.services.startup.retrieve_documents")
+
+    asyncio.run(startup.run_startup(mocker.Mock()))
+
+    assert [c.kwargs["source_name"] for c in mock_retrieve.call_args_list] == list(
+        startup.CONFIG["tool_names"].values()
+    )
+    assert all(c.kwargs["query"] == "q" for c in mock_retrieve.call_args_list)
+    assert startup.readiness.as_dict() == {
+        "ready": True, "warm_up": "done",
+        "components": {"embedding_model": {"state": "ready", "seconds": mocker.ANY}}
+    }
+
+
+def test_run_startup_skips_warm_up_after_failure(mocker):
+    """Test that the warm-up does not run when a component failed to load."""
+    mocker.patch("api.services.startup.get_startup_components",
+                 return_value=[("llm", mocker.Mock(side_effect=RuntimeError("no model")))])
+    mocker.patch.dict(startup.startup_config, {"warmup_enabled": True})
+    mock_retrieve = mocker.patch("api.services.startup.retrieve_documents")
+
+    asyncio.run(startup.run_startup(mocker.Mock()))
+
+    mock_retrieve.assert_not_called()
+    assert startup.readiness.as_dict()["warm_up"] == "skipped"
+    assert not startup.readiness.is_ready()
+
+
+def _wait_until_ready(client, timeout=5):
+    """Poll /ready until it answers 200 or the timeout expires, and return the last answer."""
+    deadline = time.monotonic() + timeout
+    response = client.get("/ready")
+    while response.status_code != 200 and time.monotonic() < deadline:
+        time.sleep(0.01)
+        response = client.get("/ready")
+    return response
+
+
+def test_health_and_ready_endpoints_follow_the_lifespan(mocker):
+    """Test that /ready answers 200 once the background startup loaded the components."""
+    mocker.patch("api.services.startup.get_startup_components",
+                 return_value=[("embedding_model", lambda: None)])
+
+    with TestClient(app) as client:
+        health = client.get("/health")
+        ready = _wait_until_ready(client)
+
+    assert health.status_code == 200
+    assert health.json() == {"status": "ok"}
+    assert ready.status_code == 200
+    assert ready.json()["warm_up"] == "skipped"
+    assert ready.json()["components"]["embedding_model"]["state"] == "ready"
+
+
+def test_worker_serves_health_while_components_load(mocker):
+    """Test that /health answers and the chat routes answer 503 during the startup."""
+    loaded = Event()
+    mocker.patch("api.services.startup.get_startup_components",
+                 return_value=[("llm", lambda: loaded.wait(5))])
+    mocker.patch.dict(startup.startup_config, {"warmup_enabled": False})
+    message_url = f"{startup.CONFIG['api']['prefix']}/sessions/any/message"
+
+    with TestClient(app) as client:
+        health = client.get("/health")
+        ready = client.get("/ready")
+        reply = client.post(message_url, json={"message": "hello"})
+        loaded.set()
+        ready_after_load = _wait_until_ready(client)
+
+    assert health.status_code == 200
+    assert ready.status_code == 503
+    assert reply.status_code == 503
+    assert reply.headers["Retry-After"] == "5"
+    assert ready_after_load.status_code == 200
+
+
+def test_ready_endpoint_unavailable_before_startup():
+    """Test that /ready answers 503 until the components are loaded."""
+
+    response = TestClient(app).get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+
+
+def test_api_import_with_onnx_backend_does_not_load_torch():
+    """Test that importing the API with the ONNX backend leaves torch unloaded."""
+    script = (
+        "import sys\n"
+        "from api.config.loader import CONFIG\n"
+        "CONFIG['retrieval']['embedding_backend'] = 'onnx'\n"
+        "import api.main\n"
+        "sys.exit('torch' in sys.modules)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                            check=False)
+
+    assert result.returncode == 0, result.stderr or "torch was imported"
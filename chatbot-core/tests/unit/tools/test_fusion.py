@@ -0,0 +1,75 @@
+"""Unit tests for the vectorized score fusion, against the pure-Python reference."""
+
+import heapq
+import numpy as np
+import pytest
+from api.tools.fusion import fuse_scores
+from api.tools.utils import get_inverted_scores
+
+
+def random_results(seed, n_semantic=30, n_keyword=25, n_shared=10):
+    """Semantic and keyword results sharing some chunk ids."""
+    rng = np.random.default_rng(seed)
+    semantic_ids = [f"s{i}" for i in range(n_semantic - n_shared)]
+    semantic_ids += [f"k{i}" for i in range(n_shared)]
+    keyword_ids = [f"k{i}" for i in range(n_keyword)]
+    return (semantic_ids, rng.uniform(0.2, 1.5, n_semantic).tolist(),
+            keyword_ids, rng.uniform(2, 12, n_keyword).tolist())
+
+
+def reference_top_k(results, semantic_weight, top_k):
+    """The top-k of get_inverted_scores, popped from a heap."""
+    scores = get_inverted_scores(*results, semantic_weight)
+    heapq.heapify(scores)
+    return [heapq.heappop(scores) for _ in range(min(top_k, len(scores)))]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("semantic_weight", [0.5, 0.7, 0.0, 1.0])
+def test_minmax_matches_reference(seed, semantic_weight):
+    """Test that the min-max fusion ranks and scores like get_inverted_scores."""
+    results = random_results(seed)
+
+    chunk_ids, scores = fuse_scores(*results, semantic_weight, top_k=8)
+
+    expected = reference_top_k(results, semantic_weight, 8)
+    assert scores.tolist() == pytest.approx([-score for score, _ in expected])
+    assert chunk_ids == [chunk_id for _, chunk_id in expected]
+
+
+def test_minmax_handles_one_sided_and_equal_scores():
+    """Test the defaults for a missing list and the neutral scale of equal scores."""
+    chunk_ids, scores = fuse_scores(["a", "b"], [0.5, 0.5], [], [])
+
+    assert chunk_ids == ["a", "b"]
+    assert scores.tolist() == pytest.approx([0.5, 0.5])
+    assert not fuse_scores([], [], [], [])[0]
+
+
+def test_invalid_weight_falls_back_to_even_weights():
+    """Test that an out of range semantic weight is replaced by 0.5."""
+    results = random_results(0)
+
+    assert fuse_scores(*results, 3)[1].tolist() == pytest.approx(
+        fuse_scores(*results, 0.5)[1].tolist())
+
+
+def test_rrf_combines_reciprocal_ranks():
+    """Test that RRF sums the weighted reciprocal ranks of both lists."""
+    chunk_ids, scores = fuse_scores(["a", "b"], [0.9, 0.3], ["a", "c"], [8.0, 4.0],
+                                    method="rrf", rrf_k=60)
+
+    assert chunk_ids == ["a", "b", "c"]
+    assert scores.tolist() == pytest.approx([
+        0.5 / 62 + 0.5 / 61, 0.5 / 61, 0.5 / 62
+    ])
+
+
+def test_top_k_and_unknown_method():
+    """Test that top_k bounds the results and unknown methods are rejected."""
+    results = random_results(1)
+
+    assert len(fuse_scores(*results, top_k=3)[0]) == 3
+    assert not fuse_scores(*results, top_k=0)[0]
+    with pytest.raises(ValueError):
+        fuse_scores(*results, method="borda")
@@ -0,0 +1,54 @@
+"""Unit tests for the hybrid retrieval of the tools utilities."""
+
+from threading import Barrier
+import pytest
+from api.tools import utils
+from tests.unit.mocks.test_env import CHUNK_KEYWORD, CHUNK_SEMANTIC
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_retrieve_documents_joins_both_searches(mocker, mock_searches, concurrent):
+    """Test that both searches are run and their results returned, in both modes."""
+    mocker.patch.dict(utils.retrieval_config, {"concurrent_hybrid": concurrent})
+    logger = mocker.Mock()
+
+    results = utils.retrieve_documents("query", "keywords", logger, "plugins", "model")
+
+    assert results == ([CHUNK_SEMANTIC], [0.4], [CHUNK_KEYWORD], [3.2])
+    mock_searches[1].assert_called_once_with(
+        "keywords", logger, source_name="plugins",
+        keyword_threshold=utils.retrieval_config["keyword_threshold"],
+        top_k=utils.retrieval_config["top_k_keyword"], filters=None
+    )
+    assert logger.info.call_args[0][1] == "plugins"
+
+
+def test_retrieve_documents_runs_searches_concurrently(mocker, mock_searches):
+    """Test that the semantic and keyword searches run at the same time."""
+    mocker.patch.dict(utils.retrieval_config, {"concurrent_hybrid": True})
+    barrier = Barrier(2, timeout=5)
+    mock_searches[0].side_effect = lambda *args, **kwargs: (barrier.wait(), ([], []))[1]
+    mock_searches[1].side_effect = lambda *args, **kwargs: (barrier.wait(), [])[1]
+
+    assert utils.retrieve_documents("query", "keywords", mocker.Mock(), "docs",
+                                    "model") == ([], [], [], [])
+
+
+def test_retrieve_documents_propagates_keyword_errors(mocker, mock_searches):
+    """Test that an error of the keyword search running on the pool is raised."""
+    mocker.patch.dict(utils.retrieval_config, {"concurrent_hybrid": True})
+    mock_searches[1].side_effect = RuntimeError("index failure")
+
+    with pytest.raises(RuntimeError, match="index failure"):
+        utils.retrieve_documents("query", "keywords", mocker.Mock(), "docs", "model")
+
+
+def test_retrieve_documents_passes_filters_to_both_searches(mocker, mock_searches):
+    """Test that the metadata filters restrict both the semantic and keyword searches."""
+    filters = {"title": "git"}
+
+    utils.retrieve_documents("query", "keywords", mocker.Mock(), "plugins", "model",
+                             filters=filters)
+
+    assert mock_searches[0].call_args.kwargs["filters"] == filters
+    assert mock_searches[1].call_args.kwargs["filters"] == filters